@@ -1,10 +1,13 @@
 import streamlit as st
-import joblib
 import pandas as pd
 import numpy as np
 import os
+import sys
 from PIL import Image
 
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'website', 'backend'))
+from inference import load_pipeline, predict_risk
+
 # -----------------------------------------------------------------------------
 # 1. PAGE CONFIGURATION & STYLING
 # -----------------------------------------------------------------------------
@@ -93,7 +96,7 @@ def load_models():
     """Loads the ML pipeline and feature importance data."""
     model_dir = os.path.join(os.path.dirname(__file__), 'saved_models')
     try:
-        pipeline = joblib.load(os.path.join(model_dir, 'full_pipeline.pkl'))
+        pipeline = load_pipeline(os.path.join(model_dir, 'full_pipeline.pkl'))
         feature_importance = pd.read_csv(os.path.join(model_dir, 'feature_importance.csv'))
         return pipeline, feature_importance
     except Exception as e:
@@ -273,8 +276,9 @@ if page == "🧠 Model Tester":
 
                     try:
                         # 3. Prediction
-                        prediction = pipeline.predict(input_data)[0]
-                        prediction_proba = pipeline.predict_proba(input_data)[0]
+                        result = predict_risk(pipeline, input_data)
+                        prediction = result['prediction']
+                        risk_probability = result['probability']
 
                         # 4. Results Display
                         st.markdown('<div class="stCard">', unsafe_allow_html=True)
@@ -289,9 +293,9 @@ if page == "🧠 Model Tester":
                                 st.success(f"## ✅ Status: Low Risk\n\nThe model indicators suggest a stable mental health state.")
                                 
                         with res_col2:
-                            st.metric("Risk Probability", f"{prediction_proba[1]*100:.1f}%")
-                            st.progress(prediction_proba[1])
-                            st.caption(f"Confidence Level: {max(prediction_proba)*100:.1f}%")
+                            st.metric("Risk Probability", f"{risk_probability*100:.1f}%")
+                            st.progress(risk_probability)
+                            st.caption(f"Confidence Level: {max(risk_probability, 1 - risk_probability)*100:.1f}%")
                         
                         st.markdown("</div>", unsafe_allow_html=True)
 
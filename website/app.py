@@ -3,22 +3,41 @@ Flask API for MentIQ Mental Health Platform
 Serves the frontend website and provides API endpoints with database integration
 """
 
-from flask import Flask, send_from_directory, jsonify, request, session
+from flask import Flask, Response, send_from_directory, jsonify, request, session, stream_with_context
 from flask_cors import CORS
+import csv
+import io
+import json
+import logging
 import os
 import sys
-import joblib
-import pandas as pd
-import numpy as np
 from functools import wraps
 from datetime import datetime
 
 # Add backend directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
 from database import (
-    init_db, get_db_connection, create_user, authenticate_user,
-    get_user_by_id, get_user_by_email
+    init_db, start_checkpointer, get_db_connection, close_request_connection, create_user,
+    authenticate_user, get_user_by_id, get_user_by_email, update_last_login,
+    get_latest_assessment, list_user_appointments, parse_appointment_page_args, list_articles, list_doctors,
+    get_doctor_stats, parse_doctor_stats_args, set_appointment_status, remove_appointment,
+    AppointmentChangeError, SlotTakenError, parse_slot, insert_appointment,
+    parse_availability_args, get_doctor_availability, parse_search_args, search,
+    parse_nearby_args, list_nearby_doctors,
+    queue_assessment, queue_chatbot_conversation, write_queue
 )
+from passwords import hasher, PasswordPoolBusy
+from response_cache import doctors_cache, articles_cache
+from inference import (
+    MODEL_PATH, load_pipeline, load_scorer, predict_risk, score_records, parse_record,
+    get_risk_level_from_score
+)
+from batching import MicroBatcher
+from chatbot import (
+    FEATURE_BITS, LOW_MOOD_BIT, CRISIS_BIT, ANXIETY_BIT, SUPPORT_BIT, GREETING_BIT,
+    keyword_mask, build_score_table
+)
+from app_logging import configure_logging, logger
 
 # Initialize Flask app
 app = Flask(__name__, 
@@ -34,26 +53,59 @@ CORS(app,
      allow_headers=['Content-Type'],
      methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'])
 
+# Release the request's pooled database connection
+app.teardown_appcontext(close_request_connection)
+
+# Leveled, structured logs with request IDs (LOG_LEVEL / LOG_FORMAT env vars)
+configure_logging(app)
+
 # Configuration
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
 app.config['JSON_SORT_KEYS'] = False
+# Micro-batching of concurrent model calls (window 0 = disabled)
+app.config['ML_BATCH_WINDOW_MS'] = float(os.environ.get('ML_BATCH_WINDOW_MS', '0'))
+app.config['ML_BATCH_MAX_SIZE'] = int(os.environ.get('ML_BATCH_MAX_SIZE', '32'))
+# Rows scored (and inserted) per chunk by /api/assessment/batch
+app.config['BATCH_CHUNK_SIZE'] = int(os.environ.get('BATCH_CHUNK_SIZE', '500'))
 
 # Get the base directory
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 FRONTEND_DIR = os.path.join(BASE_DIR, 'frontend')
-MODEL_DIR = os.path.join(os.path.dirname(BASE_DIR), 'saved_models')
 
 # Load ML model for chatbot
 ML_PIPELINE = None
-try:
-    model_path = os.path.join(MODEL_DIR, 'full_pipeline.pkl')
-    if os.path.exists(model_path):
-        ML_PIPELINE = joblib.load(model_path)
-        print("✅ ML model loaded successfully")
-    else:
-        print("⚠️ ML model not found, using fallback responses")
-except Exception as e:
-    print(f"⚠️ Error loading ML model: {e}. Using fallback responses.")
+ML_SCORER = None
+# predict_risk result for every chatbot feature mask (see backend/chatbot.py)
+CHATBOT_SCORES = None
+
+
+def load_model(path=MODEL_PATH):
+    """Load (or reload) the ML pipeline; the current model is kept if loading fails"""
+    global ML_PIPELINE, ML_SCORER, CHATBOT_SCORES
+    try:
+        if not os.path.exists(path):
+            logger.warning('ML model not found, using fallback responses', extra={'path': path})
+            return False
+        pipeline = load_pipeline(path)
+        scorer = load_scorer(pipeline)
+        # The chatbot can only produce MASK_COUNT feature vectors, so score them all now
+        chatbot_scores = build_score_table(scorer)
+        if app.config['ML_BATCH_WINDOW_MS'] > 0:
+            scorer = MicroBatcher(
+                scorer,
+                window_ms=app.config['ML_BATCH_WINDOW_MS'],
+                max_batch_size=app.config['ML_BATCH_MAX_SIZE']
+            )
+        ML_PIPELINE, ML_SCORER, CHATBOT_SCORES = pipeline, scorer, chatbot_scores
+        logger.info('ML model loaded', extra={'path': path, 'scorer': type(ML_SCORER).__name__})
+        return True
+    except Exception:
+        fallback = 'keeping the current model' if ML_SCORER is not None else 'using fallback responses'
+        logger.exception(f'loading ML model failed, {fallback}', extra={'path': path})
+        return False
+
+
+load_model()
 
 
 # ==================== Authentication Decorator ====================
@@ -167,6 +219,11 @@ def register():
                 'error': 'Failed to create user'
             }), 500
             
+    except PasswordPoolBusy as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 503, {'Retry-After': '1'}
     except Exception as e:
         return jsonify({
             'success': False,
@@ -197,14 +254,7 @@ def login():
                 }), 403
             
             # Update last login
-            conn = get_db_connection()
-            cursor = conn.cursor()
-            cursor.execute(
-                'UPDATE users SET last_login = ? WHERE id = ?',
-                (datetime.now().isoformat(), user['id'])
-            )
-            conn.commit()
-            conn.close()
+            update_last_login(user['id'])
             
             # Set session
             session['user_id'] = user['id']
@@ -231,6 +281,11 @@ def login():
                 'error': 'Invalid email or password'
             }), 401
             
+    except PasswordPoolBusy as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 503, {'Retry-After': '1'}
     except Exception as e:
         return jsonify({
             'success': False,
@@ -279,23 +334,12 @@ def get_user_assessment():
     try:
         user_id = session.get('user_id')
         
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT * FROM assessments 
-            WHERE user_id = ? 
-            ORDER BY created_at DESC 
-            LIMIT 1
-        ''', (user_id,))
-        
-        assessment = cursor.fetchone()
-        conn.close()
+        assessment = get_latest_assessment(user_id)
         
         if assessment:
             return jsonify({
                 'success': True,
-                'assessment': dict(assessment)
+                'assessment': assessment
             }), 200
         else:
             return jsonify({
@@ -313,193 +357,107 @@ def get_user_assessment():
 @app.route('/api/profile/appointments', methods=['GET'])
 @login_required
 def get_user_appointments():
-    """Get user's appointments"""
+    """Get one page of the user's appointments (?limit=&cursor=&status=&from=&to=)"""
     try:
         user_id = session.get('user_id')
         user_type = session.get('user_type')
         
-        print(f"Getting appointments for user_id: {user_id}, user_type: {user_type}")  # Debug log
-        
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        try:
+            page = parse_appointment_page_args(request.args)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
         
-        if user_type == 'doctor':
-            # For doctors, get appointments where they are the doctor
-            # doctor_id in appointments table references users.id
-            cursor.execute('''
-                SELECT a.*, u.name as patient_name, u.email as patient_email
-                FROM appointments a
-                JOIN users u ON a.patient_id = u.id
-                WHERE a.doctor_id = ?
-                ORDER BY a.appointment_date DESC, a.appointment_time DESC
-            ''', (user_id,))
-            print(f"Querying appointments for doctor_id: {user_id}")  # Debug log
-        else:
-            # For patients, show all appointments (pending can be canceled, confirmed cannot)
-            # Join with doctors table using user_id, and also get doctor user info
-            cursor.execute('''
-                SELECT a.*, 
-                       d.name as doctor_name, 
-                       d.specialty, 
-                       d.city, 
-                       d.country,
-                       u.name as doctor_user_name
-                FROM appointments a
-                LEFT JOIN doctors d ON a.doctor_id = d.user_id
-                LEFT JOIN users u ON a.doctor_id = u.id
-                WHERE a.patient_id = ?
-                ORDER BY a.appointment_date DESC, a.appointment_time DESC
-            ''', (user_id,))
-            print(f"Querying appointments for patient_id: {user_id}")  # Debug log
-        
-        appointments = cursor.fetchall()
-        print(f"Found {len(appointments)} appointments")  # Debug log
-        
-        # Debug: print all appointments
-        for apt in appointments:
-            print(f"Appointment: {dict(apt)}")  # Debug log
+        logger.debug('fetching appointments', extra={'user_id': user_id, 'user_type': user_type})
         
-        conn.close()
+        appointments_list, next_cursor = list_user_appointments(user_id, user_type, **page)
         
-        appointments_list = []
-        for apt in appointments:
-            apt_dict = dict(apt)
-            # Format the appointment data
-            if user_type == 'doctor':
-                apt_dict['patient'] = apt_dict.get('patient_name', 'Unknown Patient')
-                apt_dict['patient_email'] = apt_dict.get('patient_email', '')
-            else:
-                # Use doctor_name from doctors table, fallback to doctor_user_name from users table
-                apt_dict['doctor'] = apt_dict.get('doctor_name') or apt_dict.get('doctor_user_name', 'Unknown Doctor')
-                apt_dict['location'] = f"{apt_dict.get('city', '')}, {apt_dict.get('country', '')}".strip()
-                if not apt_dict['location'] or apt_dict['location'] == ', ':
-                    apt_dict['location'] = 'Location TBD'
-            
-            appointments_list.append(apt_dict)
+        # Row-level detail only when DEBUG is enabled; ids and status, no patient data
+        if logger.isEnabledFor(logging.DEBUG):
+            for apt in appointments_list:
+                logger.debug('appointment row', extra={'appointment_id': apt['id'], 'status': apt['status']})
         
-        print(f"Returning {len(appointments_list)} appointments")  # Debug log
+        logger.debug('returning appointments', extra={'count': len(appointments_list)})
         return jsonify({
             'success': True,
             'appointments': appointments_list,
-            'count': len(appointments_list)
+            'count': len(appointments_list),
+            'next_cursor': next_cursor
         }), 200
         
     except Exception as e:
-        print(f"Error in get_user_appointments: {str(e)}")  # Debug log
-        import traceback
-        traceback.print_exc()
+        logger.exception('get_user_appointments failed')
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
 
-@app.route('/api/appointments/<int:appointment_id>/status', methods=['PUT'])
+@app.route('/api/doctor/stats', methods=['GET'])
 @login_required
-def update_appointment_status(appointment_id):
-    """Update appointment status"""
+def get_doctor_appointment_stats():
+    """Appointment counts for the doctor dashboard (?date=YYYY-MM-DD for the day's count)"""
     try:
-        user_id = session.get('user_id')
-        user_type = session.get('user_type')
-        data = request.get_json()
-        new_status = data.get('status')
-        
-        if new_status not in ['pending', 'confirmed', 'cancelled', 'completed']:
-            return jsonify({
-                'success': False,
-                'error': 'Invalid status'
-            }), 400
-        
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Check if user has permission (must be doctor or patient for their own appointment)
-        cursor.execute('SELECT * FROM appointments WHERE id = ?', (appointment_id,))
-        appointment = cursor.fetchone()
-        
-        if not appointment:
-            conn.close()
-            return jsonify({
-                'success': False,
-                'error': 'Appointment not found'
-            }), 404
-        
-        appointment_dict = dict(appointment)
-        
-        # Verify permission
-        if user_type == 'doctor' and appointment_dict['doctor_id'] != user_id:
-            conn.close()
+        if session.get('user_type') != 'doctor':
             return jsonify({
                 'success': False,
-                'error': 'Unauthorized'
-            }), 403
-        elif user_type == 'patient' and appointment_dict['patient_id'] != user_id:
-            conn.close()
-            return jsonify({
-                'success': False,
-                'error': 'Unauthorized'
+                'error': 'Only doctors have appointment stats'
             }), 403
         
-        # Cannot cancel confirmed appointments
-        if appointment_dict['status'] == 'confirmed' and new_status == 'cancelled':
-            conn.close()
+        try:
+            args = parse_doctor_stats_args(request.args)
+        except ValueError as e:
             return jsonify({
                 'success': False,
-                'error': 'Cannot cancel confirmed appointments'
+                'error': str(e)
             }), 400
         
-        # Update status
-        print(f"Updating appointment {appointment_id} to status: {new_status}")  # Debug log
-        print(f"Current appointment status: {appointment_dict['status']}")  # Debug log
-        
-        cursor.execute('''
-            UPDATE appointments 
-            SET status = ? 
-            WHERE id = ?
-        ''', (new_status, appointment_id))
-        
-        rows_affected = cursor.rowcount
-        print(f"Rows affected by update: {rows_affected}")  # Debug log
+        return jsonify({
+            'success': True,
+            'stats': get_doctor_stats(session.get('user_id'), **args)
+        }), 200
         
-        if rows_affected == 0:
-            conn.rollback()
-            conn.close()
-            return jsonify({
-                'success': False,
-                'error': 'No rows updated. Appointment may not exist or status is the same.'
-            }), 400
+    except Exception as e:
+        logger.exception('get_doctor_appointment_stats failed')
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/appointments/<int:appointment_id>/status', methods=['PUT'])
+@login_required
+def update_appointment_status(appointment_id):
+    """Update appointment status (allowed changes: APPOINTMENT_TRANSITIONS in database.py)"""
+    try:
+        data = request.get_json()
+        new_status = data.get('status')
         
         try:
-            conn.commit()
-            print(f"Committed update for appointment {appointment_id}")  # Debug log
-            
-            # Verify the update
-            cursor.execute('SELECT status FROM appointments WHERE id = ?', (appointment_id,))
-            updated_appointment = cursor.fetchone()
-            if updated_appointment:
-                print(f"Verified: Appointment {appointment_id} now has status: {updated_appointment['status']}")  # Debug log
-        except Exception as commit_error:
-            print(f"Error committing update: {str(commit_error)}")  # Debug log
-            conn.rollback()
-            conn.close()
+            appointment = set_appointment_status(
+                appointment_id, session.get('user_id'), session.get('user_type'), new_status
+            )
+        except AppointmentChangeError as e:
             return jsonify({
                 'success': False,
-                'error': f'Failed to commit update: {str(commit_error)}'
-            }), 500
+                'error': str(e)
+            }), e.status_code
         
-        conn.close()
+        logger.debug('appointment status updated', extra={
+            'appointment_id': appointment_id, 'status': appointment['status']
+        })
         
         return jsonify({
             'success': True,
             'message': 'Appointment status updated',
             'appointment_id': appointment_id,
-            'status': new_status
+            'status': appointment['status']
         }), 200
         
     except Exception as e:
-        print(f"Error updating appointment status: {str(e)}")  # Debug log
-        import traceback
-        traceback.print_exc()
+        logger.exception('update_appointment_status failed')
         return jsonify({
             'success': False,
             'error': str(e)
@@ -509,89 +467,19 @@ def update_appointment_status(appointment_id):
 @app.route('/api/appointments/<int:appointment_id>', methods=['DELETE'])
 @login_required
 def delete_appointment(appointment_id):
-    """Delete an appointment (only for pending appointments, cannot delete confirmed)"""
+    """Delete an appointment (pending, cancelled or completed; never a confirmed one)"""
     try:
-        user_id = session.get('user_id')
-        user_type = session.get('user_type')
-        
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Check if appointment exists
-        cursor.execute('SELECT * FROM appointments WHERE id = ?', (appointment_id,))
-        appointment = cursor.fetchone()
-        
-        if not appointment:
-            conn.close()
-            return jsonify({
-                'success': False,
-                'error': 'Appointment not found'
-            }), 404
-        
-        appointment_dict = dict(appointment)
-        
-        # Verify permission
-        if user_type == 'doctor' and appointment_dict['doctor_id'] != user_id:
-            conn.close()
-            return jsonify({
-                'success': False,
-                'error': 'Unauthorized'
-            }), 403
-        elif user_type == 'patient' and appointment_dict['patient_id'] != user_id:
-            conn.close()
-            return jsonify({
-                'success': False,
-                'error': 'Unauthorized'
-            }), 403
-        
-        # Cannot delete confirmed appointments
-        if appointment_dict['status'] == 'confirmed':
-            conn.close()
-            return jsonify({
-                'success': False,
-                'error': 'Cannot delete confirmed appointments'
-            }), 400
-        
-        # Delete the appointment
-        print(f"Deleting appointment {appointment_id}")  # Debug log
-        print(f"Appointment status before delete: {appointment_dict['status']}")  # Debug log
-        
-        cursor.execute('DELETE FROM appointments WHERE id = ?', (appointment_id,))
-        
-        rows_affected = cursor.rowcount
-        print(f"Rows affected by delete: {rows_affected}")  # Debug log
-        
-        if rows_affected == 0:
-            conn.rollback()
-            conn.close()
-            return jsonify({
-                'success': False,
-                'error': 'No rows deleted. Appointment may not exist.'
-            }), 400
-        
         try:
-            conn.commit()
-            print(f"Committed delete for appointment {appointment_id}")  # Debug log
-            
-            # Verify the delete (before closing connection)
-            cursor.execute('SELECT * FROM appointments WHERE id = ?', (appointment_id,))
-            deleted_check = cursor.fetchone()
-            if deleted_check:
-                print(f"WARNING: Appointment {appointment_id} still exists after delete!")  # Debug log
-            else:
-                print(f"Verified: Appointment {appointment_id} successfully deleted")  # Debug log
-        except Exception as commit_error:
-            print(f"Error committing delete: {str(commit_error)}")  # Debug log
-            import traceback
-            traceback.print_exc()
-            conn.rollback()
-            conn.close()
+            appointment = remove_appointment(appointment_id, session.get('user_id'), session.get('user_type'))
+        except AppointmentChangeError as e:
             return jsonify({
                 'success': False,
-                'error': f'Failed to commit delete: {str(commit_error)}'
-            }), 500
-        finally:
-            conn.close()
+                'error': str(e)
+            }), e.status_code
+        
+        logger.debug('appointment deleted', extra={
+            'appointment_id': appointment_id, 'status': appointment['status']
+        })
         
         return jsonify({
             'success': True,
@@ -599,9 +487,7 @@ def delete_appointment(appointment_id):
         }), 200
         
     except Exception as e:
-        print(f"Error deleting appointment: {str(e)}")  # Debug log
-        import traceback
-        traceback.print_exc()
+        logger.exception('delete_appointment failed')
         return jsonify({
             'success': False,
             'error': str(e)
@@ -620,12 +506,26 @@ def health_check():
     }), 200
 
 
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """Runtime counters for this worker process"""
+    return jsonify({
+        'success': True,
+        'pid': os.getpid(),
+        'password_hashing': hasher.stats(),
+        'response_cache': {
+            'doctors': doctors_cache.stats(),
+            'articles': articles_cache.stats()
+        },
+        'write_queue': write_queue.stats()
+    }), 200
+
+
 @app.route('/api/consultation', methods=['POST'])
 def submit_consultation():
     """Handle consultation booking submission and create appointment"""
     try:
         data = request.get_json()
-        print(f"Consultation request data: {data}")  # Debug log
         
         # Validate required fields
         required_fields = ['name', 'email', 'phone', 'date', 'time', 'type', 'doctor_id']
@@ -638,7 +538,6 @@ def submit_consultation():
         
         # Get user_id from session if logged in
         user_id = session.get('user_id')
-        print(f"User ID from session: {user_id}")  # Debug log
         
         if not user_id:
             return jsonify({
@@ -646,26 +545,31 @@ def submit_consultation():
                 'error': 'You must be logged in to book an appointment'
             }), 401
         
+        try:
+            appointment_date, appointment_time = parse_slot(data['date'], data['time'])
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+        
         # Verify doctor exists
         conn = get_db_connection()
         cursor = conn.cursor()
         
         doctor_id = int(data['doctor_id'])
-        print(f"Looking for doctor with user_id: {doctor_id}")  # Debug log
         
         cursor.execute('SELECT user_id FROM doctors WHERE user_id = ?', (doctor_id,))
         doctor = cursor.fetchone()
         
         if not doctor:
             conn.close()
-            print(f"Doctor not found with user_id: {doctor_id}")  # Debug log
+            logger.debug('consultation for unknown doctor', extra={'doctor_id': doctor_id})
             return jsonify({
                 'success': False,
                 'error': 'Selected doctor not found'
             }), 404
         
-        print(f"Doctor found: {doctor}")  # Debug log
-        
         # Save consultation to database
         cursor.execute('''
             INSERT INTO consultations (user_id, name, email, phone, consultation_date, consultation_type, message)
@@ -675,27 +579,34 @@ def submit_consultation():
             data['name'],
             data['email'],
             data['phone'],
-            data['date'],
+            appointment_date,
             data['type'],
             data.get('message', '')
         ))
         
         consultation_id = cursor.lastrowid
         
-        # Create appointment in appointments table
-        cursor.execute('''
-            INSERT INTO appointments (patient_id, doctor_id, appointment_date, appointment_time, notes, status)
-            VALUES (?, ?, ?, ?, ?, 'pending')
-        ''', (
-            user_id,
-            doctor_id,
-            data['date'],
-            data['time'],
-            f"Consultation Type: {data['type']}. {data.get('message', '')}"
-        ))
+        # Create appointment in appointments table (fails if the slot is taken)
+        try:
+            appointment_id = insert_appointment(
+                cursor,
+                user_id,
+                doctor_id,
+                appointment_date,
+                appointment_time,
+                f"Consultation Type: {data['type']}. {data.get('message', '')}"
+            )
+        except SlotTakenError as e:
+            conn.rollback()
+            conn.close()
+            return jsonify({
+                'success': False,
+                'error': f'{e}. Please choose another time'
+            }), 409
         
-        appointment_id = cursor.lastrowid
-        print(f"Created appointment with ID: {appointment_id}, patient_id: {user_id}, doctor_id: {doctor_id}")  # Debug log
+        logger.debug('consultation appointment created', extra={
+            'appointment_id': appointment_id, 'patient_id': user_id, 'doctor_id': doctor_id
+        })
         conn.commit()
         conn.close()
         
@@ -707,42 +618,50 @@ def submit_consultation():
         }), 201
         
     except Exception as e:
-        print(f"Error in submit_consultation: {str(e)}")  # Debug log
-        import traceback
-        traceback.print_exc()
+        logger.exception('submit_consultation failed')
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
 
+def articles_json(category=None):
+    """Serialized /api/articles body (also used by the async API)"""
+    articles_list = list_articles(category)
+    return app.json.response({
+        'success': True,
+        'articles': articles_list,
+        'count': len(articles_list)
+    }).get_data()
+
+
+def doctors_json(country=None, city=None, specialty=None):
+    """Serialized /api/doctors body (also used by the async API)"""
+    doctors_list = list_doctors(country=country, city=city, specialty=specialty)
+    return app.json.response({
+        'success': True,
+        'doctors': doctors_list,
+        'count': len(doctors_list)
+    }).get_data()
+
+
+def cached_json_response(cached):
+    """Serve cached JSON bytes with ETag/Last-Modified; 304 if the client's copy is current"""
+    response = app.response_class(cached.body, mimetype='application/json')
+    response.set_etag(cached.etag)
+    response.last_modified = cached.last_modified
+    # Browsers may keep the body but must revalidate before reusing it
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
 @app.route('/api/articles', methods=['GET'])
 def get_articles():
     """Get mental health articles from database"""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        category = request.args.get('category')
-        
-        if category:
-            cursor.execute('''
-                SELECT * FROM articles WHERE category = ?
-                ORDER BY created_at DESC
-            ''', (category,))
-        else:
-            cursor.execute('SELECT * FROM articles ORDER BY created_at DESC')
-        
-        articles = cursor.fetchall()
-        conn.close()
-        
-        articles_list = [dict(article) for article in articles]
-        
-        return jsonify({
-            'success': True,
-            'articles': articles_list,
-            'count': len(articles_list)
-        }), 200
+        category = request.args.get('category') or None
+        cached = articles_cache.get_or_build((category,), lambda: articles_json(category))
+        return cached_json_response(cached)
         
     except Exception as e:
         return jsonify({
@@ -755,41 +674,97 @@ def get_articles():
 def get_doctors():
     """Get list of doctors from database with optional filtering"""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        key = tuple(request.args.get(name) or None for name in ('country', 'city', 'specialty'))
+        cached = doctors_cache.get_or_build(key, lambda: doctors_json(*key))
+        return cached_json_response(cached)
         
-        country = request.args.get('country')
-        city = request.args.get('city')
-        specialty = request.args.get('specialty')
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/doctors/nearby', methods=['GET'])
+def get_nearby_doctors():
+    """Doctors closest to a point, nearest first (?lat=&lon=&radius=km&limit=)"""
+    try:
+        try:
+            args = parse_nearby_args(request.args)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
         
-        query = 'SELECT * FROM doctors WHERE 1=1'
-        params = []
+        doctors_list = list_nearby_doctors(**args)
+        return jsonify({
+            'success': True,
+            'doctors': doctors_list,
+            'count': len(doctors_list)
+        }), 200
         
-        if country:
-            query += ' AND country = ?'
-            params.append(country)
-        if city:
-            query += ' AND city = ?'
-            params.append(city)
-        if specialty:
-            query += ' AND specialty = ?'
-            params.append(specialty)
+    except Exception as e:
+        logger.exception('get_nearby_doctors failed')
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/doctors/<int:doctor_id>/availability', methods=['GET'])
+def get_doctor_free_slots(doctor_id):
+    """Free appointment slots of a doctor per day (?from=YYYY-MM-DD&to=YYYY-MM-DD)"""
+    try:
+        try:
+            args = parse_availability_args(request.args)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
         
-        query += ' ORDER BY rating DESC, experience_years DESC'
+        days = get_doctor_availability(doctor_id, **args)
+        if days is None:
+            return jsonify({
+                'success': False,
+                'error': 'Doctor not found'
+            }), 404
         
-        cursor.execute(query, params)
-        doctors = cursor.fetchall()
-        conn.close()
+        return jsonify({
+            'success': True,
+            'doctor_id': doctor_id,
+            'days': days
+        }), 200
         
-        doctors_list = [dict(doctor) for doctor in doctors]
+    except Exception as e:
+        logger.exception('get_doctor_free_slots failed')
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/search', methods=['GET'])
+def search_site():
+    """Full-text search over articles and doctors (?q=&type=articles,doctors&limit=)"""
+    try:
+        try:
+            terms, kinds, limit = parse_search_args(request.args)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
         
         return jsonify({
             'success': True,
-            'doctors': doctors_list,
-            'count': len(doctors_list)
+            'query': request.args.get('q'),
+            **search(terms, kinds, limit)
         }), 200
         
     except Exception as e:
+        logger.exception('search failed')
         return jsonify({
             'success': False,
             'error': str(e)
@@ -848,30 +823,30 @@ def submit_assessment():
             rumination = 4
         
         # Prepare input for ML model
-        input_data = pd.DataFrame({
-            'Age': [age],
-            'Gender': [gender],
-            'Employment_Status': [employment_status],
-            'Marital_Status': [marital_status],
-            'Work_Hours_per_Week': [work_hours],
-            'Financial_Stress': [financial_stress],
-            'Physical_Activity_Hours_per_Week': [physical_activity],
-            'Screen_Time_per_Day_hours': [screen_time],
-            'Sleep_Hours_per_Night': [sleep_hours],
-            'Alcohol_Units_per_Week': [alcohol_units],
-            'Smoking_Status': [smoking_status],
-            'Family_History': [family_history],
-            'Chronic_Condition': [chronic_condition],
-            'Support_System_Score': [support_system],
-            'Stress_Level_Score': [stress_level],
-            'Rumination_Score': [rumination],
-            'Feeling_Nervous': [feeling_nervous],
-            'Trouble_Concentrating': [trouble_concentrating],
-            'Hopelessness': [hopelessness],
-            'Avoids_People': [avoids_people],
-            'Nightmares': [nightmares],
-            'Medication_Usage': [medication_usage]
-        })
+        input_data = {
+            'Age': age,
+            'Gender': gender,
+            'Employment_Status': employment_status,
+            'Marital_Status': marital_status,
+            'Work_Hours_per_Week': work_hours,
+            'Financial_Stress': financial_stress,
+            'Physical_Activity_Hours_per_Week': physical_activity,
+            'Screen_Time_per_Day_hours': screen_time,
+            'Sleep_Hours_per_Night': sleep_hours,
+            'Alcohol_Units_per_Week': alcohol_units,
+            'Smoking_Status': smoking_status,
+            'Family_History': family_history,
+            'Chronic_Condition': chronic_condition,
+            'Support_System_Score': support_system,
+            'Stress_Level_Score': stress_level,
+            'Rumination_Score': rumination,
+            'Feeling_Nervous': feeling_nervous,
+            'Trouble_Concentrating': trouble_concentrating,
+            'Hopelessness': hopelessness,
+            'Avoids_People': avoids_people,
+            'Nightmares': nightmares,
+            'Medication_Usage': medication_usage
+        }
         
         # Make prediction using ML model
         prediction = None
@@ -879,27 +854,17 @@ def submit_assessment():
         risk_score = 0
         risk_level = "Low"
         
-        if ML_PIPELINE:
+        if ML_SCORER:
             try:
-                prediction = ML_PIPELINE.predict(input_data)[0]
-                prediction_proba = ML_PIPELINE.predict_proba(input_data)[0]
-                
-                # Convert prediction to risk score (0-100)
-                # prediction_proba[1] is probability of being at risk
-                risk_score = int(prediction_proba[1] * 100)
-                
-                # Determine risk level
-                if risk_score <= 20:
-                    risk_level = "Low"
-                elif risk_score <= 40:
-                    risk_level = "Moderate"
-                elif risk_score <= 65:
-                    risk_level = "High"
-                else:
-                    risk_level = "Very High"
+                # Label, probability and risk band from one forward pass
+                result = predict_risk(ML_SCORER, input_data)
+                prediction = result['prediction']
+                prediction_proba = result['probability']
+                risk_score = result['risk_score']
+                risk_level = result['risk_level']
                     
             except Exception as e:
-                print(f"ML prediction error: {e}")
+                logger.exception('ML prediction failed, using fallback')
                 # Fallback to simple calculation
                 risk_score = calculate_fallback_risk(data)
                 risk_level = get_risk_level_from_score(risk_score)
@@ -916,21 +881,14 @@ def submit_assessment():
         user_id = session.get('user_id')
         if user_id:
             try:
-                conn = get_db_connection()
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO assessments (user_id, age, gender, risk_score, risk_level, prediction, prediction_probability, created_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    user_id, age, gender, risk_score, risk_level, 
+                # Written behind the response, batched with other requests' inserts
+                queue_assessment(
+                    user_id, age, gender, risk_score, risk_level,
                     int(prediction) if prediction is not None else None,
-                    float(prediction_proba[1]) if prediction_proba is not None else None,
-                    datetime.now().isoformat()
-                ))
-                conn.commit()
-                conn.close()
+                    prediction_proba
+                )
             except Exception as e:
-                print(f"Error saving assessment: {e}")
+                logger.exception('saving assessment failed')
         
         return jsonify({
             'success': True,
@@ -938,7 +896,7 @@ def submit_assessment():
                 'riskScore': risk_score,
                 'riskLevel': risk_level,
                 'prediction': int(prediction) if prediction is not None else None,
-                'predictionProbability': float(prediction_proba[1]) if prediction_proba is not None else None,
+                'predictionProbability': prediction_proba,
                 'riskFactors': risk_factors,
                 'recommendations': recommendations
             }
@@ -951,6 +909,111 @@ def submit_assessment():
         }), 500
 
 
+def iter_batch_records():
+    """Yield raw input rows from the request body without buffering the stream.
+
+    Supports a JSON array (application/json), JSON lines
+    (application/x-ndjson) and CSV (text/csv) with the
+    mental_health_data_v2.csv header. A JSON line that does not parse is
+    yielded as a ValueError, so it is reported for its row and the rest of
+    the stream is still scored.
+    """
+    content_type = request.mimetype
+    if content_type == 'application/json':
+        records = request.get_json()
+        if not isinstance(records, list):
+            raise ValueError('Expected a JSON array of records')
+        yield from records
+    elif content_type in ('application/x-ndjson', 'application/jsonl'):
+        for line in io.TextIOWrapper(request.stream, encoding='utf-8', errors='replace'):
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield ValueError(f'Invalid JSON: {e}')
+    elif content_type == 'text/csv':
+        yield from csv.DictReader(io.TextIOWrapper(request.stream, encoding='utf-8', errors='replace', newline=''))
+    else:
+        raise ValueError(f'Unsupported content type: {content_type}')
+
+
+def score_batch_chunk(chunk, user_id, cursor):
+    """Score one chunk of (row_number, raw_record) pairs and save the assessments"""
+    results = []
+    valid = []
+    for row_number, record in chunk:
+        if isinstance(record, ValueError):
+            results.append({'row': row_number, 'error': str(record)})
+            continue
+        if not isinstance(record, dict):
+            results.append({'row': row_number, 'error': 'Expected a JSON object'})
+            continue
+        try:
+            valid.append((row_number, parse_record(record)))
+        except ValueError as e:
+            results.append({'row': row_number, 'error': str(e)})
+
+    if valid:
+        scores = score_records(ML_SCORER, [features for _, features in valid])
+        created_at = datetime.now().isoformat()
+        cursor.executemany('''
+            INSERT INTO assessments (user_id, age, gender, risk_score, risk_level, prediction, prediction_probability, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [
+            (user_id, features['Age'], features['Gender'], score['risk_score'],
+             score['risk_level'], score['prediction'], score['probability'], created_at)
+            for (_, features), score in zip(valid, scores)
+        ])
+        results.extend({'row': row_number, **score} for (row_number, _), score in zip(valid, scores))
+
+    results.sort(key=lambda result: result['row'])
+    return results
+
+
+@app.route('/api/assessment/batch', methods=['POST'])
+@login_required
+def submit_assessment_batch():
+    """Score a cohort of assessments in vectorized chunks, streaming results as JSON lines"""
+    if not ML_SCORER:
+        return jsonify({
+            'success': False,
+            'error': 'ML model not available'
+        }), 503
+
+    if request.mimetype not in ('application/json', 'application/x-ndjson', 'application/jsonl', 'text/csv'):
+        return jsonify({
+            'success': False,
+            'error': 'Send a JSON array, JSON lines or CSV'
+        }), 415
+
+    user_id = session.get('user_id')
+    chunk_size = app.config['BATCH_CHUNK_SIZE']
+
+    def generate():
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        chunk = []
+        try:
+            for row_number, record in enumerate(iter_batch_records()):
+                chunk.append((row_number, record))
+                if len(chunk) == chunk_size:
+                    results = score_batch_chunk(chunk, user_id, cursor)
+                    conn.commit()
+                    chunk = []
+                    yield ''.join(json.dumps(result) + '\n' for result in results)
+            if chunk:
+                results = score_batch_chunk(chunk, user_id, cursor)
+                conn.commit()
+                yield ''.join(json.dumps(result) + '\n' for result in results)
+        except Exception as e:
+            conn.rollback()
+            yield json.dumps({'error': str(e)}) + '\n'
+        finally:
+            conn.close()
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
 def calculate_fallback_risk(data):
     """Fallback risk calculation if ML model unavailable"""
     score = 0
@@ -1001,18 +1064,6 @@ def calculate_fallback_risk(data):
     return min(100, max(0, score))
 
 
-def get_risk_level_from_score(score):
-    """Get risk level from score"""
-    if score <= 20:
-        return "Low"
-    elif score <= 40:
-        return "Moderate"
-    elif score <= 65:
-        return "High"
-    else:
-        return "Very High"
-
-
 def generate_risk_factors(data):
     """Generate list of identified risk factors"""
     factors = []
@@ -1120,18 +1171,29 @@ def book_appointment():
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        cursor.execute('''
-            INSERT INTO appointments (patient_id, doctor_id, appointment_date, appointment_time, notes)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (
-            patient_id,
-            data['doctor_id'],
-            data['appointment_date'],
-            data['appointment_time'],
-            data.get('notes', '')
-        ))
+        try:
+            appointment_id = insert_appointment(
+                cursor,
+                patient_id,
+                data['doctor_id'],
+                data['appointment_date'],
+                data['appointment_time'],
+                data.get('notes', '')
+            )
+        except ValueError as e:
+            conn.close()
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+        except SlotTakenError as e:
+            conn.rollback()
+            conn.close()
+            return jsonify({
+                'success': False,
+                'error': f'{e}. Please choose another time'
+            }), 409
         
-        appointment_id = cursor.lastrowid
         conn.commit()
         conn.close()
         
@@ -1148,6 +1210,30 @@ def book_appointment():
         }), 500
 
 
+def chatbot_risk(keywords):
+    """Predicted risk for a message's keyword mask, or None without a model"""
+    chatbot_scores = CHATBOT_SCORES
+    if not chatbot_scores:
+        return None
+    try:
+        # Keyword-based features (simplified - in production, use NLP) map
+        # to a feature mask whose prediction was computed at model load
+        return chatbot_scores[keywords & FEATURE_BITS]['probability']  # Probability of being at risk
+    except Exception as e:
+        logger.exception('ML prediction failed, using fallback')
+        return None
+
+
+def chatbot_reply(message, keywords, risk_prediction):
+    """Reply text for a message given its predicted risk"""
+    # Generate response based on prediction
+    if risk_prediction is not None and risk_prediction > 0.7:
+        return "I'm concerned about what you've shared. Your message suggests you may benefit from speaking with a mental health professional. Would you like help finding a qualified therapist or counselor in your area? Remember, seeking help is a sign of strength."
+    elif risk_prediction is not None and risk_prediction > 0.4:
+        return "Thank you for sharing. It sounds like you might be going through a challenging time. Consider exploring our mental health resources or speaking with a professional. I'm here to support you."
+    return generate_chatbot_response(message, keywords)  # Use fallback
+
+
 @app.route('/api/chatbot', methods=['POST'])
 def chatbot():
     """Handle chatbot messages with ML model integration"""
@@ -1163,55 +1249,17 @@ def chatbot():
         
         user_id = session.get('user_id')
         
-        # Try to use ML model for prediction
-        risk_prediction = None
-        response = None
-        
-        if ML_PIPELINE:
-            try:
-                # Extract features from message (simplified - in production, use NLP)
-                # For now, use keyword-based feature extraction
-                features = extract_features_from_message(message)
-                
-                if features:
-                    # Create DataFrame with proper column names
-                    input_df = pd.DataFrame([features])
-                    
-                    # Make prediction
-                    prediction = ML_PIPELINE.predict(input_df)[0]
-                    prediction_proba = ML_PIPELINE.predict_proba(input_df)[0]
-                    
-                    risk_prediction = float(prediction_proba[1])  # Probability of being at risk
-                    
-                    # Generate response based on prediction
-                    if risk_prediction > 0.7:
-                        response = "I'm concerned about what you've shared. Your message suggests you may benefit from speaking with a mental health professional. Would you like help finding a qualified therapist or counselor in your area? Remember, seeking help is a sign of strength."
-                    elif risk_prediction > 0.4:
-                        response = "Thank you for sharing. It sounds like you might be going through a challenging time. Consider exploring our mental health resources or speaking with a professional. I'm here to support you."
-                    else:
-                        response = generate_chatbot_response(message)  # Use fallback
-                else:
-                    response = generate_chatbot_response(message)  # Use fallback
-                    
-            except Exception as e:
-                print(f"ML prediction error: {e}")
-                response = generate_chatbot_response(message)  # Use fallback
-        else:
-            response = generate_chatbot_response(message)  # Use fallback
+        # Every keyword group the message contains, found in one scan
+        keywords = keyword_mask(message)
+        risk_prediction = chatbot_risk(keywords)
+        response = chatbot_reply(message, keywords, risk_prediction)
         
         # Save conversation to database
         if user_id:
             try:
-                conn = get_db_connection()
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO chatbot_conversations (user_id, message, response, risk_prediction)
-                    VALUES (?, ?, ?, ?)
-                ''', (user_id, message, response, risk_prediction))
-                conn.commit()
-                conn.close()
+                queue_chatbot_conversation(user_id, message, response, risk_prediction)
             except Exception as e:
-                print(f"Error saving conversation: {e}")
+                logger.exception('saving chatbot conversation failed')
         
         return jsonify({
             'success': True,
@@ -1226,70 +1274,73 @@ def chatbot():
         }), 500
 
 
-def extract_features_from_message(message):
-    """Extract features from message for ML model (simplified version)"""
-    # This is a simplified feature extraction
-    # In production, use proper NLP techniques
-    
-    message_lower = message.lower()
+def sse_event(event, data):
+    """One Server-Sent Events frame with a JSON payload"""
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+
+@app.route('/api/chatbot/stream', methods=['GET', 'POST'])
+def chatbot_stream():
+    """Chatbot reply as Server-Sent Events: `risk`, then `response`, then `done`.
+
+    Each event is flushed as soon as it is ready and the conversation is
+    logged by the background write queue, so nothing waits on the database.
+    """
+    if request.method == 'POST':
+        message = (request.get_json(silent=True) or {}).get('message', '')
+    else:
+        message = request.args.get('message', '')
+    message = message.strip()
     
-    # Basic feature extraction based on keywords
-    features = {
-        'Age': 30,  # Default
-        'Gender': 'Other',
-        'Employment_Status': 'Employed',
-        'Marital_Status': 'Single',
-        'Work_Hours_per_Week': 40,
-        'Financial_Stress': 5,
-        'Physical_Activity_Hours_per_Week': 3,
-        'Screen_Time_per_Day_hours': 6,
-        'Sleep_Hours_per_Night': 7,
-        'Alcohol_Units_per_Week': 2,
-        'Smoking_Status': 'Never',
-        'Family_History': 0,
-        'Chronic_Condition': 0,
-        'Support_System_Score': 5,
-        'Stress_Level_Score': 5,
-        'Rumination_Score': 5,
-        'Feeling_Nervous': 1 if any(w in message_lower for w in ['nervous', 'anxious', 'worried', 'panic']) else 0,
-        'Trouble_Concentrating': 1 if any(w in message_lower for w in ['concentrate', 'focus', 'attention']) else 0,
-        'Hopelessness': 1 if any(w in message_lower for w in ['hopeless', 'despair', 'no point']) else 0,
-        'Avoids_People': 1 if any(w in message_lower for w in ['avoid', 'isolate', 'alone']) else 0,
-        'Nightmares': 1 if any(w in message_lower for w in ['nightmare', 'dream', 'sleep']) else 0,
-        'Medication_Usage': 0
-    }
+    if not message:
+        return jsonify({
+            'success': False,
+            'error': 'Message is required'
+        }), 400
     
-    # Adjust stress level based on message content
-    if any(w in message_lower for w in ['stress', 'stressed', 'overwhelmed']):
-        features['Stress_Level_Score'] = 8
+    user_id = session.get('user_id')
     
-    if any(w in message_lower for w in ['sad', 'depressed', 'depression', 'down']):
-        features['Hopelessness'] = 1
-        features['Stress_Level_Score'] = 7
+    def generate():
+        keywords = keyword_mask(message)
+        risk_prediction = chatbot_risk(keywords)
+        yield sse_event('risk', {'risk_prediction': risk_prediction})
+        
+        response = chatbot_reply(message, keywords, risk_prediction)
+        yield sse_event('response', {'response': response})
+        
+        if user_id:
+            try:
+                queue_chatbot_conversation(user_id, message, response, risk_prediction)
+            except Exception as e:
+                logger.exception('saving chatbot conversation failed')
+        yield sse_event('done', {'success': True})
     
-    return features
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # don't let a proxy buffer the stream
+    })
 
 
-def generate_chatbot_response(message):
-    """Generate a response to user message (fallback when ML model unavailable)"""
-    message_lower = message.lower()
+def generate_chatbot_response(message, keywords=None):
+    """Generate a response to user message (fallback when ML model unavailable).
+    `keywords` is the message's keyword_mask() if the caller already has it."""
+    if keywords is None:
+        keywords = keyword_mask(message)
     
     # Crisis keywords - prioritize these
-    crisis_keywords = ['suicide', 'kill myself', 'end it all', 'self harm', 'hurt myself']
-    for keyword in crisis_keywords:
-        if keyword in message_lower:
-            return "If you're having thoughts of self-harm or suicide, please reach out for immediate help: National Suicide Prevention Lifeline: 988 or text HOME to 741741. You are not alone, and there are people who want to help. Your life has value."
+    if keywords & CRISIS_BIT:
+        return "If you're having thoughts of self-harm or suicide, please reach out for immediate help: National Suicide Prevention Lifeline: 988 or text HOME to 741741. You are not alone, and there are people who want to help. Your life has value."
     
-    if any(word in message_lower for word in ['sad', 'depressed', 'depression', 'down']):
+    if keywords & LOW_MOOD_BIT:
         return "I understand you're going through a difficult time. It's important to remember that you're not alone. Have you considered speaking with a mental health professional? They can provide support and guidance tailored to your situation."
     
-    elif any(word in message_lower for word in ['anxious', 'anxiety', 'worried', 'nervous', 'stress']):
+    elif keywords & ANXIETY_BIT:
         return "Anxiety can be overwhelming. Try some deep breathing exercises: inhale for 4 counts, hold for 4, and exhale for 4. If anxiety persists, consider reaching out to a therapist who specializes in anxiety disorders."
     
-    elif any(word in message_lower for word in ['help', 'support', 'need']):
+    elif keywords & SUPPORT_BIT:
         return "I'm here to support you. Would you like to explore our articles, find a mental health professional, or discuss something specific? Remember, seeking professional help is a sign of strength."
     
-    elif any(word in message_lower for word in ['hello', 'hi', 'hey']):
+    elif keywords & GREETING_BIT:
         return "Hello! 👋 I'm here to listen and support you. Please share what's on your mind, and I'll do my best to help."
     
     else:
@@ -1322,6 +1373,7 @@ if __name__ == '__main__':
     # Initialize database
     print("Initializing database...")
     init_db()
+    start_checkpointer()
     print("✅ Database initialized")
     
     # Run the Flask app
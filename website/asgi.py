@@ -0,0 +1,416 @@
+"""
+ASGI entry point for async serving
+Serves the I/O-bound API endpoints as async handlers (SQLite on a dedicated
+executor, password checks on the hashing pool) and mounts the Flask app for the rest
+"""
+
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from a2wsgi import WSGIMiddleware
+from itsdangerous import BadSignature
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import Response
+from starlette.routing import Mount, Route
+from werkzeug.http import http_date, parse_date, parse_etags
+
+from app import app as flask_app, articles_json, doctors_json
+from database import (
+    init_db, get_user_by_id, get_user_by_email, update_last_login, upgrade_password_if_needed,
+    get_latest_assessment, list_user_appointments, parse_appointment_page_args,
+    get_doctor_stats, parse_doctor_stats_args, parse_availability_args, get_doctor_availability,
+    parse_search_args, search, parse_nearby_args, list_nearby_doctors
+)
+from passwords import hasher, PasswordPoolBusy
+from response_cache import doctors_cache, articles_cache
+
+# Threads running SQLite queries (each checks out its own pooled connection)
+ASYNC_DB_WORKERS = int(os.environ.get('ASYNC_DB_WORKERS', '4'))
+# Threads running the mounted Flask app (model scoring and all other routes)
+ASYNC_WSGI_WORKERS = int(os.environ.get('ASYNC_WSGI_WORKERS', '4'))
+
+db_executor = ThreadPoolExecutor(ASYNC_DB_WORKERS, thread_name_prefix='sqlite')
+
+# Read and write the same signed session cookie as Flask
+session_serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+SESSION_COOKIE = flask_app.config['SESSION_COOKIE_NAME']
+
+
+async def run_in(executor, fn, *args, **kwargs):
+    """Run a blocking call on `executor` without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(fn, *args, **kwargs))
+
+
+def json_response(payload, status=200):
+    """Serialize like Flask's jsonify so both apps return identical bodies"""
+    return Response(flask_app.json.dumps(payload), status, media_type='application/json')
+
+
+async def cached_json_response(request, cache, key, build, *args):
+    """Serve from `cache`, building the body on the DB executor on a miss.
+
+    Answers 304 without a body when If-None-Match / If-Modified-Since show
+    the client's copy is current.
+    """
+    cached = cache.get(key)
+    if cached is None:
+        cached = cache.put(key, await run_in(db_executor, build, *args))
+    headers = {
+        'ETag': f'"{cached.etag}"',
+        'Last-Modified': http_date(cached.last_modified),
+        'Cache-Control': 'no-cache'
+    }
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        not_modified = parse_etags(if_none_match).contains(cached.etag)
+    else:
+        since = parse_date(request.headers.get('if-modified-since'))
+        not_modified = since is not None and cached.last_modified <= since
+    if not_modified:
+        return Response(status_code=304, headers=headers)
+    return Response(cached.body, headers=headers, media_type='application/json')
+
+
+def load_session(request):
+    cookie = request.cookies.get(SESSION_COOKIE)
+    if not cookie:
+        return {}
+    try:
+        max_age = int(flask_app.permanent_session_lifetime.total_seconds())
+        return session_serializer.loads(cookie, max_age=max_age)
+    except BadSignature:
+        return {}
+
+
+def save_session(response, session):
+    samesite = flask_app.config['SESSION_COOKIE_SAMESITE']
+    response.set_cookie(
+        SESSION_COOKIE, session_serializer.dumps(session),
+        httponly=flask_app.config['SESSION_COOKIE_HTTPONLY'],
+        secure=flask_app.config['SESSION_COOKIE_SECURE'],
+        samesite=samesite.lower() if samesite else None
+    )
+
+
+def login_required(handler):
+    """Async counterpart of app.login_required; the session is on request.state"""
+    @functools.wraps(handler)
+    async def decorated_function(request):
+        session = load_session(request)
+        if not session.get('user_id'):
+            return json_response({
+                'success': False,
+                'error': 'Authentication required'
+            }, 401)
+        request.state.session = session
+        return await handler(request)
+    return decorated_function
+
+
+# ==================== Async API Routes ====================
+
+async def login(request):
+    """Login user - user type is determined from database, not from request"""
+    try:
+        data = await request.json()
+
+        if 'email' not in data or 'password' not in data:
+            return json_response({
+                'success': False,
+                'error': 'Email and password required'
+            }, 400)
+
+        user = await run_in(db_executor, get_user_by_email, data['email'])
+        # Awaited without holding a thread; the hashing pool bounds the work
+        if not user or not await asyncio.wrap_future(
+                hasher.submit_verify(user['password_hash'], data['password'])):
+            return json_response({
+                'success': False,
+                'error': 'Invalid email or password'
+            }, 401)
+
+        if user['user_type'] not in ['patient', 'doctor']:
+            return json_response({
+                'success': False,
+                'error': 'Invalid user account type'
+            }, 403)
+
+        upgrade_password_if_needed(user, data['password'])
+        await run_in(db_executor, update_last_login, user['id'])
+
+        response = json_response({
+            'success': True,
+            'message': 'Login successful',
+            'user': {
+                'id': user['id'],
+                'email': user['email'],
+                'name': user['name'],
+                'user_type': user['user_type'],
+                'type': user['user_type']
+            }
+        })
+        save_session(response, {'user_id': user['id'], 'user_type': user['user_type']})
+        return response
+
+    except PasswordPoolBusy as e:
+        response = json_response({
+            'success': False,
+            'error': str(e)
+        }, 503)
+        response.headers['Retry-After'] = '1'
+        return response
+    except Exception as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, 500)
+
+
+@login_required
+async def get_current_user(request):
+    """Get current authenticated user"""
+    user = await run_in(db_executor, get_user_by_id, request.state.session['user_id'])
+
+    if user:
+        return json_response({
+            'success': True,
+            'user': {
+                'id': user['id'],
+                'email': user['email'],
+                'name': user['name'],
+                'user_type': user['user_type']
+            }
+        })
+    return json_response({
+        'success': False,
+        'error': 'User not found'
+    }, 404)
+
+
+@login_required
+async def get_user_assessment(request):
+    """Get user's latest assessment"""
+    try:
+        assessment = await run_in(db_executor, get_latest_assessment, request.state.session['user_id'])
+
+        if assessment:
+            return json_response({
+                'success': True,
+                'assessment': assessment
+            })
+        return json_response({
+            'success': False,
+            'message': 'No assessment found'
+        }, 404)
+
+    except Exception as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, 500)
+
+
+@login_required
+async def get_user_appointments(request):
+    """Get one page of the user's appointments (?limit=&cursor=&status=&from=&to=)"""
+    try:
+        try:
+            page = parse_appointment_page_args(request.query_params)
+        except ValueError as e:
+            return json_response({
+                'success': False,
+                'error': str(e)
+            }, 400)
+
+        session = request.state.session
+        appointments_list, next_cursor = await run_in(
+            db_executor, list_user_appointments, session['user_id'], session.get('user_type'), **page
+        )
+        return json_response({
+            'success': True,
+            'appointments': appointments_list,
+            'count': len(appointments_list),
+            'next_cursor': next_cursor
+        })
+
+    except Exception as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, 500)
+
+
+@login_required
+async def get_doctor_appointment_stats(request):
+    """Appointment counts for the doctor dashboard (?date=YYYY-MM-DD for the day's count)"""
+    try:
+        session = request.state.session
+        if session.get('user_type') != 'doctor':
+            return json_response({
+                'success': False,
+                'error': 'Only doctors have appointment stats'
+            }, 403)
+
+        try:
+            args = parse_doctor_stats_args(request.query_params)
+        except ValueError as e:
+            return json_response({
+                'success': False,
+                'error': str(e)
+            }, 400)
+
+        stats = await run_in(db_executor, get_doctor_stats, session['user_id'], **args)
+        return json_response({
+            'success': True,
+            'stats': stats
+        })
+
+    except Exception as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, 500)
+
+
+async def get_articles(request):
+    """Get mental health articles from database"""
+    try:
+        category = request.query_params.get('category') or None
+        return await cached_json_response(request, articles_cache, (category,), articles_json, category)
+
+    except Exception as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, 500)
+
+
+async def get_doctors(request):
+    """Get list of doctors from database with optional filtering"""
+    try:
+        key = tuple(request.query_params.get(name) or None for name in ('country', 'city', 'specialty'))
+        return await cached_json_response(request, doctors_cache, key, doctors_json, *key)
+
+    except Exception as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, 500)
+
+
+async def get_nearby_doctors(request):
+    """Doctors closest to a point, nearest first (?lat=&lon=&radius=km&limit=)"""
+    try:
+        try:
+            args = parse_nearby_args(request.query_params)
+        except ValueError as e:
+            return json_response({
+                'success': False,
+                'error': str(e)
+            }, 400)
+
+        doctors_list = await run_in(db_executor, list_nearby_doctors, **args)
+        return json_response({
+            'success': True,
+            'doctors': doctors_list,
+            'count': len(doctors_list)
+        })
+
+    except Exception as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, 500)
+
+
+async def get_doctor_free_slots(request):
+    """Free appointment slots of a doctor per day (?from=YYYY-MM-DD&to=YYYY-MM-DD)"""
+    try:
+        try:
+            args = parse_availability_args(request.query_params)
+        except ValueError as e:
+            return json_response({
+                'success': False,
+                'error': str(e)
+            }, 400)
+
+        doctor_id = request.path_params['doctor_id']
+        days = await run_in(db_executor, get_doctor_availability, doctor_id, **args)
+        if days is None:
+            return json_response({
+                'success': False,
+                'error': 'Doctor not found'
+            }, 404)
+
+        return json_response({
+            'success': True,
+            'doctor_id': doctor_id,
+            'days': days
+        })
+
+    except Exception as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, 500)
+
+
+async def search_site(request):
+    """Full-text search over articles and doctors (?q=&type=articles,doctors&limit=)"""
+    try:
+        try:
+            terms, kinds, limit = parse_search_args(request.query_params)
+        except ValueError as e:
+            return json_response({
+                'success': False,
+                'error': str(e)
+            }, 400)
+
+        results = await run_in(db_executor, search, terms, kinds, limit)
+        return json_response({
+            'success': True,
+            'query': request.query_params.get('q'),
+            **results
+        })
+
+    except Exception as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, 500)
+
+
+init_db()
+
+app = Starlette(
+    routes=[
+        Route('/api/auth/login', login, methods=['POST']),
+        Route('/api/auth/me', get_current_user, methods=['GET']),
+        Route('/api/profile/assessment', get_user_assessment, methods=['GET']),
+        Route('/api/profile/appointments', get_user_appointments, methods=['GET']),
+        Route('/api/doctor/stats', get_doctor_appointment_stats, methods=['GET']),
+        Route('/api/articles', get_articles, methods=['GET']),
+        Route('/api/doctors', get_doctors, methods=['GET']),
+        Route('/api/doctors/nearby', get_nearby_doctors, methods=['GET']),
+        Route('/api/doctors/{doctor_id:int}/availability', get_doctor_free_slots, methods=['GET']),
+        Route('/api/search', search_site, methods=['GET']),
+        # Everything else (frontend, scoring, writes) runs in the Flask app
+        # on a bounded thread pool
+        Mount('/', app=WSGIMiddleware(flask_app, workers=ASYNC_WSGI_WORKERS)),
+    ],
+    middleware=[
+        # Same policy as flask_cors in app.py, applied to both halves
+        Middleware(
+            CORSMiddleware,
+            allow_origins=['*'],
+            allow_credentials=True,
+            allow_headers=['Content-Type'],
+            allow_methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS']
+        ),
+    ]
+)
@@ -0,0 +1,125 @@
+"""
+Structured Logging
+Leveled JSON (or text) logs with per-request IDs, written through a
+QueueHandler so request threads never block on log I/O
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+import time
+import uuid
+from logging.handlers import QueueHandler, QueueListener
+
+from flask import g, has_request_context, request
+
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json')  # 'json' or 'text'
+
+logger = logging.getLogger('mentiq')
+
+# Attributes every LogRecord has; anything else was passed via `extra=`
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'request_id'}
+
+_listener = None
+
+
+class RequestIdFilter(logging.Filter):
+    """Attach the current request's ID (or '-') to every record"""
+
+    def filter(self, record):
+        record.request_id = g.get('request_id', '-') if has_request_context() else '-'
+        return True
+
+
+class LocalQueueHandler(QueueHandler):
+    """QueueHandler for an in-process queue: records are not pickled, so
+    they are enqueued as-is and formatted (with tracebacks) by the listener"""
+
+    def prepare(self, record):
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including any `extra=` fields"""
+
+    def format(self, record):
+        entry = {
+            'ts': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'request_id': getattr(record, 'request_id', '-'),
+            'msg': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def _restart_listener_in_child():
+    """The listener thread does not survive fork(); give each worker its own"""
+    global _listener
+    if _listener is None:
+        return
+    log_queue = queue.SimpleQueue()
+    _listener = QueueListener(log_queue, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+    for handler in logger.handlers:
+        if isinstance(handler, LocalQueueHandler):
+            handler.queue = log_queue
+
+
+os.register_at_fork(after_in_child=_restart_listener_in_child)
+
+
+def configure_logging(app, level=LOG_LEVEL, fmt=LOG_FORMAT, stream=None):
+    """Route the 'mentiq' logger through a background queue and tag requests with IDs"""
+    global _listener
+
+    handler = logging.StreamHandler(stream or sys.stderr)
+    if fmt == 'json':
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter(
+            '%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s'
+        ))
+
+    if _listener is not None:
+        _listener.stop()
+    # The request thread only enqueues; formatting and I/O happen on the listener thread
+    log_queue = queue.SimpleQueue()
+    _listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    queue_handler = LocalQueueHandler(log_queue)
+    queue_handler.addFilter(RequestIdFilter())
+    logger.handlers = [queue_handler]
+    logger.setLevel(level)
+    logger.propagate = False
+
+    @app.before_request
+    def assign_request_id():
+        g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def log_request(response):
+        response.headers['X-Request-ID'] = g.get('request_id', '-')
+        if logger.isEnabledFor(logging.INFO) and request.path.startswith('/api/'):
+            logger.info('request', extra={
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'duration_ms': round((time.perf_counter() - g.get('request_start', time.perf_counter())) * 1000, 3),
+            })
+        return response
+
+    return logger
@@ -0,0 +1,92 @@
+"""
+Micro-batching Inference Queue
+Coalesces concurrent single-row scoring requests into one vectorized predict_proba call
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import pandas as pd
+from sklearn.pipeline import Pipeline
+
+from inference import FEATURE_COLUMNS
+
+
+class MicroBatcher:
+    """Model wrapper that batches concurrent single-row requests.
+
+    Callers use it exactly like the wrapped model (predict_proba / classes_).
+    A single-row dict is queued; a background thread collects requests for
+    up to `window_ms` milliseconds or `max_batch_size` rows, scores them in
+    one call and resolves each caller's future with its own row.
+    Anything other than a single dict bypasses the queue.
+    """
+
+    def __init__(self, model, window_ms=2.0, max_batch_size=32):
+        self.model = model
+        self.classes_ = model.classes_
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self.batches = 0
+        self.rows = 0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def _ensure_started(self):
+        # Threads do not survive fork(), so a forked worker starts its own
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._queue = queue.Queue()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(
+                    target=self._run, name='ml-micro-batcher', daemon=True
+                )
+                self._thread.start()
+
+    def predict_proba(self, X):
+        """Class probabilities; single dicts are coalesced with concurrent callers"""
+        if not isinstance(X, dict):
+            return self._score(X)
+        self._ensure_started()
+        future = Future()
+        self._queue.put((X, future))
+        return future.result()[None, :]
+
+    def _score(self, rows):
+        if isinstance(self.model, Pipeline) and isinstance(rows, list):
+            rows = pd.DataFrame(rows, columns=FEATURE_COLUMNS)
+        return self.model.predict_proba(rows)
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                proba = self._score([features for features, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.rows += len(batch)
+            for (_, future), row in zip(batch, proba):
+                future.set_result(row)
@@ -0,0 +1,107 @@
+"""
+Chatbot Features
+Keyword-driven feature extraction for chatbot messages and a score table
+precomputed over every feature vector the keywords can produce
+"""
+
+from inference import score_records
+from keyword_matcher import KeywordMatcher
+
+# Binary model features switched on by keywords; bit i of a feature mask
+# is FLAG_KEYWORDS[i]
+FLAG_KEYWORDS = [
+    ('Feeling_Nervous', ['nervous', 'anxious', 'worried', 'panic']),
+    ('Trouble_Concentrating', ['concentrate', 'focus', 'attention']),
+    ('Hopelessness', ['hopeless', 'despair', 'no point']),
+    ('Avoids_People', ['avoid', 'isolate', 'alone']),
+    ('Nightmares', ['nightmare', 'dream', 'sleep']),
+]
+STRESS_KEYWORDS = ['stress', 'stressed', 'overwhelmed']
+LOW_MOOD_KEYWORDS = ['sad', 'depressed', 'depression', 'down']
+# Groups only used to pick a fallback response
+CRISIS_KEYWORDS = ['suicide', 'kill myself', 'end it all', 'self harm', 'hurt myself']
+ANXIETY_KEYWORDS = ['anxious', 'anxiety', 'worried', 'nervous', 'stress']
+SUPPORT_KEYWORDS = ['help', 'support', 'need']
+GREETING_KEYWORDS = ['hello', 'hi', 'hey']
+
+STRESS_BIT = 1 << len(FLAG_KEYWORDS)
+LOW_MOOD_BIT = STRESS_BIT << 1
+# Masks 0 .. MASK_COUNT - 1 cover every vector extraction can produce
+MASK_COUNT = LOW_MOOD_BIT << 1
+FEATURE_BITS = MASK_COUNT - 1
+CRISIS_BIT = MASK_COUNT
+ANXIETY_BIT = CRISIS_BIT << 1
+SUPPORT_BIT = ANXIETY_BIT << 1
+GREETING_BIT = SUPPORT_BIT << 1
+
+# Built once; group i of the matcher is bit i of every mask above
+KEYWORDS = KeywordMatcher(
+    [keywords for _, keywords in FLAG_KEYWORDS]
+    + [STRESS_KEYWORDS, LOW_MOOD_KEYWORDS, CRISIS_KEYWORDS, ANXIETY_KEYWORDS, SUPPORT_KEYWORDS, GREETING_KEYWORDS]
+)
+
+# Everything a message can't tell us
+DEFAULT_FEATURES = {
+    'Age': 30,
+    'Gender': 'Other',
+    'Employment_Status': 'Employed',
+    'Marital_Status': 'Single',
+    'Work_Hours_per_Week': 40,
+    'Financial_Stress': 5,
+    'Physical_Activity_Hours_per_Week': 3,
+    'Screen_Time_per_Day_hours': 6,
+    'Sleep_Hours_per_Night': 7,
+    'Alcohol_Units_per_Week': 2,
+    'Smoking_Status': 'Never',
+    'Family_History': 0,
+    'Chronic_Condition': 0,
+    'Support_System_Score': 5,
+    'Stress_Level_Score': 5,
+    'Rumination_Score': 5,
+    'Feeling_Nervous': 0,
+    'Trouble_Concentrating': 0,
+    'Hopelessness': 0,
+    'Avoids_People': 0,
+    'Nightmares': 0,
+    'Medication_Usage': 0
+}
+
+
+def keyword_mask(message):
+    """Bitmask of every keyword group present in `message`, in one scan"""
+    return KEYWORDS.scan(message)
+
+
+def feature_mask(message):
+    """Bitmask of the keyword groups that set model features"""
+    return keyword_mask(message) & FEATURE_BITS
+
+
+def features_from_mask(mask):
+    """Model feature dict for a feature mask"""
+    features = dict(DEFAULT_FEATURES)
+    for bit, (column, _) in enumerate(FLAG_KEYWORDS):
+        features[column] = (mask >> bit) & 1
+
+    # Adjust stress level based on message content
+    if mask & STRESS_BIT:
+        features['Stress_Level_Score'] = 8
+
+    if mask & LOW_MOOD_BIT:
+        features['Hopelessness'] = 1
+        features['Stress_Level_Score'] = 7
+
+    return features
+
+
+def extract_features_from_message(message):
+    """Extract features from message for ML model (simplified version)"""
+    # This is a simplified feature extraction
+    # In production, use proper NLP techniques
+    return features_from_mask(feature_mask(message))
+
+
+def build_score_table(model):
+    """predict_risk results for every feature mask, scored in one call;
+    entry `mask` is what predict_risk(model, features_from_mask(mask)) returns"""
+    return score_records(model, [features_from_mask(mask) for mask in range(MASK_COUNT)])
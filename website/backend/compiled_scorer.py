@@ -0,0 +1,190 @@
+"""
+Compiled Scorer
+Flattens the fitted sklearn pipeline into NumPy arrays so a request can be
+scored from a plain dict without building a pandas DataFrame
+"""
+
+import numpy as np
+from scipy.special import expit, logit
+
+# Tree leaves are marked with this child index in sklearn's tree structure
+TREE_LEAF = -1
+
+
+class CompiledScorer:
+    """Array-only re-implementation of full_pipeline.pkl.
+
+    Supports the pipeline shape produced by the training notebook:
+    ColumnTransformer(num=[SimpleImputer, StandardScaler],
+    cat=[SimpleImputer, OneHotEncoder]) followed by a binary
+    GradientBoostingClassifier. Results are bit-for-bit identical to
+    pipeline.predict_proba().
+    """
+
+    def __init__(self, pipeline):
+        pre = pipeline.named_steps['pre']
+        clf = pipeline.named_steps['clf']
+
+        if pre.remainder != 'drop' or pre.sparse_output_:
+            raise ValueError('Unsupported ColumnTransformer configuration')
+        if len(clf.classes_) != 2 or clf.estimators_.shape[1] != 1:
+            raise ValueError('Only binary gradient boosting classifiers are supported')
+
+        num_steps = pre.named_transformers_['num'].named_steps
+        cat_steps = pre.named_transformers_['cat'].named_steps
+        num_columns, cat_columns = self._transformer_columns(pre)
+
+        self.classes_ = clf.classes_
+        self.feature_names_in_ = np.asarray(pipeline.feature_names_in_, dtype=object)
+
+        # Numeric block: median imputation then standard scaling
+        self.num_columns = num_columns
+        self.num_medians = num_steps['imputer'].statistics_.astype(np.float64)
+        scaler = num_steps['scaler']
+        self.num_means = scaler.mean_ if scaler.with_mean else np.zeros(len(num_columns))
+        self.num_scales = scaler.scale_ if scaler.with_std else np.ones(len(num_columns))
+
+        # Categorical block: most-frequent imputation then one-hot (unknown -> all zeros)
+        onehot = cat_steps['onehot']
+        if onehot.drop_idx_ is not None or getattr(onehot, 'infrequent_categories_', None):
+            raise ValueError('Unsupported OneHotEncoder configuration')
+        self.cat_columns = cat_columns
+        self.cat_fill = list(cat_steps['imputer'].statistics_)
+        self.cat_offsets = []
+        self.cat_maps = []
+        offset = len(num_columns)
+        for categories in onehot.categories_:
+            self.cat_offsets.append(offset)
+            self.cat_maps.append({value: i for i, value in enumerate(categories)})
+            offset += len(categories)
+        self.n_features = offset
+
+        # Gradient boosting: every tree packed into shared node arrays
+        self.learning_rate = float(clf.learning_rate)
+        self.init_raw = self._init_raw_prediction(clf)
+        self._pack_trees([est[0].tree_ for est in clf.estimators_])
+
+    @staticmethod
+    def _transformer_columns(pre):
+        columns = {name: list(cols) for name, _, cols in pre.transformers_}
+        if list(columns) != ['num', 'cat']:
+            raise ValueError('Expected ColumnTransformer with num and cat blocks')
+        return columns['num'], columns['cat']
+
+    def _init_raw_prediction(self, clf):
+        """Raw score of the init estimator (constant log-odds of the class prior)"""
+        if clf.init_ == 'zero':
+            return 0.0
+        prior = clf.init_.predict_proba(np.zeros((1, self.n_features)))[0, 1]
+        eps = np.finfo(np.float32).eps
+        return float(logit(np.clip(prior, eps, 1 - eps, dtype=np.float64)))
+
+    def _pack_trees(self, trees):
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        for tree in trees:
+            left = tree.children_left.astype(np.intp)
+            right = tree.children_right.astype(np.intp)
+            leaf = left == TREE_LEAF
+            node_ids = np.arange(tree.node_count)
+            # Leaves point at themselves so every tree can be walked max_depth steps
+            lefts.append(np.where(leaf, node_ids, left) + offset)
+            rights.append(np.where(leaf, node_ids, right) + offset)
+            features.append(np.where(leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+            values.append(tree.value[:, 0, 0])
+            roots.append(offset)
+            offset += tree.node_count
+
+        self.tree_feature = np.concatenate(features).astype(np.intp)
+        self.tree_threshold = np.concatenate(thresholds)
+        self.tree_left = np.concatenate(lefts)
+        self.tree_right = np.concatenate(rights)
+        self.tree_value = np.concatenate(values)
+        self.tree_roots = np.asarray(roots, dtype=np.intp)
+        self.max_depth = max(tree.max_depth for tree in trees)
+
+    # ==================== Preprocessing ====================
+
+    def transform_dict(self, features):
+        """Transform one feature dict into the model's input vector"""
+        x = np.zeros(self.n_features, dtype=np.float64)
+        for i, column in enumerate(self.num_columns):
+            value = features.get(column)
+            x[i] = self.num_medians[i] if value is None or value != value else float(value)
+        x[:len(self.num_columns)] -= self.num_means
+        x[:len(self.num_columns)] /= self.num_scales
+        for j, column in enumerate(self.cat_columns):
+            value = features.get(column)
+            if value is None or value != value:
+                value = self.cat_fill[j]
+            index = self.cat_maps[j].get(value)
+            if index is not None:
+                x[self.cat_offsets[j] + index] = 1.0
+        return x
+
+    def transform_frame(self, df):
+        """Transform a DataFrame (any column order) into the model's input matrix"""
+        n_num = len(self.num_columns)
+        X = np.zeros((len(df), self.n_features), dtype=np.float64)
+        num = df[self.num_columns].to_numpy(dtype=np.float64)
+        missing = np.isnan(num)
+        if missing.any():
+            num[missing] = np.take(self.num_medians, np.nonzero(missing)[1])
+        num -= self.num_means
+        num /= self.num_scales
+        X[:, :n_num] = num
+        rows = np.arange(len(df))
+        for j, column in enumerate(self.cat_columns):
+            values = df[column].to_numpy(dtype=object)
+            mapping = self.cat_maps[j]
+            fill = self.cat_fill[j]
+            index = np.fromiter(
+                (mapping.get(fill if v is None or v != v else v, -1) for v in values),
+                dtype=np.intp, count=len(values)
+            )
+            known = index >= 0
+            X[rows[known], self.cat_offsets[j] + index[known]] = 1.0
+        return X
+
+    # ==================== Scoring ====================
+
+    def raw_predict(self, X):
+        """Sum of init score and scaled tree outputs, accumulated in stage order"""
+        # sklearn compares float32 features against float64 thresholds
+        X32 = np.ascontiguousarray(X, dtype=np.float32)
+        nodes = np.broadcast_to(self.tree_roots, (X32.shape[0], len(self.tree_roots)))
+        rows = np.arange(X32.shape[0])[:, None]
+        for _ in range(self.max_depth):
+            go_left = X32[rows, self.tree_feature[nodes]] <= self.tree_threshold[nodes]
+            nodes = np.where(go_left, self.tree_left[nodes], self.tree_right[nodes])
+        terms = np.empty((X32.shape[0], len(self.tree_roots) + 1), dtype=np.float64)
+        terms[:, 0] = self.init_raw
+        terms[:, 1:] = self.learning_rate * self.tree_value[nodes]
+        # cumsum adds left to right, matching sklearn's sequential `out += scale * value`
+        return np.cumsum(terms, axis=1)[:, -1]
+
+    def predict_proba(self, X):
+        """Class probabilities for a dict, a list of dicts, a DataFrame or a transformed matrix"""
+        if isinstance(X, dict):
+            matrix = self.transform_dict(X)[None, :]
+        elif isinstance(X, list) and X and isinstance(X[0], dict):
+            matrix = np.vstack([self.transform_dict(row) for row in X])
+        elif hasattr(X, 'columns'):
+            matrix = self.transform_frame(X)
+        else:
+            matrix = np.asarray(X, dtype=np.float64)
+        positive = expit(self.raw_predict(matrix))
+        proba = np.empty((len(positive), 2), dtype=np.float64)
+        proba[:, 1] = positive
+        proba[:, 0] = 1 - positive
+        return proba
+
+    def predict(self, X):
+        """Class labels, derived from predict_proba"""
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def compile_pipeline(pipeline):
+    """Build a CompiledScorer from a fitted full_pipeline.pkl"""
+    return CompiledScorer(pipeline)
@@ -4,20 +4,203 @@ Lightweight database solution for MentIQ platform
 """
 
 import sqlite3
+import base64
+import html
+import json
+import logging
+import math
 import os
-from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+import queue
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import g, has_app_context
+
+from migrations import migrate, run_backfills, rebuild_doctor_stats, STATS_STATUSES, CITY_COORDINATES
+from passwords import hasher, hash_method, needs_upgrade, PasswordPoolBusy
+from response_cache import doctors_cache, articles_cache
+from write_queue import WriteQueue
+
+logger = logging.getLogger('mentiq.database')
 
 # Database path
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-DB_PATH = os.path.join(BASE_DIR, 'mentiq.db')
+DB_PATH = os.environ.get('MENTIQ_DB_PATH', os.path.join(BASE_DIR, 'mentiq.db'))
+
+# Idle connections kept open for reuse (0 = open a new connection per call)
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', '8'))
+
+# Appointments per page when the client gives no `limit`, and the most it may ask for
+APPOINTMENTS_PAGE_SIZE = int(os.environ.get('APPOINTMENTS_PAGE_SIZE', '50'))
+APPOINTMENTS_MAX_PAGE_SIZE = int(os.environ.get('APPOINTMENTS_MAX_PAGE_SIZE', '200'))
+APPOINTMENT_STATUSES = ('pending', 'confirmed', 'cancelled', 'completed')
+
+# Appointment state machine: (from, to) -> user types allowed to make the
+# change, where 'deleted' removes the row. Anything not listed is refused,
+# so a confirmed appointment can be completed but not cancelled or deleted.
+APPOINTMENT_TRANSITIONS = {
+    ('pending', 'confirmed'): ('doctor',),
+    ('pending', 'cancelled'): ('doctor', 'patient'),
+    ('confirmed', 'completed'): ('doctor',),
+    ('pending', 'deleted'): ('doctor', 'patient'),
+    ('cancelled', 'deleted'): ('doctor', 'patient'),
+    ('completed', 'deleted'): ('doctor', 'patient'),
+}
+# The appointments column that must hold the user's id for them to change it
+APPOINTMENT_OWNER_COLUMNS = {'doctor': 'doctor_id', 'patient': 'patient_id'}
+
+# Bookable slots offered by /api/doctors/<id>/availability: every
+# APPOINTMENT_SLOT_MINUTES from APPOINTMENT_DAY_START until APPOINTMENT_DAY_END
+APPOINTMENT_DAY_START = os.environ.get('APPOINTMENT_DAY_START', '09:00')
+APPOINTMENT_DAY_END = os.environ.get('APPOINTMENT_DAY_END', '17:00')
+APPOINTMENT_SLOT_MINUTES = int(os.environ.get('APPOINTMENT_SLOT_MINUTES', '60'))
+# Longest date range one availability request may cover
+AVAILABILITY_MAX_DAYS = int(os.environ.get('AVAILABILITY_MAX_DAYS', '31'))
+
+# /api/search results per kind when the client gives no `limit`, and the most it may ask for
+SEARCH_PAGE_SIZE = int(os.environ.get('SEARCH_PAGE_SIZE', '10'))
+SEARCH_MAX_PAGE_SIZE = int(os.environ.get('SEARCH_MAX_PAGE_SIZE', '50'))
+SEARCH_TYPES = ('articles', 'doctors')
+# Words of a search query used; more only slow the query down
+SEARCH_MAX_TERMS = 8
+SEARCH_TERM = re.compile(r'\w+')
+# Placed around matches by FTS5 highlight()/snippet(), then replaced by
+# <mark> tags once the text is HTML-escaped
+_MARK_START, _MARK_END = '\x02', '\x03'
+
+# /api/doctors/nearby search radius (km) and doctors returned when the client
+# gives none, and the most it may ask for
+NEARBY_RADIUS_KM = float(os.environ.get('NEARBY_RADIUS_KM', '25'))
+NEARBY_MAX_RADIUS_KM = float(os.environ.get('NEARBY_MAX_RADIUS_KM', '500'))
+NEARBY_PAGE_SIZE = int(os.environ.get('NEARBY_PAGE_SIZE', '20'))
+NEARBY_MAX_PAGE_SIZE = int(os.environ.get('NEARBY_MAX_PAGE_SIZE', '100'))
+# Radius (km) of the first circle searched before widening it
+NEARBY_FIRST_RADIUS_KM = 5.0
+EARTH_RADIUS_KM = 6371.0088
+
+# Seconds between background WAL checkpoints (0 = rely on auto-checkpoint only)
+DB_CHECKPOINT_INTERVAL = float(os.environ.get('DB_CHECKPOINT_INTERVAL', '60'))
+
+# Applied once when a connection is opened, not on every checkout.
+# journal_mode=WAL is persistent and is set by init_db().
+CONNECTION_PRAGMAS = [
+    'PRAGMA busy_timeout = 10000',       # wait up to 10s for a lock instead of failing
+    'PRAGMA synchronous = NORMAL',       # safe with WAL; fsync only at checkpoints
+    'PRAGMA cache_size = -16000',        # 16 MB page cache per connection
+    'PRAGMA mmap_size = 268435456',      # read pages through a 256 MB memory map
+    'PRAGMA temp_store = MEMORY',
+    'PRAGMA wal_autocheckpoint = 1000',  # checkpoint when the WAL reaches ~1000 pages
+    'PRAGMA journal_size_limit = 67108864',  # truncate the WAL file back to 64 MB
+]
+
+
+class PooledConnection(sqlite3.Connection):
+    """SQLite connection that returns to the pool when closed.
+
+    close() discards any uncommitted transaction, like a real close. If the
+    connection belongs to the current request (stored on flask.g) it stays
+    checked out until teardown; otherwise it goes back to the idle pool.
+    """
+
+    request_scoped = False
+
+    def close(self):
+        if self.in_transaction:
+            self.rollback()
+        if not self.request_scoped:
+            _pool.release(self)
+
+    def close_connection(self):
+        """Really close the underlying SQLite handle"""
+        super().close()
+
+
+class ConnectionPool:
+    """Bounded pool of idle SQLite connections"""
+
+    def __init__(self, size):
+        self.size = size
+        self._pid = os.getpid()
+        self._idle = queue.LifoQueue(maxsize=max(size, 1))
+
+    def _check_fork(self):
+        # Connections must not be shared with a forked child; start empty there
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._idle = queue.LifoQueue(maxsize=max(self.size, 1))
+
+    def connect(self):
+        """Open a new connection and apply the connection-time pragmas"""
+        conn = sqlite3.connect(DB_PATH, factory=PooledConnection, check_same_thread=False)
+        conn.row_factory = sqlite3.Row  # Return rows as dictionaries
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        conn.create_function('haversine_km', 4, haversine_km, deterministic=True)
+        conn.db_path = DB_PATH
+        return conn
+
+    def acquire(self):
+        self._check_fork()
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return self.connect()
+            if conn.db_path == DB_PATH:
+                return conn
+            conn.close_connection()
+
+    def release(self, conn):
+        conn.request_scoped = False
+        self._check_fork()
+        if self.size <= 0 or conn.db_path != DB_PATH:
+            conn.close_connection()
+            return
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close_connection()
+
+
+_pool = ConnectionPool(DB_POOL_SIZE)
+
+
+# Writes that need not finish before the response is sent. _pool is looked
+# up per write, so configure_pool() applies to the writer too.
+write_queue = WriteQueue(lambda: _pool.acquire())
+
+
+def configure_pool(size):
+    """Resize the idle pool (0 disables pooling)"""
+    global _pool
+    _pool = ConnectionPool(size)
 
 
 def get_db_connection():
-    """Get database connection"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row  # Return rows as dictionaries
-    return conn
+    """Get database connection.
+
+    Inside a Flask request the same connection is returned for the whole
+    request and released by close_request_connection() at teardown.
+    Elsewhere a connection is checked out of the pool; close() returns it.
+    """
+    if _pool.size > 0 and has_app_context():
+        conn = g.get('db')
+        if conn is None:
+            conn = _pool.acquire()
+            conn.request_scoped = True
+            g.db = conn
+        return conn
+    return _pool.acquire()
+
+
+def close_request_connection(exception=None):
+    """Release the request's connection back to the pool (Flask teardown hook)"""
+    conn = g.pop('db', None)
+    if conn is not None:
+        if conn.in_transaction:
+            conn.rollback()
+        _pool.release(conn)
 
 
 def init_db():
@@ -25,6 +208,9 @@ def init_db():
     conn = get_db_connection()
     cursor = conn.cursor()
     
+    # WAL lets readers run alongside a writer; the setting is stored in the file
+    cursor.execute('PRAGMA journal_mode = WAL')
+    
     # Users table
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS users (
@@ -137,12 +323,53 @@ def init_db():
     ''')
     
     conn.commit()
+    
+    # Bring indexes and later schema changes up to date, then reshape
+    # existing rows in short batches
+    migrate(conn)
+    run_backfills(conn)
     conn.close()
     
     # Insert initial data
     seed_initial_data()
 
 
+def checkpoint_wal(mode='PASSIVE'):
+    """Copy committed WAL pages back into the database file.
+
+    Returns SQLite's (busy, wal_pages, checkpointed_pages) row.
+    """
+    conn = _pool.acquire()
+    try:
+        return tuple(conn.execute(f'PRAGMA wal_checkpoint({mode})').fetchone())
+    finally:
+        conn.close()
+
+
+def _checkpoint_loop(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            checkpoint_wal()
+        except sqlite3.Error:
+            logger.warning('WAL checkpoint failed', exc_info=True)
+
+
+def start_checkpointer(interval=DB_CHECKPOINT_INTERVAL):
+    """Run a passive WAL checkpoint every `interval` seconds in the background.
+
+    Passive checkpoints never block readers or writers; they keep the WAL
+    short between the automatic checkpoints triggered by commits.
+    """
+    if interval <= 0:
+        return None
+    thread = threading.Thread(
+        target=_checkpoint_loop, args=(interval,), name='sqlite-checkpointer', daemon=True
+    )
+    thread.start()
+    return thread
+
+
 def seed_initial_data():
     """Seed database with initial articles and doctors"""
     conn = get_db_connection()
@@ -190,12 +417,14 @@ def seed_initial_data():
         ]
         
         cursor.executemany('''
-            INSERT INTO doctors (name, specialty, country, city, experience_years, rating, avatar)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', doctors)
+            INSERT INTO doctors (name, specialty, country, city, experience_years, rating, avatar, latitude, longitude)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [doctor + CITY_COORDINATES[doctor[2], doctor[3]] for doctor in doctors])
     
     conn.commit()
     conn.close()
+    doctors_cache.clear()
+    articles_cache.clear()
 
 
 # User management functions
@@ -205,11 +434,11 @@ def create_user(email, password, name, user_type, specialty=None, license_number
     cursor = conn.cursor()
     
     try:
-        password_hash = generate_password_hash(password)
+        password_hash = hasher.hash(password)
         cursor.execute('''
-            INSERT INTO users (email, password_hash, name, user_type, specialty, license_number)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (email, password_hash, name, user_type, specialty, license_number))
+            INSERT INTO users (email, password_hash, password_hash_method, name, user_type, specialty, license_number)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (email, password_hash, hash_method(password_hash), name, user_type, specialty, license_number))
         
         user_id = cursor.lastrowid
         conn.commit()
@@ -217,10 +446,12 @@ def create_user(email, password, name, user_type, specialty=None, license_number
         # If doctor, also add to doctors table
         if user_type == 'doctor':
             cursor.execute('''
-                INSERT INTO doctors (user_id, name, specialty, country, city, experience_years, rating, avatar)
-                VALUES (?, ?, ?, 'Egypt', 'Cairo', 0, 4.5, '👨‍⚕️')
-            ''', (user_id, name, specialty or 'General'))
+                INSERT INTO doctors (user_id, name, specialty, country, city, experience_years, rating, avatar,
+                                     latitude, longitude)
+                VALUES (?, ?, ?, 'Egypt', 'Cairo', 0, 4.5, '👨‍⚕️', ?, ?)
+            ''', (user_id, name, specialty or 'General', *CITY_COORDINATES['Egypt', 'Cairo']))
             conn.commit()
+            doctors_cache.clear()
         
         return user_id
     except sqlite3.IntegrityError:
@@ -238,11 +469,45 @@ def authenticate_user(email, password):
     user = cursor.fetchone()
     conn.close()
     
-    if user and check_password_hash(user['password_hash'], password):
-        return dict(user)
+    if user and hasher.verify(user['password_hash'], password):
+        user = dict(user)
+        upgrade_password_if_needed(user, password)
+        return user
     return None
 
 
+def upgrade_password_if_needed(user, password):
+    """Re-hash a just-verified password whose stored method is outdated.
+
+    Runs in the background on the hashing pool and is skipped while the
+    pool is busy; the next login tries again.
+    """
+    method = user.get('password_hash_method') or hash_method(user['password_hash'])
+    if not needs_upgrade(method):
+        return None
+    try:
+        future = hasher.submit_hash(password)
+    except PasswordPoolBusy:
+        return None
+    
+    def save(done):
+        if done.exception() is not None:
+            return
+        password_hash = done.result()
+        conn = _pool.acquire()
+        try:
+            conn.execute(
+                'UPDATE users SET password_hash = ?, password_hash_method = ? WHERE id = ?',
+                (password_hash, hash_method(password_hash), user['id'])
+            )
+            conn.commit()
+        finally:
+            conn.close()
+    
+    future.add_done_callback(save)
+    return future
+
+
 def get_user_by_id(user_id):
     """Get user by ID"""
     conn = get_db_connection()
@@ -266,3 +531,703 @@ def get_user_by_email(email):
     
     return dict(user) if user else None
 
+
+# Read queries shared by the Flask handlers and the async API (asgi.py)
+def update_last_login(user_id):
+    """Record a successful login"""
+    conn = get_db_connection()
+    conn.execute(
+        'UPDATE users SET last_login = ? WHERE id = ?',
+        (datetime.now().isoformat(), user_id)
+    )
+    conn.commit()
+    conn.close()
+
+
+def get_latest_assessment(user_id):
+    """Get a user's most recent assessment"""
+    # Read your own writes: an assessment just submitted to this process may
+    # still be in the write-behind queue (at most one interval behind)
+    write_queue.flush(timeout=1.0)
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute('''
+        SELECT * FROM assessments 
+        WHERE user_id = ? 
+        ORDER BY created_at DESC 
+        LIMIT 1
+    ''', (user_id,))
+    assessment = cursor.fetchone()
+    conn.close()
+    
+    return dict(assessment) if assessment else None
+
+
+def encode_appointments_cursor(appointment):
+    """Opaque next-page token: the sort key of the last appointment on a page"""
+    key = [appointment['appointment_date'], appointment['appointment_time'], appointment['id']]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip('=')
+
+
+def decode_appointments_cursor(token):
+    """(appointment_date, appointment_time, id) from a cursor token"""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        appointment_date, appointment_time, appointment_id = key
+        if not (isinstance(appointment_date, str) and isinstance(appointment_time, str)
+                and isinstance(appointment_id, int)):
+            raise ValueError
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor') from None
+    return appointment_date, appointment_time, appointment_id
+
+
+def parse_appointment_page_args(args):
+    """Validate `limit`, `cursor`, `status` and `from`/`to` query parameters
+    into list_user_appointments() keyword arguments; ValueError if invalid"""
+    try:
+        limit = int(args.get('limit') or APPOINTMENTS_PAGE_SIZE)
+    except ValueError:
+        raise ValueError('limit must be an integer') from None
+    if not 1 <= limit <= APPOINTMENTS_MAX_PAGE_SIZE:
+        raise ValueError(f'limit must be between 1 and {APPOINTMENTS_MAX_PAGE_SIZE}')
+    
+    statuses = [status for status in (args.get('status') or '').split(',') if status]
+    for status in statuses:
+        if status not in APPOINTMENT_STATUSES:
+            raise ValueError(f'status must be one of {", ".join(APPOINTMENT_STATUSES)}')
+    
+    dates = {}
+    for param in ('from', 'to'):
+        value = args.get(param)
+        if value:
+            try:
+                datetime.strptime(value, '%Y-%m-%d')
+            except ValueError:
+                raise ValueError(f'{param} must be a YYYY-MM-DD date') from None
+        dates[param] = value or None
+    
+    cursor = args.get('cursor')
+    return {
+        'limit': limit,
+        'after': decode_appointments_cursor(cursor) if cursor else None,
+        'statuses': statuses,
+        'date_from': dates['from'],
+        'date_to': dates['to'],
+    }
+
+
+def list_user_appointments(user_id, user_type, limit=APPOINTMENTS_PAGE_SIZE, after=None,
+                           statuses=(), date_from=None, date_to=None):
+    """Get one page of a doctor's or patient's appointments, newest first, formatted for the API.
+
+    Pages are keyset-paginated on (appointment_date, appointment_time, id):
+    `after` is the key of the last appointment of the previous page, so each
+    page is a range scan of the (user, date, time) index however deep it is.
+    Returns (appointments, next_cursor); next_cursor is None on the last page.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    if user_type == 'doctor':
+        # For doctors, get appointments where they are the doctor
+        # doctor_id in appointments table references users.id
+        query = '''
+            SELECT a.*, u.name as patient_name, u.email as patient_email
+            FROM appointments a
+            JOIN users u ON a.patient_id = u.id
+            WHERE a.doctor_id = ?
+        '''
+    else:
+        # For patients, show all appointments (pending can be canceled, confirmed cannot)
+        # Join with doctors table using user_id, and also get doctor user info
+        query = '''
+            SELECT a.*, 
+                   d.name as doctor_name, 
+                   d.specialty, 
+                   d.city, 
+                   d.country,
+                   u.name as doctor_user_name
+            FROM appointments a
+            LEFT JOIN doctors d ON a.doctor_id = d.user_id
+            LEFT JOIN users u ON a.doctor_id = u.id
+            WHERE a.patient_id = ?
+        '''
+    params = [user_id]
+    
+    if statuses:
+        query += f' AND a.status IN ({", ".join("?" * len(statuses))})'
+        params.extend(statuses)
+    if date_from:
+        query += ' AND a.appointment_date >= ?'
+        params.append(date_from)
+    if date_to:
+        query += ' AND a.appointment_date <= ?'
+        params.append(date_to)
+    if after:
+        query += ' AND (a.appointment_date, a.appointment_time, a.id) < (?, ?, ?)'
+        params.extend(after)
+    
+    # One extra row tells whether there is a next page
+    query += ' ORDER BY a.appointment_date DESC, a.appointment_time DESC, a.id DESC LIMIT ?'
+    params.append(limit + 1)
+    
+    cursor.execute(query, params)
+    appointments = cursor.fetchall()
+    conn.close()
+    
+    next_cursor = None
+    if len(appointments) > limit:
+        appointments = appointments[:limit]
+        next_cursor = encode_appointments_cursor(appointments[-1])
+    
+    appointments_list = []
+    for apt in appointments:
+        apt_dict = dict(apt)
+        # Format the appointment data
+        if user_type == 'doctor':
+            apt_dict['patient'] = apt_dict.get('patient_name', 'Unknown Patient')
+            apt_dict['patient_email'] = apt_dict.get('patient_email', '')
+        else:
+            # Use doctor_name from doctors table, fallback to doctor_user_name from users table
+            apt_dict['doctor'] = apt_dict.get('doctor_name') or apt_dict.get('doctor_user_name', 'Unknown Doctor')
+            apt_dict['location'] = f"{apt_dict.get('city', '')}, {apt_dict.get('country', '')}".strip()
+            if not apt_dict['location'] or apt_dict['location'] == ', ':
+                apt_dict['location'] = 'Location TBD'
+        
+        appointments_list.append(apt_dict)
+    
+    return appointments_list, next_cursor
+
+
+class AppointmentChangeError(Exception):
+    """A status change or delete the state machine or ownership rules refuse"""
+
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def appointment_sources(target, user_type):
+    """Statuses an appointment may be in for `user_type` to move it to `target`"""
+    return tuple(source for (source, to), roles in APPOINTMENT_TRANSITIONS.items()
+                 if to == target and user_type in roles)
+
+
+def transition_error(source, target):
+    if target == 'deleted':
+        return f'Cannot delete {source} appointments'
+    if target == 'cancelled':
+        return f'Cannot cancel {source} appointments'
+    return f'Cannot change {source} appointments to {target}'
+
+
+def _change_appointment(sql, appointment_id, user_id, user_type, target, params=()):
+    """Run `sql` (an UPDATE or DELETE ending in a WHERE clause that is
+    completed here) with ownership and the allowed source statuses as
+    conditions, so the check and the change are one atomic statement.
+
+    Returns the RETURNING row; on no match, a second read only works out
+    which rule refused the change for the error.
+    """
+    owner_column = APPOINTMENT_OWNER_COLUMNS.get(user_type)
+    sources = appointment_sources(target, user_type)
+    conn = get_db_connection()
+    try:
+        row = None
+        if owner_column and sources:
+            row = conn.execute(f'''
+                {sql} WHERE id = ? AND {owner_column} = ?
+                AND status IN ({', '.join('?' * len(sources))})
+                RETURNING id, status, doctor_id, patient_id
+            ''', (*params, appointment_id, user_id, *sources)).fetchone()
+            conn.commit()
+        if row:
+            return dict(row)
+        
+        appointment = conn.execute(
+            'SELECT status, doctor_id, patient_id FROM appointments WHERE id = ?', (appointment_id,)
+        ).fetchone()
+    finally:
+        conn.close()
+    
+    if not appointment:
+        raise AppointmentChangeError('Appointment not found', 404)
+    if not owner_column or appointment[owner_column] != user_id:
+        raise AppointmentChangeError('Unauthorized', 403)
+    raise AppointmentChangeError(transition_error(appointment['status'], target), 400)
+
+
+def set_appointment_status(appointment_id, user_id, user_type, status):
+    """Move an appointment the user owns to `status` if APPOINTMENT_TRANSITIONS allows it.
+
+    Returns the updated appointment; raises AppointmentChangeError otherwise.
+    """
+    if status not in APPOINTMENT_STATUSES:
+        raise AppointmentChangeError('Invalid status', 400)
+    return _change_appointment('UPDATE appointments SET status = ?', appointment_id,
+                               user_id, user_type, status, (status,))
+
+
+def remove_appointment(appointment_id, user_id, user_type):
+    """Delete an appointment the user owns if its status allows it.
+
+    Returns the deleted appointment; raises AppointmentChangeError otherwise.
+    """
+    return _change_appointment('DELETE FROM appointments', appointment_id, user_id, user_type, 'deleted')
+
+
+class SlotTakenError(Exception):
+    """Raised when the doctor already has an active appointment in that slot"""
+
+
+def parse_slot(appointment_date, appointment_time):
+    """Validate a booking's date and time into the stored ('YYYY-MM-DD', 'HH:MM') form.
+
+    The time must be exactly one of appointment_slot_times(): an off-grid
+    time such as 10:30 would overlap the 10:00 slot without colliding with
+    it in the unique slot index. ValueError if invalid.
+    """
+    try:
+        day = datetime.strptime(str(appointment_date), '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError('Appointment date must be YYYY-MM-DD') from None
+    slot = str(appointment_time)
+    slots = appointment_slot_times()
+    if slot not in slots:
+        raise ValueError(f'Appointment time must be one of {", ".join(slots)} (HH:MM)')
+    return day.isoformat(), slot
+
+
+def insert_appointment(cursor, patient_id, doctor_id, appointment_date, appointment_time, notes, status='pending'):
+    """Insert an appointment in the caller's transaction and return its id.
+
+    The doctor's slot is reserved by the idx_appointments_doctor_slot
+    unique index, so a slot that is already pending or confirmed fails the
+    INSERT itself (SlotTakenError) and two concurrent bookings cannot both win.
+    """
+    appointment_date, appointment_time = parse_slot(appointment_date, appointment_time)
+    try:
+        cursor.execute('''
+            INSERT INTO appointments (patient_id, doctor_id, appointment_date, appointment_time, notes, status)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (patient_id, doctor_id, appointment_date, appointment_time, notes, status))
+    except sqlite3.IntegrityError as e:
+        if 'UNIQUE' not in str(e):
+            raise
+        raise SlotTakenError(f'{appointment_date} {appointment_time} is already booked') from None
+    return cursor.lastrowid
+
+
+def appointment_slot_times():
+    """The bookable times of a day (HH:MM), every APPOINTMENT_SLOT_MINUTES"""
+    start = datetime.strptime(APPOINTMENT_DAY_START, '%H:%M')
+    end = datetime.strptime(APPOINTMENT_DAY_END, '%H:%M')
+    times = []
+    while start < end:
+        times.append(start.strftime('%H:%M'))
+        start += timedelta(minutes=APPOINTMENT_SLOT_MINUTES)
+    return times
+
+
+def parse_availability_args(args):
+    """Validate `from`/`to` (YYYY-MM-DD, default: the next 7 days from today)
+    into get_doctor_availability() keyword arguments; ValueError if invalid"""
+    dates = {}
+    for param in ('from', 'to'):
+        value = args.get(param)
+        try:
+            dates[param] = datetime.strptime(value, '%Y-%m-%d').date() if value else None
+        except ValueError:
+            raise ValueError(f'{param} must be a YYYY-MM-DD date') from None
+    
+    date_from = dates['from'] or datetime.now().date()
+    date_to = dates['to'] or date_from + timedelta(days=6)
+    if date_to < date_from:
+        raise ValueError('to must not be before from')
+    if (date_to - date_from).days >= AVAILABILITY_MAX_DAYS:
+        raise ValueError(f'At most {AVAILABILITY_MAX_DAYS} days at a time')
+    return {'date_from': date_from, 'date_to': date_to}
+
+
+def get_doctor_availability(doctor_id, date_from, date_to):
+    """Free slots per day between `date_from` and `date_to` (dates, inclusive).
+
+    The taken slots come from one range scan of the partial slot index,
+    whose WHERE clause the query repeats so the planner can use it.
+    Returns None for an unknown doctor.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute('SELECT 1 FROM doctors WHERE user_id = ?', (doctor_id,))
+    if cursor.fetchone() is None:
+        conn.close()
+        return None
+    
+    cursor.execute('''
+        SELECT appointment_date, appointment_time FROM appointments
+        WHERE doctor_id = ? AND appointment_date BETWEEN ? AND ?
+          AND status IN ('pending', 'confirmed')
+    ''', (doctor_id, date_from.isoformat(), date_to.isoformat()))
+    taken = set(map(tuple, cursor.fetchall()))
+    conn.close()
+    
+    times = appointment_slot_times()
+    days = []
+    day = date_from
+    while day <= date_to:
+        date = day.isoformat()
+        days.append({'date': date, 'free': [t for t in times if (date, t) not in taken]})
+        day += timedelta(days=1)
+    return days
+
+
+def parse_doctor_stats_args(args):
+    """Validate the optional `date` query parameter into get_doctor_stats() keyword arguments"""
+    day = args.get('date')
+    if day:
+        try:
+            datetime.strptime(day, '%Y-%m-%d')
+        except ValueError:
+            raise ValueError('date must be a YYYY-MM-DD date') from None
+    return {'day': day or None}
+
+
+def get_doctor_stats(doctor_id, day=None):
+    """Appointment counts for a doctor's dashboard.
+
+    Totals by status come from the one doctor_appointment_stats row the
+    appointment triggers keep current, and the appointments on `day`
+    (YYYY-MM-DD, default today) from a range of the doctor/date index,
+    so neither reads the doctor's whole appointment list.
+    """
+    day = day or datetime.now().date().isoformat()
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute('SELECT * FROM doctor_appointment_stats WHERE doctor_id = ?', (doctor_id,))
+    row = cursor.fetchone()
+    stats = {key: row[key] if row else 0 for key in ('total', *STATS_STATUSES)}
+    
+    cursor.execute('''
+        SELECT COUNT(*) FROM appointments WHERE doctor_id = ? AND appointment_date = ?
+    ''', (doctor_id, day))
+    stats['today'] = cursor.fetchone()[0]
+    conn.close()
+    
+    return stats
+
+
+def check_doctor_stats(repair=True):
+    """Compare doctor_appointment_stats with a fresh count of the appointments table.
+
+    Returns the ids of doctors whose counters disagree. With `repair`, the
+    table is then rebuilt from scratch in the same transaction.
+    """
+    conn = get_db_connection()
+    counts = ', '.join(f"SUM(status = '{s}')" for s in STATS_STATUSES)
+    columns = ', '.join(STATS_STATUSES)
+    try:
+        # Hold the write lock so no appointment changes between count and rebuild
+        conn.execute('BEGIN IMMEDIATE')
+        mismatched = [row[0] for row in conn.execute(f'''
+            WITH expected AS (
+                SELECT doctor_id, COUNT(*) AS total, {counts}
+                FROM appointments WHERE typeof(doctor_id) = 'integer' GROUP BY doctor_id
+            ), stored AS (
+                SELECT doctor_id, total, {columns}
+                FROM doctor_appointment_stats WHERE total != 0
+            )
+            SELECT doctor_id FROM (
+                SELECT * FROM expected EXCEPT SELECT * FROM stored
+                UNION
+                SELECT * FROM stored EXCEPT SELECT * FROM expected
+            ) ORDER BY doctor_id
+        ''')]
+        if mismatched and repair:
+            rebuild_doctor_stats(conn)
+        conn.commit()
+    finally:
+        conn.close()
+    
+    return mismatched
+
+
+def list_articles(category=None):
+    """Get articles, newest first, optionally for one category"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    if category:
+        cursor.execute('''
+            SELECT * FROM articles WHERE category = ?
+            ORDER BY created_at DESC
+        ''', (category,))
+    else:
+        cursor.execute('SELECT * FROM articles ORDER BY created_at DESC')
+    
+    articles = cursor.fetchall()
+    conn.close()
+    
+    return [dict(article) for article in articles]
+
+
+def list_doctors(country=None, city=None, specialty=None):
+    """Get doctors by rating, optionally filtered by country, city and specialty"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    query = 'SELECT * FROM doctors WHERE 1=1'
+    params = []
+    
+    if country:
+        query += ' AND country = ?'
+        params.append(country)
+    if city:
+        query += ' AND city = ?'
+        params.append(city)
+    if specialty:
+        query += ' AND specialty = ?'
+        params.append(specialty)
+    
+    query += ' ORDER BY rating DESC, experience_years DESC'
+    
+    cursor.execute(query, params)
+    doctors = cursor.fetchall()
+    conn.close()
+    
+    return [dict(doctor) for doctor in doctors]
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km between two points given in degrees"""
+    if None in (lat1, lon1, lat2, lon2):
+        return None
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _geo_boxes(lat, lon, radius_km):
+    """(min_lat, max_lat, min_lon, max_lon) boxes covering the circle around a point.
+
+    Two boxes when the circle crosses the antimeridian; the full longitude
+    range when it reaches a pole.
+    """
+    angle = radius_km / EARTH_RADIUS_KM
+    dlat = math.degrees(angle)
+    min_lat, max_lat = lat - dlat, lat + dlat
+    if min_lat <= -90 or max_lat >= 90 or angle >= math.pi / 2:
+        return [(max(min_lat, -90.0), min(max_lat, 90.0), -180.0, 180.0)]
+    dlon = math.degrees(math.asin(math.sin(angle) / math.cos(math.radians(lat))))
+    min_lon, max_lon = lon - dlon, lon + dlon
+    if min_lon < -180:
+        return [(min_lat, max_lat, min_lon + 360, 180.0), (min_lat, max_lat, -180.0, max_lon)]
+    if max_lon > 180:
+        return [(min_lat, max_lat, min_lon, 180.0), (min_lat, max_lat, -180.0, max_lon - 360)]
+    return [(min_lat, max_lat, min_lon, max_lon)]
+
+
+def _doctors_within(conn, lat, lon, radius_km, limit):
+    # The R*Tree yields the doctors inside the bounding boxes; only those
+    # get an exact distance. Boxes are matched by overlap because the index
+    # rounds stored coordinates outwards to 32-bit floats
+    boxes = _geo_boxes(lat, lon, radius_km)
+    candidates = ' UNION ALL '.join(
+        ['SELECT id FROM doctors_geo WHERE max_lat >= ? AND min_lat <= ? AND max_lon >= ? AND min_lon <= ?']
+        * len(boxes)
+    )
+    return conn.execute(f'''
+        SELECT * FROM (
+            SELECT d.*, haversine_km(?, ?, d.latitude, d.longitude) AS distance_km
+            FROM doctors d
+            WHERE d.id IN ({candidates})
+        )
+        WHERE distance_km <= ?
+        ORDER BY distance_km, id
+        LIMIT ?
+    ''', [lat, lon, *(value for box in boxes for value in box), radius_km, limit]).fetchall()
+
+
+def list_nearby_doctors(lat, lon, radius_km=NEARBY_RADIUS_KM, limit=NEARBY_PAGE_SIZE):
+    """The `limit` doctors closest to (lat, lon) within `radius_km`, nearest first.
+
+    Starts with a small circle and widens it only while it holds fewer than
+    `limit` doctors, so a dense city never has every doctor within
+    `radius_km` ranked. Each doctor carries its `distance_km`.
+    """
+    conn = get_db_connection()
+    search_km = min(radius_km, NEARBY_FIRST_RADIUS_KM)
+    while True:
+        doctors = _doctors_within(conn, lat, lon, search_km, limit)
+        # Every doctor closer than search_km was ranked, so a full page is final
+        if len(doctors) >= limit or search_km >= radius_km:
+            break
+        search_km = min(search_km * 4, radius_km)
+    conn.close()
+
+    doctors = [dict(doctor) for doctor in doctors]
+    for doctor in doctors:
+        doctor['distance_km'] = round(doctor['distance_km'], 2)
+    return doctors
+
+
+def parse_nearby_args(args):
+    """Validate `lat`, `lon`, `radius` (km) and `limit` into list_nearby_doctors() kwargs; ValueError if invalid"""
+    point = {}
+    for name, bound in (('lat', 90), ('lon', 180)):
+        try:
+            value = float(args.get(name, ''))
+        except ValueError:
+            raise ValueError(f'{name} is required and must be a number') from None
+        if not -bound <= value <= bound:
+            raise ValueError(f'{name} must be between -{bound} and {bound}')
+        point[name] = value
+    
+    try:
+        radius_km = float(args.get('radius') or NEARBY_RADIUS_KM)
+        limit = int(args.get('limit') or NEARBY_PAGE_SIZE)
+    except ValueError:
+        raise ValueError('radius and limit must be numbers') from None
+    if not 0 < radius_km <= NEARBY_MAX_RADIUS_KM:
+        raise ValueError(f'radius must be more than 0 and at most {NEARBY_MAX_RADIUS_KM:g} km')
+    if not 1 <= limit <= NEARBY_MAX_PAGE_SIZE:
+        raise ValueError(f'limit must be between 1 and {NEARBY_MAX_PAGE_SIZE}')
+    return {'lat': point['lat'], 'lon': point['lon'], 'radius_km': radius_km, 'limit': limit}
+
+
+def search_match_terms(q):
+    """FTS5 terms of a free-text query, or None when it has nothing searchable.
+
+    Terms are quoted so user input can never be parsed as FTS5 syntax; the
+    last one is a prefix so results show up while the user is still typing.
+    """
+    terms = SEARCH_TERM.findall(q.lower())[:SEARCH_MAX_TERMS]
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return quoted
+
+
+def _marked_html(text):
+    """HTML-escape highlight()/snippet() output and turn its markers into <mark> tags"""
+    if text is None:
+        return None
+    return html.escape(text).replace(_MARK_START, '<mark>').replace(_MARK_END, '</mark>')
+
+
+def _search(table, sql, highlights, terms, limit):
+    """Run a ranked FTS5 query on `table` whose first parameters are `highlights` marker pairs.
+
+    Rows must contain every term. When none do, terms that match nothing in
+    `table` are dropped (e.g. "anxiety" from "anxiety Cairo psychiatrist"
+    over doctors) and the rest must all match; rows containing any of them
+    are ranked only as a last resort, since bm25 then scores a far larger set.
+    """
+    conn = get_db_connection()
+    marks = (_MARK_START, _MARK_END) * highlights
+    rows = conn.execute(sql, marks + (' '.join(terms), limit)).fetchall()
+    if not rows and len(terms) > 1:
+        present = [term for term in terms if conn.execute(
+            f'SELECT 1 FROM {table} WHERE {table} MATCH ? LIMIT 1', (term,)).fetchone()]
+        fallbacks = []
+        if 0 < len(present) < len(terms):
+            fallbacks.append(' '.join(present))
+        if len(present) > 1:
+            fallbacks.append(' OR '.join(present))
+        for match in fallbacks:
+            rows = conn.execute(sql, marks + (match, limit)).fetchall()
+            if rows:
+                break
+    conn.close()
+    return [dict(row) for row in rows]
+
+
+def search_articles(terms, limit=SEARCH_PAGE_SIZE):
+    """Articles for search_match_terms() output, best first, with a highlighted title and snippet"""
+    articles = _search('articles_fts', '''
+        SELECT a.id, a.title, a.category, a.excerpt, a.icon, a.image_url, a.link_url,
+               highlight(articles_fts, 0, ?, ?) AS title_marked,
+               snippet(articles_fts, -1, ?, ?, '…', 16) AS snippet_marked
+        FROM articles_fts
+        JOIN articles a ON a.id = articles_fts.rowid
+        WHERE articles_fts MATCH ?
+        ORDER BY rank
+        LIMIT ?
+    ''', 2, terms, limit)
+    for article in articles:
+        article['highlight'] = {
+            'title': _marked_html(article.pop('title_marked')),
+            'snippet': _marked_html(article.pop('snippet_marked')),
+        }
+    return articles
+
+
+def search_doctors(terms, limit=SEARCH_PAGE_SIZE):
+    """Doctors for search_match_terms() output, best first, with highlighted fields"""
+    doctors = _search('doctors_fts', '''
+        SELECT d.*,
+               highlight(doctors_fts, 0, ?, ?) AS name_marked,
+               highlight(doctors_fts, 1, ?, ?) AS specialty_marked,
+               highlight(doctors_fts, 2, ?, ?) AS city_marked,
+               highlight(doctors_fts, 3, ?, ?) AS country_marked
+        FROM doctors_fts
+        JOIN doctors d ON d.id = doctors_fts.rowid
+        WHERE doctors_fts MATCH ?
+        ORDER BY rank
+        LIMIT ?
+    ''', 4, terms, limit)
+    for doctor in doctors:
+        doctor['highlight'] = {
+            field: _marked_html(doctor.pop(f'{field}_marked'))
+            for field in ('name', 'specialty', 'city', 'country')
+        }
+    return doctors
+
+
+def parse_search_args(args):
+    """Validate `q`, `type` and `limit` into search_match_terms() output,
+    the kinds of results to return and the per-kind limit; ValueError if invalid"""
+    terms = search_match_terms(args.get('q') or '')
+    if terms is None:
+        raise ValueError('q must contain at least one word')
+    
+    kinds = [kind for kind in (args.get('type') or '').split(',') if kind] or list(SEARCH_TYPES)
+    for kind in kinds:
+        if kind not in SEARCH_TYPES:
+            raise ValueError(f'type must be one of {", ".join(SEARCH_TYPES)}')
+    
+    try:
+        limit = int(args.get('limit') or SEARCH_PAGE_SIZE)
+    except ValueError:
+        raise ValueError('limit must be an integer') from None
+    if not 1 <= limit <= SEARCH_MAX_PAGE_SIZE:
+        raise ValueError(f'limit must be between 1 and {SEARCH_MAX_PAGE_SIZE}')
+    return terms, kinds, limit
+
+
+def search(terms, kinds=SEARCH_TYPES, limit=SEARCH_PAGE_SIZE):
+    """{'articles': [...], 'doctors': [...]} for the requested kinds"""
+    searches = {'articles': search_articles, 'doctors': search_doctors}
+    return {kind: searches[kind](terms, limit) for kind in kinds}
+
+
+def queue_assessment(user_id, age, gender, risk_score, risk_level, prediction, prediction_probability):
+    """Save an assessment result through the background write queue"""
+    write_queue.submit('''
+        INSERT INTO assessments (user_id, age, gender, risk_score, risk_level, prediction, prediction_probability, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', (user_id, age, gender, risk_score, risk_level, prediction, prediction_probability,
+          datetime.now().isoformat()))
+
+
+def queue_chatbot_conversation(user_id, message, response, risk_prediction):
+    """Log a chatbot exchange through the background write queue"""
+    write_queue.submit('''
+        INSERT INTO chatbot_conversations (user_id, message, response, risk_prediction)
+        VALUES (?, ?, ?, ?)
+    ''', (user_id, message, response, risk_prediction))
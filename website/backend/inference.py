@@ -0,0 +1,127 @@
+"""
+ML Inference Engine
+Single-pass scoring on top of the trained mental health pipeline
+"""
+
+import logging
+import os
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.pipeline import Pipeline
+
+from compiled_scorer import compile_pipeline
+
+logger = logging.getLogger('mentiq.inference')
+
+# Model path
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+MODEL_PATH = os.path.join(BASE_DIR, 'saved_models', 'full_pipeline.pkl')
+
+# Input schema of full_pipeline.pkl (same columns as mental_health_data_v2.csv)
+FEATURE_COLUMNS = [
+    'Age', 'Gender', 'Employment_Status', 'Marital_Status',
+    'Work_Hours_per_Week', 'Financial_Stress', 'Physical_Activity_Hours_per_Week',
+    'Screen_Time_per_Day_hours', 'Sleep_Hours_per_Night', 'Alcohol_Units_per_Week',
+    'Smoking_Status', 'Family_History', 'Chronic_Condition', 'Support_System_Score',
+    'Stress_Level_Score', 'Rumination_Score', 'Feeling_Nervous',
+    'Trouble_Concentrating', 'Hopelessness', 'Avoids_People', 'Nightmares',
+    'Medication_Usage'
+]
+CATEGORICAL_COLUMNS = ['Gender', 'Employment_Status', 'Marital_Status', 'Smoking_Status']
+
+
+def load_pipeline(path=MODEL_PATH):
+    """Load the fitted sklearn pipeline from disk"""
+    return joblib.load(path)
+
+
+def load_scorer(pipeline):
+    """Compile the pipeline into the DataFrame-free fast path.
+
+    Falls back to the sklearn pipeline itself if its structure is not
+    supported by CompiledScorer.
+    """
+    try:
+        return compile_pipeline(pipeline)
+    except (AttributeError, KeyError, ValueError) as e:
+        logger.warning('could not compile ML model, using sklearn pipeline', extra={'error': str(e)})
+        return pipeline
+
+
+def get_risk_level_from_score(score):
+    """Get risk level from score"""
+    if score <= 20:
+        return "Low"
+    elif score <= 40:
+        return "Moderate"
+    elif score <= 65:
+        return "High"
+    else:
+        return "Very High"
+
+
+def parse_record(record):
+    """Normalize a raw input row (JSON object or CSV dict) to the model schema.
+
+    Missing or empty values become None so the pipeline's imputers fill them.
+    Raises ValueError if a numeric column cannot be parsed.
+    """
+    features = {}
+    for column in FEATURE_COLUMNS:
+        value = record.get(column)
+        if value is None or value == '':
+            features[column] = None
+        elif column in CATEGORICAL_COLUMNS:
+            features[column] = str(value)
+        else:
+            try:
+                features[column] = float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"Invalid value for {column}: {value!r}")
+    return features
+
+
+def score_frame(model, input_df):
+    """Score every row of a DataFrame with one predict_proba call.
+
+    Returns (labels, probabilities) where probabilities is the probability
+    of the positive ("at risk") class. Labels are derived from the same
+    forward pass instead of calling predict() a second time.
+    """
+    proba = model.predict_proba(input_df)
+    labels = model.classes_[np.argmax(proba, axis=1)]
+    return labels, proba[:, 1]
+
+
+def predict_risk(model, features):
+    """Score one input and return label, probability and risk band.
+
+    `model` is the sklearn pipeline or anything with the same predict_proba /
+    classes_ interface (CompiledScorer, MicroBatcher); `features` is a dict
+    keyed by FEATURE_COLUMNS or a single-row DataFrame.
+    """
+    if isinstance(features, dict) and isinstance(model, Pipeline):
+        features = pd.DataFrame([features], columns=FEATURE_COLUMNS)
+    labels, probabilities = score_frame(model, features)
+    return risk_result(labels[0], probabilities[0])
+
+
+def score_records(model, records):
+    """Score a list of feature dicts with one vectorized call"""
+    if isinstance(model, Pipeline):
+        records = pd.DataFrame(records, columns=FEATURE_COLUMNS)
+    labels, probabilities = score_frame(model, records)
+    return [risk_result(label, p) for label, p in zip(labels, probabilities)]
+
+
+def risk_result(label, probability):
+    """Build the label / probability / risk band dict returned to callers"""
+    probability = float(probability)
+    risk_score = int(probability * 100)
+    return {
+        'prediction': int(label),
+        'probability': probability,
+        'risk_score': risk_score,
+        'risk_level': get_risk_level_from_score(risk_score)
+    }
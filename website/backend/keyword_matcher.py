@@ -0,0 +1,87 @@
+"""
+Keyword Matcher
+Aho–Corasick automaton that finds which of several keyword groups occur in
+a text, with the same substring semantics as `keyword in text.lower()`
+
+The automaton costs one Python-level step per character, while a
+`keyword in text` check runs in C. With the chatbot's 39 keywords the
+automaton is faster up to about 130 characters (3.7us against 12.8us for a
+28-character message). Past that, the per-keyword checks win: 31us against
+55us at 485 characters, and 4.0ms against 11.6ms at 96k characters
+(benchmarks/bench_keywords.py). scan() therefore uses whichever is faster for
+the text's length, cut over at KEYWORD_AUTOMATON_MAX_CHARS.
+"""
+
+import os
+
+# Longer texts are matched with one C-level substring search per keyword,
+# which is faster in CPython past this length (see the module docstring)
+KEYWORD_AUTOMATON_MAX_CHARS = int(os.environ.get('KEYWORD_AUTOMATON_MAX_CHARS', '128'))
+
+
+class KeywordMatcher:
+    """Precompiled multi-pattern matcher over a list of keyword groups.
+
+    `scan(text)` returns a bitmask with bit i set when any keyword of
+    groups[i] occurs in the lower-cased text. Every keyword is compiled into
+    one automaton (the goto/fail trie flattened into a DFA whose states carry
+    the mask of every keyword ending there, overlapping ones included), so a
+    chat-sized message is matched in a single pass over its characters.
+    """
+
+    def __init__(self, groups, max_chars=KEYWORD_AUTOMATON_MAX_CHARS):
+        self.groups = [[keyword.lower() for keyword in keywords] for keywords in groups]
+        self.max_chars = max_chars
+        self._delta, self._out = self._compile(self.groups)
+
+    @staticmethod
+    def _compile(groups):
+        # Trie of the keywords; out[state] is the mask of the keyword ending there
+        goto = [{}]
+        out = [0]
+        for bit, keywords in enumerate(groups):
+            for keyword in keywords:
+                state = 0
+                for char in keyword:
+                    if char not in goto[state]:
+                        goto.append({})
+                        out.append(0)
+                        goto[state][char] = len(goto) - 1
+                    state = goto[state][char]
+                out[state] |= 1 << bit
+
+        # Breadth-first: a state's fail link is the longest proper suffix that
+        # is also a trie path; it inherits that state's matches, and missing
+        # transitions are resolved through it so scanning never backtracks
+        delta = [dict(goto[0])]
+        delta.extend({} for _ in goto[1:])
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        for state in queue:
+            out[state] |= out[fail[state]]
+            delta[state] = dict(delta[fail[state]])
+            for char, child in goto[state].items():
+                fail[child] = delta[fail[state]].get(char, 0)
+                delta[state][char] = child
+                queue.append(child)
+        return delta, out
+
+    def scan(self, text):
+        """Bitmask of the groups with at least one keyword in `text`"""
+        text = text.lower()
+        if len(text) > self.max_chars:
+            return self._scan_each(text)
+        delta = self._delta
+        out = self._out
+        state = found = 0
+        for char in text:
+            state = delta[state].get(char, 0)
+            found |= out[state]
+        return found
+
+    def _scan_each(self, text):
+        found = 0
+        for bit, keywords in enumerate(self.groups):
+            if any(keyword in text for keyword in keywords):
+                found |= 1 << bit
+        return found
@@ -0,0 +1,423 @@
+"""
+Schema Migrations
+Numbered, idempotent schema upgrades tracked in PRAGMA user_version, plus
+batched online backfills for reshaping large tables without a long write lock
+"""
+
+import logging
+import time
+
+# (version, description, function) in version order
+MIGRATIONS = []
+
+# name -> (after_version, table, function)
+BACKFILLS = {}
+
+# Rows per backfill transaction and pause between batches (seconds)
+BACKFILL_BATCH_SIZE = 2000
+BACKFILL_PAUSE = 0.01
+
+# A child of the 'mentiq' logger, so it goes through app_logging's queue handler
+logger = logging.getLogger('mentiq.migrations')
+
+
+def migration(version, description):
+    """Register `fn(conn)` as schema migration number `version`.
+
+    The function runs inside a write transaction together with the
+    user_version bump, so a failed migration leaves no partial changes.
+    """
+    def register(fn):
+        expected = len(MIGRATIONS) + 1
+        if version != expected:
+            raise ValueError(f"Migration {fn.__name__} is numbered {version}, expected {expected}")
+        MIGRATIONS.append((version, description, fn))
+        return fn
+    return register
+
+
+def backfill(name, table, after):
+    """Register `fn(conn, first_id, last_id)` as an online backfill over `table`.
+
+    The backfill runs once schema version `after` is applied. It is called
+    for consecutive rowid ranges, each in its own short transaction, so
+    writers are never blocked for long and an interrupted backfill resumes
+    where it stopped. Only rows that exist when the backfill starts are
+    visited; code writing new rows must already produce the new shape.
+    """
+    def register(fn):
+        BACKFILLS[name] = (after, table, fn)
+        return fn
+    return register
+
+
+def get_schema_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def add_column(conn, table, column, definition):
+    """ALTER TABLE ... ADD COLUMN unless the column already exists"""
+    columns = [row[1] for row in conn.execute(f'PRAGMA table_info({table})')]
+    if column not in columns:
+        conn.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+
+
+def migrate(conn):
+    """Apply every pending migration in order and return the schema version"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_backfills (
+            name TEXT PRIMARY KEY,
+            last_id INTEGER NOT NULL DEFAULT 0,
+            max_id INTEGER,
+            completed_at TIMESTAMP
+        )
+    ''')
+    conn.commit()
+
+    start_version = get_schema_version(conn)
+    for version, description, fn in MIGRATIONS:
+        if version <= start_version:
+            continue
+        conn.execute('BEGIN IMMEDIATE')
+        # Another process may have migrated while we waited for the lock
+        if get_schema_version(conn) >= version:
+            conn.rollback()
+            continue
+        try:
+            fn(conn)
+            conn.execute(f'PRAGMA user_version = {version}')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        print(f"✅ Applied migration {version}: {description}")
+
+    version = get_schema_version(conn)
+    if version > start_version:
+        # Refresh planner statistics for new indexes (sampled, so cheap on big tables)
+        conn.execute('PRAGMA analysis_limit = 1000')
+        conn.execute('ANALYZE')
+        conn.commit()
+    return version
+
+
+def run_backfills(conn, batch_size=BACKFILL_BATCH_SIZE, pause=BACKFILL_PAUSE):
+    """Run every pending backfill whose schema version is applied"""
+    version = get_schema_version(conn)
+    for name, (after, table, fn) in BACKFILLS.items():
+        if version >= after:
+            run_backfill(conn, name, table, fn, batch_size, pause)
+
+
+def run_backfill(conn, name, table, fn, batch_size=BACKFILL_BATCH_SIZE, pause=BACKFILL_PAUSE):
+    """Walk `table` in rowid batches, committing progress after each one"""
+    conn.execute('INSERT OR IGNORE INTO schema_backfills (name) VALUES (?)', (name,))
+    conn.commit()
+    state = conn.execute(
+        'SELECT last_id, max_id, completed_at FROM schema_backfills WHERE name = ?', (name,)
+    ).fetchone()
+    last_id, max_id, completed_at = state[0], state[1], state[2]
+    if completed_at:
+        return
+
+    if max_id is None:
+        max_id = conn.execute(f'SELECT COALESCE(MAX(rowid), 0) FROM {table}').fetchone()[0]
+        conn.execute('UPDATE schema_backfills SET max_id = ? WHERE name = ?', (max_id, name))
+        conn.commit()
+
+    while last_id < max_id:
+        first_id, end_id = last_id + 1, min(last_id + batch_size, max_id)
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            fn(conn, first_id, end_id)
+            conn.execute('UPDATE schema_backfills SET last_id = ? WHERE name = ?', (end_id, name))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        last_id = end_id
+        if pause:
+            time.sleep(pause)
+
+    conn.execute(
+        'UPDATE schema_backfills SET completed_at = CURRENT_TIMESTAMP WHERE name = ?', (name,)
+    )
+    conn.commit()
+    print(f"✅ Backfill {name} complete ({max_id} rows)")
+
+
+# ==================== Migrations ====================
+
+@migration(1, 'indexes for the hot dashboard, profile and directory queries')
+def add_hot_query_indexes(conn):
+    # Doctor / patient appointment lists, newest first
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_appointments_doctor_date
+        ON appointments (doctor_id, appointment_date, appointment_time)
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_appointments_patient_date
+        ON appointments (patient_id, appointment_date, appointment_time)
+    ''')
+    # Latest assessment per user
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_assessments_user_created
+        ON assessments (user_id, created_at)
+    ''')
+    # Doctor directory: one index per filter column, each already in
+    # rating order so filtered lists need no sort step
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_doctors_country_rating
+        ON doctors (country, rating DESC, experience_years DESC)
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_doctors_city_rating
+        ON doctors (city, rating DESC, experience_years DESC)
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_doctors_specialty_rating
+        ON doctors (specialty, rating DESC, experience_years DESC)
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_doctors_rating
+        ON doctors (rating DESC, experience_years DESC)
+    ''')
+    # Articles by category
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_articles_category_created
+        ON articles (category, created_at)
+    ''')
+
+
+@migration(2, 'store each user\'s password hash method and cost')
+def add_password_hash_method(conn):
+    add_column(conn, 'users', 'password_hash_method', 'TEXT')
+
+
+@backfill('users_password_hash_method', 'users', after=2)
+def backfill_password_hash_method(conn, first_id, last_id):
+    # werkzeug hashes look like 'scrypt:32768:8:1$salt$hash'
+    conn.execute('''
+        UPDATE users SET password_hash_method = substr(password_hash, 1, instr(password_hash, '$') - 1)
+        WHERE rowid BETWEEN ? AND ? AND password_hash_method IS NULL
+    ''', (first_id, last_id))
+
+
+# Appointment statuses counted per doctor by doctor_appointment_stats
+STATS_STATUSES = ('pending', 'confirmed', 'cancelled', 'completed')
+
+
+def _stats_delta(row, sign):
+    # Column values for one appointment row (NEW or OLD) entering (+) or leaving (-) the counts
+    return ', '.join([f'{sign}1'] + [f"{sign}({row}.status = '{s}')" for s in STATS_STATUSES])
+
+
+def _stats_upsert(row, sign):
+    # Appointments without a valid doctor id (NULL, or text from a bad
+    # booking request) are not counted, and must not reach the rowid key
+    columns = ', '.join(['total'] + list(STATS_STATUSES))
+    updates = ', '.join(f'{c} = {c} + excluded.{c}' for c in ['total', *STATS_STATUSES])
+    return f'''
+        INSERT INTO doctor_appointment_stats (doctor_id, {columns})
+        SELECT {row}.doctor_id, {_stats_delta(row, sign)} WHERE typeof({row}.doctor_id) = 'integer'
+        ON CONFLICT (doctor_id) DO UPDATE SET {updates};
+    '''
+
+
+def rebuild_doctor_stats(conn):
+    """Recount doctor_appointment_stats from the appointments table (caller commits)"""
+    counts = ', '.join(f"SUM(status = '{s}')" for s in STATS_STATUSES)
+    conn.execute('DELETE FROM doctor_appointment_stats')
+    conn.execute(f'''
+        INSERT INTO doctor_appointment_stats (doctor_id, total, {', '.join(STATS_STATUSES)})
+        SELECT doctor_id, COUNT(*), {counts}
+        FROM appointments
+        WHERE typeof(doctor_id) = 'integer'
+        GROUP BY doctor_id
+    ''')
+
+
+@migration(3, 'per-doctor appointment counters kept current by triggers')
+def add_doctor_appointment_stats(conn):
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS doctor_appointment_stats (
+            doctor_id INTEGER PRIMARY KEY,
+            total INTEGER NOT NULL DEFAULT 0,
+            {', '.join(f'{s} INTEGER NOT NULL DEFAULT 0' for s in STATS_STATUSES)}
+        )
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS appointments_stats_insert
+        AFTER INSERT ON appointments
+        BEGIN {_stats_upsert('NEW', '+')} END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS appointments_stats_delete
+        AFTER DELETE ON appointments
+        BEGIN {_stats_upsert('OLD', '-')} END
+    ''')
+    # A status change (or a reassigned doctor) moves the row between counters
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS appointments_stats_update
+        AFTER UPDATE OF status, doctor_id ON appointments
+        WHEN OLD.status IS NOT NEW.status OR OLD.doctor_id IS NOT NEW.doctor_id
+        BEGIN
+            {_stats_upsert('OLD', '-')}
+            {_stats_upsert('NEW', '+')}
+        END
+    ''')
+    # Counted in the same transaction that installs the triggers, so no
+    # appointment is missed or counted twice (a rowid backfill running
+    # after the triggers could see rows they already counted)
+    rebuild_doctor_stats(conn)
+
+
+@migration(4, 'one active appointment per doctor slot')
+def add_doctor_slot_index(conn):
+    # Bookings are stored as zero-padded HH:MM; older rows may say '9:00'
+    conn.execute('''
+        UPDATE appointments SET appointment_time = '0' || appointment_time
+        WHERE appointment_time GLOB '[0-9]:[0-5][0-9]*'
+    ''')
+    # Slots already double-booked keep one appointment (a confirmed one
+    # before a pending one, then the earliest booked); the rest are cancelled
+    cancelled = conn.execute('''
+        UPDATE appointments SET status = 'cancelled'
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, ROW_NUMBER() OVER (
+                    PARTITION BY doctor_id, appointment_date, appointment_time
+                    ORDER BY status = 'confirmed' DESC, id
+                ) AS n
+                FROM appointments
+                WHERE doctor_id IS NOT NULL AND status IN ('pending', 'confirmed')
+            ) WHERE n > 1
+        )
+        RETURNING id, patient_id
+    ''').fetchall()
+    if cancelled:
+        # Their patients lost a booking: operators need to know whom to contact
+        logger.warning('cancelled double-booked appointments', extra={
+            'count': len(cancelled),
+            'appointment_ids': sorted(row[0] for row in cancelled),
+            'patient_ids': sorted({row[1] for row in cancelled}),
+        })
+    # Partial: cancelled and completed appointments free the slot. The
+    # index is also what the availability query scans
+    conn.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_appointments_doctor_slot
+        ON appointments (doctor_id, appointment_date, appointment_time)
+        WHERE status IN ('pending', 'confirmed')
+    ''')
+
+
+def _fts_triggers(conn, table, columns):
+    """Triggers that mirror `table` into its external-content FTS5 index `<table>_fts`"""
+    fts = f'{table}_fts'
+    names = ', '.join(columns)
+    new = ', '.join(f'NEW.{c}' for c in columns)
+    old = ', '.join(f'OLD.{c}' for c in columns)
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts} (rowid, {names}) VALUES (NEW.id, {new});
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {names}) VALUES ('delete', OLD.id, {old});
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF {names} ON {table} BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {names}) VALUES ('delete', OLD.id, {old});
+            INSERT INTO {fts} (rowid, {names}) VALUES (NEW.id, {new});
+        END
+    ''')
+
+
+@migration(5, 'full-text search over articles and doctors')
+def add_search_indexes(conn):
+    # External-content tables: the text stays in articles/doctors and only
+    # the index is stored. Porter stemming lets 'psychiatrists' match
+    # 'Psychiatrist'; the prefix indexes serve search-as-you-type terms
+    conn.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+            title, excerpt, content,
+            content='articles', content_rowid='id',
+            tokenize='porter unicode61 remove_diacritics 2', prefix='2 3'
+        )
+    ''')
+    conn.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS doctors_fts USING fts5(
+            name, specialty, city, country,
+            content='doctors', content_rowid='id',
+            tokenize='porter unicode61 remove_diacritics 2', prefix='2 3'
+        )
+    ''')
+    # Default ranking: a match in the title or name counts most
+    conn.execute("INSERT INTO articles_fts (articles_fts, rank) VALUES ('rank', 'bm25(10.0, 4.0, 1.0)')")
+    conn.execute("INSERT INTO doctors_fts (doctors_fts, rank) VALUES ('rank', 'bm25(10.0, 5.0, 3.0, 2.0)')")
+    _fts_triggers(conn, 'articles', ('title', 'excerpt', 'content'))
+    _fts_triggers(conn, 'doctors', ('name', 'specialty', 'city', 'country'))
+    # Index existing rows in the same transaction as the triggers
+    conn.execute("INSERT INTO articles_fts (articles_fts) VALUES ('rebuild')")
+    conn.execute("INSERT INTO doctors_fts (doctors_fts) VALUES ('rebuild')")
+
+
+# Centres of the cities the seeded doctors and new doctor accounts are
+# placed in, used for doctors that have no coordinates of their own
+CITY_COORDINATES = {
+    ('Egypt', 'Cairo'): (30.0444, 31.2357),
+    ('Egypt', 'Alexandria'): (31.2001, 29.9187),
+    ('USA', 'New York'): (40.7128, -74.0060),
+    ('UK', 'London'): (51.5074, -0.1278),
+    ('UAE', 'Dubai'): (25.2048, 55.2708),
+}
+
+
+@migration(6, 'doctor coordinates with an R*Tree index for nearby search')
+def add_doctor_locations(conn):
+    add_column(conn, 'doctors', 'latitude', 'REAL CHECK (latitude BETWEEN -90 AND 90)')
+    add_column(conn, 'doctors', 'longitude', 'REAL CHECK (longitude BETWEEN -180 AND 180)')
+    # One point (a zero-size box) per doctor with both coordinates set
+    conn.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS doctors_geo USING rtree(
+            id, min_lat, max_lat, min_lon, max_lon
+        )
+    ''')
+    located = 'NEW.latitude IS NOT NULL AND NEW.longitude IS NOT NULL'
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS doctors_geo_insert
+        AFTER INSERT ON doctors WHEN {located} BEGIN
+            INSERT INTO doctors_geo VALUES (NEW.id, NEW.latitude, NEW.latitude, NEW.longitude, NEW.longitude);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS doctors_geo_delete
+        AFTER DELETE ON doctors BEGIN
+            DELETE FROM doctors_geo WHERE id = OLD.id;
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS doctors_geo_update
+        AFTER UPDATE OF latitude, longitude ON doctors BEGIN
+            DELETE FROM doctors_geo WHERE id = OLD.id;
+            INSERT INTO doctors_geo
+            SELECT NEW.id, NEW.latitude, NEW.latitude, NEW.longitude, NEW.longitude WHERE {located};
+        END
+    ''')
+    # Existing doctors get their city's centre; the update trigger indexes them
+    conn.executemany('''
+        UPDATE doctors SET latitude = ?, longitude = ?
+        WHERE country = ? AND city = ? AND latitude IS NULL AND longitude IS NULL
+    ''', [(lat, lon, country, city) for (country, city), (lat, lon) in CITY_COORDINATES.items()])
+
+
+@migration(7, 'index for the unfiltered article list')
+def add_article_date_index(conn):
+    # /api/articles without a category, newest first (migration 1 only
+    # covers the per-category list)
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_articles_created
+        ON articles (created_at)
+    ''')
@@ -0,0 +1,193 @@
+"""
+Password Hashing Pool
+Runs werkzeug's key-derivation functions in a size-limited process pool with
+a queue-depth limit, so a login storm is rejected fast instead of pinning
+every request thread
+"""
+
+import io
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import reduction, spawn, util
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# Hash method (and cost) for new and upgraded hashes, in werkzeug's format
+PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+
+# Processes doing key derivation, and how many calls may be running or queued
+PASSWORD_POOL_SIZE = int(os.environ.get('PASSWORD_POOL_SIZE', '2'))
+PASSWORD_QUEUE_LIMIT = int(os.environ.get('PASSWORD_QUEUE_LIMIT', '8'))
+
+
+class PasswordPoolBusy(Exception):
+    """Raised instead of queueing when the hashing pool is at its queue limit"""
+
+
+def hash_method(pwhash):
+    """The method and cost parameters a hash was made with, e.g. 'scrypt:32768:8:1'"""
+    return pwhash.split('$', 1)[0]
+
+
+def needs_upgrade(method):
+    return method != PASSWORD_HASH_METHOD
+
+
+if 'forkserver' in multiprocessing.get_all_start_methods():
+    from multiprocessing import forkserver, popen_forkserver
+
+    class _LeanPopen(popen_forkserver.Popen):
+        """popen_forkserver.Popen that does not re-run the parent's main script.
+
+        A pool process normally imports the main script (app.py, run.py)
+        as __mp_main__ before it runs anything. That is the whole Flask app
+        and its ML model. Hashing needs only this module, which the fork
+        server preloads, so the main script is left out of the data the
+        process is started with.
+        """
+
+        def _launch(self, process_obj):
+            prep_data = spawn.get_preparation_data(process_obj._name)
+            prep_data.pop('init_main_from_path', None)
+            prep_data.pop('init_main_from_name', None)
+            buf = io.BytesIO()
+            popen_forkserver.set_spawning_popen(self)
+            try:
+                reduction.dump(prep_data, buf)
+                reduction.dump(process_obj, buf)
+            finally:
+                popen_forkserver.set_spawning_popen(None)
+
+            self.sentinel, w = forkserver.connect_to_new_process(self._fds)
+            parent_w = os.dup(w)
+            self.finalizer = util.Finalize(self, util.close_fds, (parent_w, self.sentinel))
+            with open(w, 'wb', closefd=True) as f:
+                f.write(buf.getbuffer())
+            self.pid = forkserver.read_signed(self.sentinel)
+
+    class _LeanProcess(multiprocessing.get_context('forkserver').Process):
+        @staticmethod
+        def _Popen(process_obj):
+            return _LeanPopen(process_obj)
+
+    class _LeanContext(type(multiprocessing.get_context('forkserver'))):
+        Process = _LeanProcess
+
+
+def _timed(fn, *args):
+    # Runs in a pool process; time.monotonic() is system-wide, so the start
+    # time can be compared with the submit time in the parent
+    started = time.monotonic()
+    result = fn(*args)
+    return result, started, time.monotonic() - started
+
+
+class PasswordHasher:
+    """Process pool for password hashing with admission control and timings"""
+
+    def __init__(self, size=PASSWORD_POOL_SIZE, queue_limit=PASSWORD_QUEUE_LIMIT,
+                 method=PASSWORD_HASH_METHOD):
+        self.size = size
+        self.queue_limit = queue_limit
+        self.method = method
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self._pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.hash_seconds = 0.0
+        self.hash_seconds_max = 0.0
+        self.wait_seconds = 0.0
+        self.wait_seconds_max = 0.0
+
+    def _get_executor(self):
+        # Started lazily, and again in each forked server worker. Pool
+        # processes are not forked from the (threaded) server process.
+        if self._executor is None or self._pid != os.getpid():
+            if 'forkserver' in multiprocessing.get_all_start_methods():
+                context = _LeanContext()
+                # The fork server preloads __main__ by default, i.e. the whole
+                # app and its ML model; pool processes only need this module
+                context.set_forkserver_preload([__name__])
+            else:
+                context = multiprocessing.get_context('spawn')
+            self._executor = ProcessPoolExecutor(max_workers=self.size, mp_context=context)
+            self._pid = os.getpid()
+            self._pending = 0
+        return self._executor
+
+    def submit(self, fn, *args):
+        """Queue `fn(*args)` on the pool; returns a Future of its result.
+
+        Raises PasswordPoolBusy right away when `queue_limit` calls are
+        already running or waiting.
+        """
+        with self._lock:
+            executor = self._get_executor()
+            if self._pending >= self.queue_limit:
+                self.rejected += 1
+                raise PasswordPoolBusy('Too many password checks in progress, please retry shortly')
+            self._pending += 1
+        submitted = time.monotonic()
+        try:
+            inner = executor.submit(_timed, fn, *args)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+
+        # Unwrap the timings so callers get the plain result
+        future = Future()
+
+        def record(done):
+            with self._lock:
+                self._pending -= 1
+                if done.exception() is None:
+                    _, started, elapsed = done.result()
+                    wait = max(started - submitted, 0.0)
+                    self.completed += 1
+                    self.hash_seconds += elapsed
+                    self.hash_seconds_max = max(self.hash_seconds_max, elapsed)
+                    self.wait_seconds += wait
+                    self.wait_seconds_max = max(self.wait_seconds_max, wait)
+            if done.exception() is not None:
+                future.set_exception(done.exception())
+            else:
+                future.set_result(done.result()[0])
+
+        inner.add_done_callback(record)
+        return future
+
+    def submit_hash(self, password):
+        return self.submit(generate_password_hash, password, self.method)
+
+    def submit_verify(self, pwhash, password):
+        return self.submit(check_password_hash, pwhash, password)
+
+    def hash(self, password):
+        return self.submit_hash(password).result()
+
+    def verify(self, pwhash, password):
+        return self.submit_verify(pwhash, password).result()
+
+    def stats(self):
+        with self._lock:
+            completed = max(self.completed, 1)
+            return {
+                'pool_size': self.size,
+                'queue_limit': self.queue_limit,
+                'in_flight': self._pending,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'hash_ms_avg': round(self.hash_seconds / completed * 1000, 3),
+                'hash_ms_max': round(self.hash_seconds_max * 1000, 3),
+                'queue_wait_ms_avg': round(self.wait_seconds / completed * 1000, 3),
+                'queue_wait_ms_max': round(self.wait_seconds_max * 1000, 3),
+            }
+
+
+hasher = PasswordHasher()
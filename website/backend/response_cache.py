@@ -0,0 +1,92 @@
+"""
+Response Cache
+Short-TTL, size-bounded LRU cache of pre-serialized JSON responses for
+rarely-changing directory data (doctors, articles)
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+# Seconds a cached response is served before it is rebuilt (0 disables the
+# cache). Other server processes see a change at most this late.
+RESPONSE_CACHE_TTL = float(os.environ.get('RESPONSE_CACHE_TTL', '30'))
+# Cached responses per endpoint; least recently used are evicted first
+RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', '256'))
+
+
+class CachedResponse:
+    """JSON body bytes plus the validators sent with them"""
+
+    __slots__ = ('body', 'etag', 'last_modified', 'expires')
+
+    def __init__(self, body, etag, last_modified, expires):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires = expires
+
+
+class ResponseCache:
+    """Thread-safe LRU of CachedResponse objects keyed by request filters"""
+
+    def __init__(self, ttl=RESPONSE_CACHE_TTL, max_entries=RESPONSE_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Return the live entry for `key`, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires <= time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, body):
+        """Cache `body` (bytes) for `key` and return its entry"""
+        etag = hashlib.blake2b(body, digest_size=8).hexdigest()
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        with self._lock:
+            previous = self._entries.get(key)
+            # An unchanged body keeps its validators, so clients still get 304s
+            last_modified = previous.last_modified if previous and previous.etag == etag else now
+            entry = CachedResponse(body, etag, last_modified, time.monotonic() + self.ttl)
+            if self.ttl > 0:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+            return entry
+
+    def get_or_build(self, key, build):
+        """Return the cached entry for `key`, calling `build()` for the body on a miss"""
+        return self.get(key) or self.put(key, build())
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+doctors_cache = ResponseCache()
+articles_cache = ResponseCache()
@@ -0,0 +1,194 @@
+"""
+Write-behind Queue
+Batches INSERTs that need not finish before the response is sent
+(assessments, chatbot conversation logs) into one transaction per interval
+on a background thread
+"""
+
+import atexit
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+# Statements waiting to be written; a full queue blocks callers
+# (0 = no queue, write synchronously in the caller)
+WRITE_QUEUE_MAX_PENDING = int(os.environ.get('WRITE_QUEUE_MAX_PENDING', '10000'))
+# A transaction is committed every WRITE_QUEUE_INTERVAL_MS or every
+# WRITE_QUEUE_BATCH_SIZE statements, whichever comes first
+WRITE_QUEUE_INTERVAL_MS = float(os.environ.get('WRITE_QUEUE_INTERVAL_MS', '20'))
+WRITE_QUEUE_BATCH_SIZE = int(os.environ.get('WRITE_QUEUE_BATCH_SIZE', '256'))
+# Longest a caller waits for room in a full queue before WriteQueueFull
+WRITE_QUEUE_PUT_TIMEOUT = float(os.environ.get('WRITE_QUEUE_PUT_TIMEOUT', '10'))
+# Longest process exit waits for queued statements to be committed
+WRITE_QUEUE_EXIT_TIMEOUT = float(os.environ.get('WRITE_QUEUE_EXIT_TIMEOUT', '10'))
+
+# A child of the 'mentiq' logger, so it goes through app_logging's queue handler
+logger = logging.getLogger('mentiq.write_queue')
+
+
+# Queued by flush(): the writer commits what it has collected without
+# waiting out the rest of the interval
+_FLUSH = object()
+
+
+class WriteQueueFull(Exception):
+    """Raised when the writer has fallen so far behind that the queue stayed full"""
+
+
+class WriteQueue:
+    """Background writer fed by a bounded FIFO of (sql, params) statements.
+
+    submit() returns as soon as the statement is queued. The writer thread
+    takes whatever is queued within `interval_ms` of the first statement,
+    up to `batch_size`, and commits it as one transaction on a connection
+    from `connect()`, so many requests share a single fsync. When the
+    queue holds `max_pending` statements, submit() blocks until the writer
+    catches up. Queued statements are flushed when the process exits, for
+    at most `exit_timeout` seconds. A statement that fails is counted and
+    logged; it never stops the writer.
+    """
+
+    def __init__(self, connect, max_pending=WRITE_QUEUE_MAX_PENDING,
+                 interval_ms=WRITE_QUEUE_INTERVAL_MS, batch_size=WRITE_QUEUE_BATCH_SIZE,
+                 put_timeout=WRITE_QUEUE_PUT_TIMEOUT, exit_timeout=WRITE_QUEUE_EXIT_TIMEOUT):
+        self.connect = connect
+        self.max_pending = max_pending
+        self.interval = interval_ms / 1000.0
+        self.batch_size = batch_size
+        self.put_timeout = put_timeout
+        self.exit_timeout = exit_timeout
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self.blocked = 0
+        self._queue = queue.Queue(maxsize=max(max_pending, 1))
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def _ensure_started(self):
+        # Threads do not survive fork(), so a forked worker starts its own
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._queue = queue.Queue(maxsize=max(self.max_pending, 1))
+                self._pid = os.getpid()
+                self._thread = threading.Thread(
+                    target=self._run, name='sqlite-write-queue', daemon=True
+                )
+                self._thread.start()
+                # Registered once the writer runs (after logging is configured), so the
+                # flush runs at exit before the log listener stops and its warnings
+                # are still written. Only this process's queue is flushed
+                atexit.register(self._flush_at_exit)
+
+    def submit(self, sql, params=()):
+        """Queue one statement for the background writer, waiting while the queue is full"""
+        if self.max_pending <= 0:
+            self._write([(sql, params)])
+            return
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((sql, params))
+        except queue.Full:
+            self.blocked += 1
+            try:
+                self._queue.put((sql, params), timeout=self.put_timeout)
+            except queue.Full:
+                raise WriteQueueFull(
+                    f'{self._queue.qsize()} writes pending for {self.put_timeout:g}s'
+                ) from None
+
+    def flush(self, timeout=None):
+        """Wait until every statement queued so far is committed; False on timeout"""
+        if self._thread is None or self._pid != os.getpid():
+            return True
+        if not self._queue.unfinished_tasks:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            self._queue.put(_FLUSH, timeout=timeout)
+        except queue.Full:
+            return False
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def _flush_at_exit(self):
+        # Bounded, so a stuck writer cannot keep the process from exiting
+        if not self.flush(self.exit_timeout):
+            logger.warning('exiting with background writes not yet committed',
+                           extra={'exit_timeout_s': self.exit_timeout})
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.interval
+        while len(batch) < self.batch_size and batch[-1] is not _FLUSH:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        conn = None
+        try:
+            conn = self.connect()
+            for sql, params in batch:
+                conn.execute(sql, params)
+            conn.commit()
+        except Exception as e:
+            # Not only sqlite3.Error: bad parameters raise e.g. OverflowError
+            if conn is not None:
+                conn.close()  # rolls the transaction back
+                conn = None
+            if len(batch) > 1:
+                # One bad statement must not lose the rest: retry them one by one
+                for statement in batch:
+                    self._write([statement])
+            else:
+                self.failed += 1
+                # The statement, not its parameters: those hold patient data
+                logger.exception('background write failed', extra={'sql': ' '.join(batch[0][0].split())})
+            return
+        finally:
+            if conn is not None:
+                conn.close()
+        self.batches += 1
+        self.written += len(batch)
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            statements = [statement for statement in batch if statement is not _FLUSH]
+            try:
+                if statements:
+                    self._write(statements)
+            except Exception as e:
+                # _write handles statement errors; this keeps the only writer alive
+                # if anything else (e.g. connect()) fails
+                self.failed += len(statements)
+                logger.exception('background write batch failed', extra={'statements': len(statements)})
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def stats(self):
+        return {
+            'pending': self._queue.qsize(),
+            'written': self.written,
+            'batches': self.batches,
+            'failed': self.failed,
+            'blocked': self.blocked,
+        }
@@ -0,0 +1,160 @@
+"""
+Benchmark: appointment status changes and deletes as one conditional statement
+Checks the state machine (every from/to pair, both user types, owners and
+strangers), races conflicting changes to the same appointments from several
+threads, and times set_appointment_status() against the previous
+SELECT / check / UPDATE / commit / SELECT sequence
+
+Usage: python bench_appointment_changes.py [--appointments 2000] [--threads 8]
+"""
+
+import argparse
+import itertools
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+WEBSITE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.environ['MENTIQ_DB_PATH'] = os.path.join(tempfile.mkdtemp(), 'bench_appointment_changes.db')
+sys.path.insert(0, os.path.join(WEBSITE_DIR, 'backend'))
+
+import database
+from database import AppointmentChangeError
+
+DOCTOR, PATIENT, STRANGER = 1, 2, 3
+MINUTES = itertools.count()
+
+
+def book(conn, status='pending', count=1):
+    # One minute apart, so no two bookings hold the same slot
+    ids = []
+    for _ in range(count):
+        minute = next(MINUTES)
+        ids.append(conn.execute(
+            'INSERT INTO appointments (patient_id, doctor_id, appointment_date, appointment_time, status) '
+            'VALUES (?, ?, ?, ?, ?)',
+            (PATIENT, DOCTOR, (date(2026, 1, 1) + timedelta(days=minute // 1440)).isoformat(),
+             f'{minute // 60 % 24:02d}:{minute % 60:02d}', status)
+        ).lastrowid)
+    conn.commit()
+    return ids
+
+
+def attempt(change, *args):
+    try:
+        return change(*args)['status'], 200
+    except AppointmentChangeError as e:
+        return str(e), e.status_code
+
+
+def check_state_machine(conn):
+    targets = database.APPOINTMENT_STATUSES + ('deleted',)
+    for source in database.APPOINTMENT_STATUSES:
+        for target in targets:
+            for user_type, user_id in [('doctor', DOCTOR), ('patient', PATIENT)]:
+                allowed = user_type in database.APPOINTMENT_TRANSITIONS.get((source, target), ())
+                for owner in [True, False]:
+                    [appointment_id] = book(conn, source)
+                    uid = user_id if owner else STRANGER
+                    if target == 'deleted':
+                        result, code = attempt(database.remove_appointment, appointment_id, uid, user_type)
+                    else:
+                        result, code = attempt(database.set_appointment_status, appointment_id, uid, user_type, target)
+                    expected = (200 if allowed else 400) if owner else 403
+                    assert code == expected, (source, target, user_type, owner, result, code)
+                    row = conn.execute('SELECT status FROM appointments WHERE id = ?', (appointment_id,)).fetchone()
+                    final = 'deleted' if row is None else row['status']
+                    assert final == (target if code == 200 else source), (source, target, user_type, owner, final)
+    assert attempt(database.set_appointment_status, 10 ** 9, DOCTOR, 'doctor', 'confirmed')[1] == 404
+    assert attempt(database.set_appointment_status, book(conn)[0], DOCTOR, 'doctor', 'unknown')[1] == 400
+    assert attempt(database.remove_appointment, book(conn)[0], DOCTOR, 'admin')[1] == 403
+
+
+def race(conn, change, count, threads):
+    """Doctors confirming and patients cancelling the same pending appointments at once.
+
+    Returns how many appointments more than one change succeeded on.
+    """
+    ids = book(conn, count=count)
+    wins = {}
+    lock = threading.Lock()
+    barrier = threading.Barrier(threads)
+
+    def worker(index):
+        barrier.wait()
+        for appointment_id in ids:
+            if index % 2:
+                result, code = attempt(change, appointment_id, DOCTOR, 'doctor', 'confirmed')
+            else:
+                result, code = attempt(change, appointment_id, PATIENT, 'patient', 'cancelled')
+            if code == 200:
+                with lock:
+                    wins.setdefault(appointment_id, []).append(result)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return sum(len(wins.get(appointment_id, [])) > 1 for appointment_id in ids)
+
+
+def previous_update(appointment_id, user_id, user_type, new_status):
+    """The handler's old sequence (read, check in Python, update, commit, read
+    again), checking the same APPOINTMENT_TRANSITIONS rules"""
+    conn = database.get_db_connection()
+    appointment = dict(conn.execute('SELECT * FROM appointments WHERE id = ?', (appointment_id,)).fetchone())
+    if appointment[database.APPOINTMENT_OWNER_COLUMNS[user_type]] != user_id:
+        conn.close()
+        raise AppointmentChangeError('Unauthorized', 403)
+    if user_type not in database.APPOINTMENT_TRANSITIONS.get((appointment['status'], new_status), ()):
+        conn.close()
+        raise AppointmentChangeError(database.transition_error(appointment['status'], new_status), 400)
+    conn.execute('UPDATE appointments SET status = ? WHERE id = ?', (new_status, appointment_id))
+    conn.commit()
+    status = conn.execute('SELECT status FROM appointments WHERE id = ?', (appointment_id,)).fetchone()['status']
+    conn.close()
+    return {'status': status}
+
+
+def timed(change, conn, count):
+    ids = book(conn, count=count)
+    start = time.perf_counter()
+    for appointment_id in ids:
+        change(appointment_id, DOCTOR, 'doctor', 'confirmed')
+    return (time.perf_counter() - start) / count * 1e6
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--appointments', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    database.init_db()
+    conn = database.get_db_connection()
+    conn.executemany(
+        "INSERT INTO users (id, email, password_hash, name, user_type) VALUES (?, ?, 'x', ?, ?)",
+        [(DOCTOR, 'doctor@example.com', 'Doctor', 'doctor'), (PATIENT, 'patient@example.com', 'Patient', 'patient'),
+         (STRANGER, 'other@example.com', 'Other', 'patient')]
+    )
+    conn.commit()
+
+    check_state_machine(conn)
+    print("✅ Every transition is allowed or refused as APPOINTMENT_TRANSITIONS says")
+    count = args.appointments // 4
+    print(f"{args.threads} threads racing to confirm and cancel {count} appointments:")
+    print(f"  SELECT, check, UPDATE: {race(conn, previous_update, count, args.threads)} appointments changed twice")
+    conflicts = race(conn, database.set_appointment_status, count, args.threads)
+    print(f"  conditional UPDATE:    {conflicts} appointments changed twice")
+    assert conflicts == 0
+    assert database.check_doctor_stats(repair=False) == []
+    print("✅ doctor_appointment_stats still matches")
+
+    print(f"\n{'status change':<34} {'per call':>10}")
+    print(f"{'SELECT, check, UPDATE, SELECT':<34} {timed(previous_update, conn, args.appointments):8.1f}us")
+    print(f"{'conditional UPDATE ... RETURNING':<34} {timed(database.set_appointment_status, conn, args.appointments):8.1f}us")
+    conn.close()
@@ -0,0 +1,133 @@
+"""
+Benchmark: async API (asgi.py) vs the synchronous Flask app (wsgi.py)
+Runs each under gunicorn with one worker while some clients hammer
+/api/auth/login (slow password hashing) and others read /api/articles and
+/api/doctors, and reports how fast reads stay during the login burst
+
+Usage: python bench_async.py [--logins 8] [--readers 8] [--seconds 10]
+"""
+
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+WEBSITE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HOST = '127.0.0.1'
+PORT = 5078
+
+SERVERS = {
+    'sync (wsgi.py, gthread)': ['wsgi:app'],
+    'async (asgi.py, uvicorn)': ['-k', 'uvicorn_worker.UvicornWorker', 'asgi:app'],
+}
+READ_PATHS = ['/api/articles', '/api/doctors', '/api/doctors?country=USA']
+
+
+def call(conn, method, path, body=None):
+    conn.request(method, path, body=json.dumps(body) if body is not None else None,
+                 headers={'Content-Type': 'application/json'})
+    response = conn.getresponse()
+    response.read()
+    return response.status
+
+
+def client(kind, deadline, results):
+    conn = http.client.HTTPConnection(HOST, PORT, timeout=60)
+    credentials = {'email': 'bench@example.com', 'password': 'password123'}
+    latencies = []
+    errors = 0
+    i = 0
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        try:
+            if kind == 'login':
+                status = call(conn, 'POST', '/api/auth/login', credentials)
+            else:
+                status = call(conn, 'GET', READ_PATHS[i % len(READ_PATHS)])
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            conn = http.client.HTTPConnection(HOST, PORT, timeout=60)
+            status = None
+        latencies.append(time.perf_counter() - start)
+        errors += status != 200
+        i += 1
+    results.put((kind, latencies, errors))
+
+
+def wait_until_up(timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection(HOST, PORT, timeout=1)
+            conn.request('GET', '/api/health')
+            conn.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError('server did not start')
+
+
+def percentile(values, q):
+    return values[min(int(len(values) * q), len(values) - 1)] * 1000 if values else 0
+
+
+def run(server_args, args):
+    env = dict(os.environ,
+               MENTIQ_DB_PATH=os.path.join(tempfile.mkdtemp(), 'bench_async.db'),
+               WEB_CONCURRENCY='1', WEB_THREADS=str(args.threads), BIND=f'{HOST}:{PORT}',
+               LOG_LEVEL='WARNING')
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', *server_args],
+        cwd=WEBSITE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_until_up()
+        conn = http.client.HTTPConnection(HOST, PORT)
+        call(conn, 'POST', '/api/auth/register', {
+            'email': 'bench@example.com', 'password': 'password123',
+            'name': 'Bench', 'user_type': 'patient'
+        })
+        results = multiprocessing.Queue()
+        deadline = time.monotonic() + args.seconds
+        clients = [multiprocessing.Process(target=client, args=('login', deadline, results))
+                   for _ in range(args.logins)]
+        clients += [multiprocessing.Process(target=client, args=('read', deadline, results))
+                    for _ in range(args.readers)]
+        for c in clients:
+            c.start()
+        collected = [results.get() for _ in clients]
+        for c in clients:
+            c.join()
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait()
+
+    summary = {}
+    for kind in ('read', 'login'):
+        latencies = sorted(l for k, ls, _ in collected if k == kind for l in ls)
+        errors = sum(e for k, _, e in collected if k == kind)
+        summary[kind] = (len(latencies) / args.seconds, percentile(latencies, 0.5),
+                         percentile(latencies, 0.99), errors)
+    return summary
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--logins', type=int, default=8, help='clients logging in continuously')
+    parser.add_argument('--readers', type=int, default=8, help='clients reading articles/doctors')
+    parser.add_argument('--threads', type=int, default=4, help='threads of the sync worker')
+    parser.add_argument('--seconds', type=float, default=10)
+    args = parser.parse_args()
+
+    print(f"{args.logins} login clients + {args.readers} read clients, {args.seconds:g}s, 1 worker")
+    print(f"{'server':<26} {'':<6} {'req/s':>8} {'p50':>10} {'p99':>10} {'errors':>7}")
+    for label, server_args in SERVERS.items():
+        summary = run(server_args, args)
+        for kind, (rps, p50, p99, errors) in summary.items():
+            print(f"{label:<26} {kind:<6} {rps:8.0f} {p50:8.1f}ms {p99:8.1f}ms {errors:>7}")
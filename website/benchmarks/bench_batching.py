@@ -0,0 +1,76 @@
+"""
+Load test: micro-batching on vs off
+Concurrent threads score single rows and report throughput and p50/p99 latency
+
+Usage: python bench_batching.py [--threads 16] [--requests 200] [--window-ms 2]
+                                [--max-batch 32] [--sklearn]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+from inference import BASE_DIR, FEATURE_COLUMNS, load_pipeline, load_scorer, predict_risk
+from batching import MicroBatcher
+
+DATA_PATH = os.path.join(BASE_DIR, 'mental_health_data_v2.csv')
+
+
+def load_test(model, records, threads, requests_per_thread):
+    latencies = [[] for _ in range(threads)]
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(index):
+        barrier.wait()
+        for i in range(requests_per_thread):
+            row = records[(index * requests_per_thread + i) % len(records)]
+            start = time.perf_counter()
+            predict_risk(model, row)
+            latencies[index].append(time.perf_counter() - start)
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for t in pool:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    all_latencies = np.concatenate([np.asarray(l) for l in latencies]) * 1000
+    return {
+        'throughput': len(all_latencies) / elapsed,
+        'p50': np.percentile(all_latencies, 50),
+        'p99': np.percentile(all_latencies, 99)
+    }
+
+
+def report(label, stats):
+    print(f"{label:<22} {stats['throughput']:10.0f} req/s   "
+          f"p50 {stats['p50']:7.3f} ms   p99 {stats['p99']:7.3f} ms")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=200, help='requests per thread')
+    parser.add_argument('--window-ms', type=float, default=2.0)
+    parser.add_argument('--max-batch', type=int, default=32)
+    parser.add_argument('--sklearn', action='store_true',
+                        help='score through the sklearn pipeline instead of the compiled scorer')
+    args = parser.parse_args()
+
+    pipeline = load_pipeline()
+    model = pipeline if args.sklearn else load_scorer(pipeline)
+    records = pd.read_csv(DATA_PATH, usecols=FEATURE_COLUMNS, nrows=5000)[FEATURE_COLUMNS].to_dict('records')
+
+    report('batching off', load_test(model, records, args.threads, args.requests))
+    batcher = MicroBatcher(model, window_ms=args.window_ms, max_batch_size=args.max_batch)
+    report(f'batching on ({args.window_ms:g} ms)', load_test(batcher, records, args.threads, args.requests))
+    print(f"average batch size: {batcher.rows / max(batcher.batches, 1):.1f}")
@@ -0,0 +1,111 @@
+"""
+Benchmark: time to first byte of /api/chatbot vs /api/chatbot/stream
+Runs the app under gunicorn on a scratch database while another process
+periodically holds the SQLite write lock (as a batch import would), and
+times logged-in chat requests to their first byte and to completion
+
+Usage: python bench_chatbot_stream.py [--requests 200] [--hold-ms 20]
+"""
+
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import signal
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+WEBSITE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HOST = '127.0.0.1'
+PORT = 5079
+MESSAGES = ['I feel sad and hopeless', 'Work has me so stressed', 'hello', 'I cannot sleep, nightmares']
+
+
+def wait_until_up(timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection(HOST, PORT, timeout=1)
+            conn.request('GET', '/api/health')
+            conn.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError('server did not start')
+
+
+def hold_write_lock(db_path, hold_ms, stop):
+    """Take the write lock for `hold_ms` out of every 2 * `hold_ms`"""
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    while not stop.is_set():
+        conn.execute('BEGIN IMMEDIATE')
+        time.sleep(hold_ms / 1000)
+        conn.execute('COMMIT')
+        time.sleep(hold_ms / 1000)
+
+
+def chat(conn, path, message, cookie):
+    start = time.perf_counter()
+    conn.request('POST', path, body=json.dumps({'message': message}),
+                 headers={'Content-Type': 'application/json', 'Cookie': cookie})
+    response = conn.getresponse()
+    response.read(1)
+    first_byte = time.perf_counter() - start
+    response.read()
+    return first_byte, time.perf_counter() - start, response.status
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(int(len(values) * q), len(values) - 1)] * 1000
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--hold-ms', type=float, default=20, help='write lock held by the other writer')
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench_chatbot_stream.db')
+    env = dict(os.environ, MENTIQ_DB_PATH=db_path, WEB_CONCURRENCY='1', BIND=f'{HOST}:{PORT}',
+               LOG_LEVEL='WARNING')
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+        cwd=WEBSITE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    stop = multiprocessing.Event()
+    writer = None
+    try:
+        wait_until_up()
+        conn = http.client.HTTPConnection(HOST, PORT, timeout=60)
+        conn.request('POST', '/api/auth/register', body=json.dumps({
+            'email': 'chat@example.com', 'password': 'password123', 'name': 'Chat', 'user_type': 'patient'
+        }), headers={'Content-Type': 'application/json'})
+        response = conn.getresponse()
+        response.read()
+        cookie = response.getheader('Set-Cookie', '').split(';')[0]
+
+        if args.hold_ms > 0:
+            writer = multiprocessing.Process(target=hold_write_lock, args=(db_path, args.hold_ms, stop))
+            writer.start()
+
+        print(f"{args.requests} logged-in chat requests, other writer holds the lock "
+              f"{args.hold_ms:g}ms of every {2 * args.hold_ms:g}ms")
+        print(f"{'endpoint':<22} {'TTFB p50':>10} {'TTFB p99':>10} {'total p50':>10} {'errors':>7}")
+        for path in ['/api/chatbot', '/api/chatbot/stream']:
+            results = [chat(conn, path, MESSAGES[i % len(MESSAGES)], cookie) for i in range(args.requests)]
+            first_bytes = [r[0] for r in results]
+            totals = [r[1] for r in results]
+            errors = sum(r[2] != 200 for r in results)
+            print(f"{path:<22} {percentile(first_bytes, 0.5):8.2f}ms {percentile(first_bytes, 0.99):8.2f}ms "
+                  f"{percentile(totals, 0.5):8.2f}ms {errors:>7}")
+    finally:
+        stop.set()
+        if writer is not None:
+            writer.join()
+        server.send_signal(signal.SIGTERM)
+        server.wait()
@@ -0,0 +1,61 @@
+"""
+Benchmark: precomputed chatbot score table vs live scoring
+Checks every entry of the table built at model load against predict_risk on
+the sklearn pipeline and the compiled scorer, then times a chatbot reply's
+feature extraction + lookup against extraction + live scoring
+"""
+
+import math
+import os
+import random
+import sys
+import time
+
+WEBSITE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, WEBSITE_DIR)
+sys.path.insert(0, os.path.join(WEBSITE_DIR, 'backend'))
+
+from chatbot import MASK_COUNT, build_score_table, extract_features_from_message, feature_mask, features_from_mask
+from inference import MODEL_PATH, load_pipeline, load_scorer, predict_risk
+
+REQUESTS = 20000
+WORDS = ['stressed', 'anxious', 'hopeless', 'alone', 'nightmares', 'focus', 'sad', 'tired', 'work', 'family']
+
+
+def check(table, model):
+    """Largest probability difference; labels and risk bands must match exactly"""
+    worst = 0.0
+    for mask in range(MASK_COUNT):
+        expected = predict_risk(model, features_from_mask(mask))
+        entry = table[mask]
+        assert entry['prediction'] == expected['prediction'], f'label differs for mask {mask:#x}'
+        assert entry['risk_level'] == expected['risk_level'], f'risk level differs for mask {mask:#x}'
+        worst = max(worst, abs(entry['probability'] - expected['probability']))
+    return worst
+
+
+def timed(reply, messages):
+    start = time.perf_counter()
+    for message in messages:
+        reply(message)
+    return (time.perf_counter() - start) / len(messages) * 1e6
+
+
+if __name__ == '__main__':
+    pipeline = load_pipeline(MODEL_PATH)
+    scorer = load_scorer(pipeline)
+
+    start = time.perf_counter()
+    table = build_score_table(scorer)
+    print(f"{MASK_COUNT} entries built in {(time.perf_counter() - start) * 1000:.1f}ms")
+    for label, model in [('compiled scorer', scorer), ('sklearn pipeline', pipeline)]:
+        worst = check(table, model)
+        assert math.isclose(worst, 0, abs_tol=1e-9), f'{label} differs by {worst}'
+        print(f"  matches {label:<17} max |dp| {worst:.2e}")
+
+    random.seed(0)
+    messages = [f"Lately I feel {' and '.join(random.sample(WORDS, random.randint(1, 4)))}"
+                for _ in range(REQUESTS)]
+    live_us = timed(lambda m: predict_risk(scorer, extract_features_from_message(m)), messages)
+    table_us = timed(lambda m: table[feature_mask(m)], messages)
+    print(f"{REQUESTS} chatbot messages: live {live_us:.1f}us  table {table_us:.1f}us per reply")
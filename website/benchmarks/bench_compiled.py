@@ -0,0 +1,48 @@
+"""
+Benchmark: compiled scorer vs sklearn pipeline
+Checks bit-for-bit equality over the full dataset, then times single-request scoring
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+from inference import BASE_DIR, FEATURE_COLUMNS, load_pipeline, predict_risk
+from compiled_scorer import compile_pipeline
+
+DATA_PATH = os.path.join(BASE_DIR, 'mental_health_data_v2.csv')
+REQUESTS = 2000
+
+
+def check_equal(label, expected, actual):
+    if not np.array_equal(expected, actual):
+        mismatches = int(np.sum(np.any(expected != actual, axis=1)))
+        raise SystemExit(f"❌ {label}: {mismatches} rows differ from sklearn")
+    print(f"✅ {label}: {len(expected)} rows bit-for-bit identical")
+
+
+if __name__ == '__main__':
+    pipeline = load_pipeline()
+    scorer = compile_pipeline(pipeline)
+    df = pd.read_csv(DATA_PATH, usecols=FEATURE_COLUMNS)[FEATURE_COLUMNS]
+
+    expected = pipeline.predict_proba(df)
+    check_equal('DataFrame path', expected, scorer.predict_proba(df))
+
+    records = df.to_dict('records')
+    check_equal('dict path', expected, np.vstack([scorer.predict_proba(row) for row in records]))
+
+    sample = records[:REQUESTS]
+    for label, model, inputs in [
+        ('sklearn', pipeline, [df.iloc[[i]] for i in range(REQUESTS)]),
+        ('compiled', scorer, sample),
+    ]:
+        start = time.perf_counter()
+        for row in inputs:
+            predict_risk(model, row)
+        elapsed = time.perf_counter() - start
+        print(f"{label:<10} {elapsed / REQUESTS * 1e6:10.1f} us/request")
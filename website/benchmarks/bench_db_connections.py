@@ -0,0 +1,68 @@
+"""
+Benchmark: pooled request-scoped connections vs connect-per-call
+Times /api/auth/login and /api/profile/appointments against a scratch database
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+WEBSITE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.environ['MENTIQ_DB_PATH'] = os.path.join(tempfile.mkdtemp(), 'bench.db')
+sys.path.insert(0, WEBSITE_DIR)
+sys.path.insert(0, os.path.join(WEBSITE_DIR, 'backend'))
+
+import database
+from app import app
+
+REQUESTS = 200
+APPOINTMENTS = 200
+
+
+def setup():
+    database.init_db()
+    client = app.test_client()
+    client.post('/api/auth/register', json={
+        'email': 'doctor@example.com', 'password': 'password123',
+        'name': 'Dr. Bench', 'user_type': 'doctor', 'specialty': 'Psychiatrist'
+    })
+    doctor_id = database.get_user_by_email('doctor@example.com')['id']
+    patient_id = database.create_user('patient@example.com', 'password123', 'Patient', 'patient')
+    conn = database.get_db_connection()
+    conn.executemany('''
+        INSERT INTO appointments (patient_id, doctor_id, appointment_date, appointment_time, status)
+        VALUES (?, ?, ?, ?, 'pending')
+    ''', [(patient_id, doctor_id, f'2026-{1 + i // 8 // 28 % 12:02d}-{1 + i // 8 % 28:02d}', f'{9 + i % 8:02d}:00')
+          for i in range(APPOINTMENTS)])
+    conn.commit()
+    conn.close()
+    return client
+
+
+def timed(client, method, url, **kwargs):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(REQUESTS):
+            getattr(client, method)(url, **kwargs)
+    return (time.perf_counter() - start) / REQUESTS * 1000
+
+
+if __name__ == '__main__':
+    client = setup()
+    login = {'email': 'doctor@example.com', 'password': 'password123'}
+    results = {}
+    for label, size in [('connect-per-call', 0), ('pooled', database.DB_POOL_SIZE)]:
+        database.configure_pool(size)
+        results[label] = (
+            timed(client, 'post', '/api/auth/login', json=login),
+            timed(client, 'get', '/api/profile/appointments'),
+        )
+
+    print(f"{'':<18} {'login':>10} {'appointments':>14}")
+    for label, (login_ms, appointments_ms) in results.items():
+        print(f"{label:<18} {login_ms:8.3f}ms {appointments_ms:12.3f}ms")
+    saved = [a - b for a, b in zip(results['connect-per-call'], results['pooled'])]
+    print(f"{'saved/request':<18} {saved[0]:8.3f}ms {saved[1]:12.3f}ms")
@@ -0,0 +1,167 @@
+"""
+Benchmark: doctor dashboard counts from doctor_appointment_stats vs the full list
+Generates a scratch database, runs a random mix of bookings, status changes,
+reassignments and deletes, checks the trigger-maintained counters against a
+fresh count, then times get_doctor_stats() against counting every row of the
+doctor's appointment list as the dashboard used to, and the triggers' cost per write
+
+Usage: python bench_doctor_stats.py [--appointments 500000] [--changes 20000]
+       python bench_doctor_stats.py --check   (check and rebuild MENTIQ_DB_PATH's counters)
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+WEBSITE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if '--check' not in sys.argv:
+    os.environ['MENTIQ_DB_PATH'] = os.path.join(tempfile.mkdtemp(), 'bench_doctor_stats.db')
+sys.path.insert(0, os.path.join(WEBSITE_DIR, 'backend'))
+
+import database
+
+DOCTORS = 200
+PATIENTS = 20000
+STATUSES = ['pending', 'confirmed', 'cancelled', 'completed']
+REPEAT = 50
+
+
+def random_appointment():
+    return (random.randint(DOCTORS + 1, DOCTORS + PATIENTS), random.randint(1, DOCTORS),
+            f'2026-{random.randint(1, 12):02d}-{random.randint(1, 28):02d}',
+            f'{random.randint(9, 17):02d}:{random.randint(0, 59):02d}',
+            random.choice(STATUSES))
+
+
+def insert_appointments(conn, count):
+    # OR IGNORE: a generated row that lands on an active slot is skipped by the unique index
+    conn.executemany(
+        'INSERT OR IGNORE INTO appointments (patient_id, doctor_id, appointment_date, appointment_time, status) '
+        'VALUES (?, ?, ?, ?, ?)',
+        (random_appointment() for _ in range(count))
+    )
+    conn.commit()
+
+
+def generate(conn, appointments):
+    conn.execute('PRAGMA synchronous = OFF')
+    conn.executemany(
+        "INSERT INTO users (id, email, password_hash, name, user_type) VALUES (?, ?, 'x', ?, ?)",
+        ((i, f'user{i}@example.com', f'User {i}', 'doctor' if i <= DOCTORS else 'patient')
+         for i in range(1, DOCTORS + PATIENTS + 1))
+    )
+    insert_appointments(conn, appointments)
+
+
+def random_changes(conn, count):
+    """The writes the API makes: bookings, status updates and deletes, plus reassignments"""
+    max_id = conn.execute('SELECT MAX(id) FROM appointments').fetchone()[0]
+    for _ in range(count):
+        kind = random.random()
+        if kind < 0.3:
+            conn.execute(
+                'INSERT OR IGNORE INTO appointments (patient_id, doctor_id, appointment_date, appointment_time, status) '
+                'VALUES (?, ?, ?, ?, ?)', random_appointment()
+            )
+        elif kind < 0.8:
+            conn.execute('UPDATE OR IGNORE appointments SET status = ? WHERE id = ?',
+                         (random.choice(STATUSES), random.randint(1, max_id)))
+        elif kind < 0.9:
+            conn.execute('UPDATE OR IGNORE appointments SET doctor_id = ? WHERE id = ?',
+                         (random.choice([random.randint(1, DOCTORS), None, 'unknown']), random.randint(1, max_id)))
+        else:
+            conn.execute('DELETE FROM appointments WHERE id = ?', (random.randint(1, max_id),))
+    conn.commit()
+
+
+def count_from_list(doctor_id, day):
+    """What the dashboard computed before: every appointment, counted in the client"""
+    appointments, _ = database.list_user_appointments(doctor_id, 'doctor', limit=10 ** 9)
+    return {
+        'total': len(appointments),
+        'today': sum(a['appointment_date'] == day for a in appointments),
+        'pending': sum(a['status'] == 'pending' for a in appointments),
+        'completed': sum(a['status'] == 'completed' for a in appointments),
+    }
+
+
+def timed(fn):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        fn(random.randint(1, DOCTORS), '2026-06-15')
+    return (time.perf_counter() - start) / REPEAT * 1000
+
+
+def run_check():
+    database.init_db()
+    start = time.perf_counter()
+    mismatched = database.check_doctor_stats(repair=True)
+    elapsed = time.perf_counter() - start
+    if mismatched:
+        print(f"⚠️ Rebuilt doctor_appointment_stats: {len(mismatched)} doctors were off "
+              f"({', '.join(map(str, mismatched[:20]))}) in {elapsed:.2f}s")
+    else:
+        print(f"✅ doctor_appointment_stats matches the appointments table ({elapsed:.2f}s)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--appointments', type=int, default=500000)
+    parser.add_argument('--changes', type=int, default=20000)
+    parser.add_argument('--check', action='store_true', help='check (and rebuild) the configured database instead')
+    args = parser.parse_args()
+
+    if args.check:
+        run_check()
+        sys.exit(0)
+
+    random.seed(0)
+    database.init_db()
+    conn = database.get_db_connection()
+    start = time.perf_counter()
+    generate(conn, args.appointments)
+    print(f"Generated {args.appointments:,} appointments for {DOCTORS} doctors "
+          f"in {time.perf_counter() - start:.1f}s")
+
+    random_changes(conn, args.changes)
+    mismatched = database.check_doctor_stats(repair=False)
+    assert not mismatched, f'counters drifted for doctors {mismatched[:20]}'
+    print(f"✅ Counters match a fresh count after {args.changes:,} random changes")
+
+    # A corrupted counter is found and the table rebuilt
+    conn.execute('UPDATE doctor_appointment_stats SET pending = pending + 1 WHERE doctor_id = 1')
+    conn.commit()
+    assert database.check_doctor_stats() == [1]
+    assert database.check_doctor_stats(repair=False) == []
+    print("✅ Consistency check found a corrupted row and rebuilt the table")
+
+    for doctor_id in range(1, DOCTORS + 1, 37):
+        stats = database.get_doctor_stats(doctor_id, '2026-06-15')
+        expected = count_from_list(doctor_id, '2026-06-15')
+        assert all(stats[key] == value for key, value in expected.items()), (doctor_id, stats, expected)
+
+    # Write cost of the triggers: the same inserts with and without them
+    triggers = conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'appointments_stats_%'"
+    ).fetchall()
+    start = time.perf_counter()
+    insert_appointments(conn, 20000)
+    with_triggers = (time.perf_counter() - start) / 20000 * 1e6
+    for name, _ in triggers:
+        conn.execute(f'DROP TRIGGER {name}')
+    start = time.perf_counter()
+    insert_appointments(conn, 20000)
+    without_triggers = (time.perf_counter() - start) / 20000 * 1e6
+    for _, sql in triggers:
+        conn.execute(sql)
+    database.check_doctor_stats()
+    conn.close()
+
+    per_doctor = args.appointments // DOCTORS
+    print(f"\n{'dashboard counts':<28} {'per request':>12}  (~{per_doctor:,} appointments per doctor)")
+    print(f"{'full list, counted':<28} {timed(count_from_list):10.3f}ms")
+    print(f"{'doctor_appointment_stats':<28} {timed(database.get_doctor_stats):10.3f}ms")
+    print(f"\ninsert cost: {without_triggers:.1f}us without triggers, {with_triggers:.1f}us with")
@@ -0,0 +1,195 @@
+"""
+Benchmark: hot queries with and without the migration indexes
+Generates a large scratch database, prints each hot query's plan and times
+it before and after migrations 1, 4 and 7 add the indexes. The plans of the
+SQL the endpoints actually run are checked by tests/test_query_plans.py
+
+Usage: python bench_indexes.py [--appointments 2000000] [--assessments 2000000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+WEBSITE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.environ['MENTIQ_DB_PATH'] = os.path.join(tempfile.mkdtemp(), 'bench_indexes.db')
+sys.path.insert(0, os.path.join(WEBSITE_DIR, 'backend'))
+
+import database
+import migrations
+
+DOCTORS = 10000
+PATIENTS = 100000
+COUNTRIES = ['Egypt', 'USA', 'UK', 'Germany', 'India', 'Brazil', 'Canada', 'France']
+SPECIALTIES = ['Psychiatrist', 'Psychologist', 'Clinical Psychologist', 'Counselor', 'Therapist']
+REPEAT = 20
+
+# Hot queries of the API endpoints, as database.py issues them
+HOT_QUERIES = {
+    'doctor appointments': ('''
+        SELECT a.*, u.name as patient_name, u.email as patient_email
+        FROM appointments a
+        JOIN users u ON a.patient_id = u.id
+        WHERE a.doctor_id = ?
+        ORDER BY a.appointment_date DESC, a.appointment_time DESC, a.id DESC LIMIT 51
+    ''', lambda: (random.randint(1, DOCTORS),)),
+    'doctor appointments (later page)': ('''
+        SELECT a.*, u.name as patient_name, u.email as patient_email
+        FROM appointments a
+        JOIN users u ON a.patient_id = u.id
+        WHERE a.doctor_id = ? AND a.status IN (?)
+          AND (a.appointment_date, a.appointment_time, a.id) < (?, ?, ?)
+        ORDER BY a.appointment_date DESC, a.appointment_time DESC, a.id DESC LIMIT 51
+    ''', lambda: (random.randint(1, DOCTORS), 'pending', '2026-06-15', '12:00', 10 ** 9)),
+    'patient appointments': ('''
+        SELECT a.*, d.name as doctor_name, d.specialty, d.city, d.country,
+               u.name as doctor_user_name
+        FROM appointments a
+        LEFT JOIN doctors d ON a.doctor_id = d.user_id
+        LEFT JOIN users u ON a.doctor_id = u.id
+        WHERE a.patient_id = ?
+        ORDER BY a.appointment_date DESC, a.appointment_time DESC, a.id DESC LIMIT 51
+    ''', lambda: (random.randint(DOCTORS + 1, DOCTORS + PATIENTS),)),
+    'doctor stats': ('''
+        SELECT * FROM doctor_appointment_stats WHERE doctor_id = ?
+    ''', lambda: (random.randint(1, DOCTORS),)),
+    'doctor appointments on a day': ('''
+        SELECT COUNT(*) FROM appointments WHERE doctor_id = ? AND appointment_date = ?
+    ''', lambda: (random.randint(1, DOCTORS), '2026-06-15')),
+    'doctor availability (week)': ('''
+        SELECT appointment_date, appointment_time FROM appointments
+        WHERE doctor_id = ? AND appointment_date BETWEEN ? AND ?
+          AND status IN ('pending', 'confirmed')
+    ''', lambda: (random.randint(1, DOCTORS), '2026-06-01', '2026-06-07')),
+    'latest assessment': ('''
+        SELECT * FROM assessments WHERE user_id = ? ORDER BY created_at DESC LIMIT 1
+    ''', lambda: (random.randint(DOCTORS + 1, DOCTORS + PATIENTS),)),
+    'doctor by user_id': ('''
+        SELECT user_id FROM doctors WHERE user_id = ?
+    ''', lambda: (random.randint(1, DOCTORS),)),
+    'doctors (all)': ('''
+        SELECT * FROM doctors WHERE 1=1 ORDER BY rating DESC, experience_years DESC
+    ''', lambda: ()),
+    'doctors (country)': ('''
+        SELECT * FROM doctors WHERE 1=1 AND country = ? ORDER BY rating DESC, experience_years DESC
+    ''', lambda: (random.choice(COUNTRIES),)),
+    'doctors (country+city)': ('''
+        SELECT * FROM doctors WHERE 1=1 AND country = ? AND city = ?
+        ORDER BY rating DESC, experience_years DESC
+    ''', lambda: ('Egypt', f'City {random.randint(0, 199)}')),
+    'doctors (specialty)': ('''
+        SELECT * FROM doctors WHERE 1=1 AND specialty = ? ORDER BY rating DESC, experience_years DESC
+    ''', lambda: (random.choice(SPECIALTIES),)),
+    'articles (category)': ('''
+        SELECT * FROM articles WHERE category = ? ORDER BY created_at DESC
+    ''', lambda: ('Depression',)),
+    'articles (all)': ('''
+        SELECT * FROM articles ORDER BY created_at DESC
+    ''', lambda: ()),
+}
+
+
+def generate(conn, appointments, assessments):
+    conn.execute('PRAGMA synchronous = OFF')
+    conn.executemany(
+        "INSERT INTO users (id, email, password_hash, name, user_type) VALUES (?, ?, 'x', ?, ?)",
+        ((i, f'user{i}@example.com', f'User {i}', 'doctor' if i <= DOCTORS else 'patient')
+         for i in range(1, DOCTORS + PATIENTS + 1))
+    )
+    conn.executemany(
+        'INSERT INTO doctors (user_id, name, specialty, country, city, experience_years, rating) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?)',
+        ((i, f'Dr. {i}', random.choice(SPECIALTIES), random.choice(COUNTRIES),
+          f'City {random.randint(0, 199)}', random.randint(0, 40), round(random.uniform(3, 5), 1))
+         for i in range(1, DOCTORS + 1))
+    )
+    # OR IGNORE: a generated row that lands on an active slot is skipped by the unique index
+    conn.executemany(
+        'INSERT OR IGNORE INTO appointments (patient_id, doctor_id, appointment_date, appointment_time, status) '
+        'VALUES (?, ?, ?, ?, ?)',
+        ((random.randint(DOCTORS + 1, DOCTORS + PATIENTS), random.randint(1, DOCTORS),
+          f'2026-{random.randint(1, 12):02d}-{random.randint(1, 28):02d}', f'{random.randint(9, 17):02d}:00',
+          random.choice(['pending', 'confirmed', 'completed']))
+         for _ in range(appointments))
+    )
+    conn.executemany(
+        'INSERT INTO assessments (user_id, age, gender, risk_score, risk_level, created_at) '
+        "VALUES (?, 30, 'Other', ?, 'Low', ?)",
+        ((random.randint(DOCTORS + 1, DOCTORS + PATIENTS), random.randint(0, 100),
+          f'2026-{random.randint(1, 12):02d}-{random.randint(1, 28):02d}T10:00:00')
+         for _ in range(assessments))
+    )
+    conn.commit()
+
+
+def drop_indexes(conn):
+    for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%'").fetchall():
+        conn.execute(f'DROP INDEX {name}')
+    conn.execute('DROP TABLE IF EXISTS sqlite_stat1')
+    conn.commit()
+
+
+def time_queries(conn):
+    results = {}
+    for label, (sql, params) in HOT_QUERIES.items():
+        start = time.perf_counter()
+        for _ in range(REPEAT):
+            conn.execute(sql, params()).fetchall()
+        results[label] = (time.perf_counter() - start) / REPEAT * 1000
+    return results
+
+
+def check_plans(conn):
+    """Every hot query must be answered from indexes without sorting"""
+    failures = []
+    for label, (sql, params) in HOT_QUERIES.items():
+        details = [row[3] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql, params())]
+        for detail in details:
+            full_scan = detail.startswith('SCAN') and 'INDEX' not in detail
+            if full_scan or 'TEMP B-TREE' in detail:
+                failures.append(f'{label}: {detail}')
+        print(f"  {label:<34} {' | '.join(details)}")
+    return failures
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--appointments', type=int, default=2000000)
+    parser.add_argument('--assessments', type=int, default=2000000)
+    args = parser.parse_args()
+
+    database.init_db()
+    conn = database.get_db_connection()
+    start = time.perf_counter()
+    generate(conn, args.appointments, args.assessments)
+    print(f"Generated {args.appointments:,} appointments and {args.assessments:,} assessments "
+          f"in {time.perf_counter() - start:.1f}s")
+
+    drop_indexes(conn)
+    before = time_queries(conn)
+    start = time.perf_counter()
+    migrations.add_hot_query_indexes(conn)
+    migrations.add_doctor_slot_index(conn)
+    migrations.add_article_date_index(conn)
+    conn.execute('ANALYZE')
+    conn.commit()
+    print(f"Migrations 1, 4 and 7 built indexes in {time.perf_counter() - start:.1f}s")
+    after = time_queries(conn)
+
+    print("\nEXPLAIN QUERY PLAN:")
+    failures = check_plans(conn)
+
+    print(f"\n{'query':<34} {'no index':>12} {'indexed':>12}")
+    for label in HOT_QUERIES:
+        print(f"{label:<34} {before[label]:10.3f}ms {after[label]:10.3f}ms")
+    conn.close()
+
+    if failures:
+        print('\n❌ Queries not fully served by an index:')
+        for failure in failures:
+            print(f'  {failure}')
+        sys.exit(1)
+    print('\n✅ All hot queries use indexes')
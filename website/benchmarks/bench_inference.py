@@ -0,0 +1,40 @@
+"""
+Benchmark: per-request scoring latency
+Compares the old predict() + predict_proba() pair against the single-pass engine
+"""
+
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+from inference import BASE_DIR, FEATURE_COLUMNS, load_pipeline, predict_risk
+
+DATA_PATH = os.path.join(BASE_DIR, 'mental_health_data_v2.csv')
+REQUESTS = 500
+
+
+def two_pass(pipeline, input_df):
+    """Scoring as the handlers used to do it"""
+    prediction = pipeline.predict(input_df)[0]
+    prediction_proba = pipeline.predict_proba(input_df)[0]
+    return prediction, prediction_proba[1]
+
+
+def run(label, fn, pipeline, rows):
+    start = time.perf_counter()
+    for row in rows:
+        fn(pipeline, row)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<12} {elapsed / len(rows) * 1000:8.3f} ms/request")
+
+
+if __name__ == '__main__':
+    pipeline = load_pipeline()
+    df = pd.read_csv(DATA_PATH, usecols=FEATURE_COLUMNS, nrows=REQUESTS)[FEATURE_COLUMNS]
+    rows = [df.iloc[[i]] for i in range(len(df))]
+
+    run('two-pass', two_pass, pipeline, rows)
+    run('single-pass', predict_risk, pipeline, rows)
@@ -0,0 +1,81 @@
+"""
+Benchmark: chatbot keyword matching, automaton vs per-keyword scans
+Checks that the keyword automaton finds exactly the groups the previous
+`any(w in message_lower for w in [...])` scans found, over edge cases and a
+random corpus, then times both by message length to locate the crossover
+that KEYWORD_AUTOMATON_MAX_CHARS is set to
+
+Usage: python bench_keywords.py [--long-words 20000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+WEBSITE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(WEBSITE_DIR, 'backend'))
+
+from chatbot import KEYWORDS
+from keyword_matcher import KeywordMatcher
+
+EDGE_CASES = [
+    '', 'hi', 'This is fine', 'I feel STRESSED!!!', 'no point', 'no  point', 'no\npoint',
+    'kill myself', 'hurt myselfish', 'self harmony', 'downloading dreamy nightmares',
+    'depression/anxiety', 'end it all.', 'overwhelmedsadness', 'hey-hello', '😢 sad',
+    'I need to focus', 'isolated and alone', 'Panic ATTACKS', 'hopelessness', 'kill myself harm',
+]
+VOCABULARY = ('i feel have been really so very tired work family sleep dream stressed anxious worried '
+              'alone sad down hopeless focus help hello friend today night no point end it all self '
+              'harm the a and but with myself kill hurt support need hey hi panic avoid').split()
+NEUTRAL = 'the a and but with today work weather movie game ok really so very been have'.split()
+
+
+def scan_each(message):
+    """Reference: one substring scan per keyword, as the handlers used to do"""
+    message_lower = message.lower()
+    mask = 0
+    for bit, keywords in enumerate(KEYWORDS.groups):
+        if any(w in message_lower for w in keywords):
+            mask |= 1 << bit
+    return mask
+
+
+def words(count, vocabulary):
+    return ' '.join(random.choice(vocabulary) for _ in range(count))
+
+
+def timed(fn, messages):
+    repeat = max(1, 20000 // len(messages[0]))
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for message in messages:
+            fn(message)
+    return (time.perf_counter() - start) / (repeat * len(messages)) * 1e6
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--long-words', type=int, default=20000)
+    args = parser.parse_args()
+
+    automaton = KeywordMatcher(KEYWORDS.groups, max_chars=float('inf'))
+    random.seed(0)
+    corpus = EDGE_CASES + [words(random.randint(1, 200), VOCABULARY) for _ in range(20000)]
+    for message in corpus:
+        expected = scan_each(message)
+        assert automaton.scan(message) == expected, f'automaton groups differ for {message!r}'
+        assert KEYWORDS.scan(message) == expected, f'scan() groups differ for {message!r}'
+    print(f"{len(corpus)} messages: automaton groups match per-keyword scans")
+
+    print(f"scan() uses the automaton up to {KEYWORDS.max_chars} chars")
+    print(f"{'words':>7} {'chars':>8} {'scans':>10} {'automaton':>11} {'scan()':>10}  faster")
+    for count in [5, 15, 20, 25, 30, 40, 100, 1000, args.long_words]:
+        # Mostly neutral words, so the per-keyword scans cannot stop early
+        messages = [words(count, NEUTRAL) + ' ' + random.choice(VOCABULARY) for _ in range(20)]
+        chars = sum(map(len, messages)) // len(messages)
+        each_us, automaton_us = timed(scan_each, messages), timed(automaton.scan, messages)
+        faster = 'automaton' if automaton_us < each_us else 'scans'
+        print(f"{count:>7} {chars:>8} {each_us:8.1f}us {automaton_us:9.1f}us "
+              f"{timed(KEYWORDS.scan, messages):8.1f}us  {faster}")
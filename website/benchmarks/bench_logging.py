@@ -0,0 +1,68 @@
+"""
+Benchmark: per-request cost of row-level debug logging
+Times /api/profile/appointments for a doctor with many appointments with
+LOG_LEVEL=DEBUG (one record per appointment row) and the default INFO
+"""
+
+import logging
+import os
+import sys
+import tempfile
+import time
+
+WEBSITE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.environ['MENTIQ_DB_PATH'] = os.path.join(tempfile.mkdtemp(), 'bench_logging.db')
+sys.path.insert(0, WEBSITE_DIR)
+sys.path.insert(0, os.path.join(WEBSITE_DIR, 'backend'))
+
+import app_logging
+import database
+from app import app
+
+REQUESTS = 200
+APPOINTMENTS = 500
+
+
+def setup():
+    database.init_db()
+    client = app.test_client()
+    client.post('/api/auth/register', json={
+        'email': 'doctor@example.com', 'password': 'password123',
+        'name': 'Dr. Bench', 'user_type': 'doctor', 'specialty': 'Psychiatrist'
+    })
+    doctor_id = database.get_user_by_email('doctor@example.com')['id']
+    patient_id = database.create_user('patient@example.com', 'password123', 'Patient', 'patient')
+    conn = database.get_db_connection()
+    conn.executemany('''
+        INSERT INTO appointments (patient_id, doctor_id, appointment_date, appointment_time, status)
+        VALUES (?, ?, ?, ?, 'pending')
+    ''', [(patient_id, doctor_id, f'2026-{1 + i // 8 // 28 % 12:02d}-{1 + i // 8 % 28:02d}', f'{9 + i % 8:02d}:00')
+          for i in range(APPOINTMENTS)])
+    conn.commit()
+    conn.close()
+    return client
+
+
+def timed(client, level):
+    app_logging.logger.setLevel(level)
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        client.get('/api/profile/appointments')
+    return (time.perf_counter() - start) / REQUESTS * 1000
+
+
+if __name__ == '__main__':
+    # Write log lines to /dev/null so the terminal is not part of the measurement
+    devnull = open(os.devnull, 'w')
+    for handler in app_logging._listener.handlers:
+        handler.setStream(devnull)
+
+    client = setup()
+    timed(client, logging.INFO)  # warm-up
+    debug_ms = timed(client, logging.DEBUG)
+    info_ms = timed(client, logging.INFO)
+
+    print(f"/api/profile/appointments with {APPOINTMENTS} appointments, {REQUESTS} requests")
+    print(f"{'LOG_LEVEL=DEBUG':<18} {debug_ms:8.3f}ms/request")
+    print(f"{'LOG_LEVEL=INFO':<18} {info_ms:8.3f}ms/request")
+    print(f"{'saved/request':<18} {debug_ms - info_ms:8.3f}ms ({1 - info_ms / debug_ms:.0%})")
@@ -0,0 +1,135 @@
+"""
+Benchmark: nearest-doctor queries on the R*Tree index
+Generates a million doctors clustered around cities (plus a scattered
+share), checks /api/doctors/nearby's results against a full scan ranked by
+exact distance, then times it for several radii at city centres, suburbs
+and remote points. Fails if any p95 latency reaches 10 ms
+
+Usage: python bench_nearby.py [--doctors 1000000] [--cities 2000]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+WEBSITE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.environ['MENTIQ_DB_PATH'] = os.path.join(tempfile.mkdtemp(), 'bench_nearby.db')
+sys.path.insert(0, os.path.join(WEBSITE_DIR, 'backend'))
+
+import database
+
+SPECIALTIES = ['Psychiatrist', 'Psychologist', 'Clinical Psychologist', 'Counselor', 'Therapist']
+# Share of doctors placed anywhere rather than around a city
+SCATTERED = 0.1
+RADII_KM = [5, 25, 100, 500]
+REPEAT = 200
+LIMIT_MS = 10.0
+
+
+def generate(conn, doctors, cities):
+    conn.execute('PRAGMA synchronous = OFF')
+    # Full-text indexing is not what is measured here
+    for event in ('insert', 'update', 'delete'):
+        conn.execute(f'DROP TRIGGER IF EXISTS doctors_fts_{event}')
+    centres = [(random.uniform(-55, 65), random.uniform(-180, 180)) for _ in range(cities)]
+
+    def location():
+        if random.random() < SCATTERED:
+            return random.uniform(-60, 70), random.uniform(-180, 180)
+        lat, lon = random.choice(centres)
+        # About 10 km of spread around the centre
+        return (max(-90.0, min(90.0, random.gauss(lat, 0.09))),
+                (random.gauss(lon, 0.12) + 180) % 360 - 180)
+
+    conn.executemany(
+        'INSERT INTO doctors (name, specialty, country, city, experience_years, rating, latitude, longitude) '
+        "VALUES (?, ?, 'Country', 'City', ?, ?, ?, ?)",
+        ((f'Dr. {i}', random.choice(SPECIALTIES), random.randint(0, 40), round(random.uniform(3, 5), 1),
+          *location()) for i in range(doctors))
+    )
+    conn.commit()
+    return centres
+
+
+def probes(centres, count):
+    """Query points: at a city centre, a suburb 20-40 km out, and anywhere"""
+    def suburb():
+        lat, lon = random.choice(centres)
+        return lat + random.choice([-1, 1]) * random.uniform(0.18, 0.36), lon
+    return {
+        'city centre': [random.choice(centres) for _ in range(count)],
+        'suburb': [suburb() for _ in range(count)],
+        'anywhere': [(random.uniform(-60, 70), random.uniform(-180, 180)) for _ in range(count)],
+    }
+
+
+def brute_force(conn, lat, lon, radius_km, limit):
+    return [row[0] for row in conn.execute('''
+        SELECT id FROM (
+            SELECT id, haversine_km(?, ?, latitude, longitude) AS distance_km FROM doctors
+        )
+        WHERE distance_km <= ? ORDER BY distance_km, id LIMIT ?
+    ''', (lat, lon, radius_km, limit))]
+
+
+def check_results(conn, points):
+    """The indexed search must return exactly what a full scan ranks first"""
+    start = time.perf_counter()
+    checks = 0
+    for kind, kind_points in points.items():
+        for lat, lon in kind_points[:3]:
+            for radius_km in RADII_KM:
+                expected = brute_force(conn, lat, lon, radius_km, database.NEARBY_PAGE_SIZE)
+                found = [d['id'] for d in database.list_nearby_doctors(lat, lon, radius_km)]
+                assert found == expected, (kind, lat, lon, radius_km, found, expected)
+                checks += 1
+    scan_ms = (time.perf_counter() - start) / checks * 1000
+    print(f"✅ {checks} searches match a full scan (full scan: ~{scan_ms:.0f}ms each)")
+
+
+def time_queries(points):
+    results = {}
+    for kind, kind_points in points.items():
+        for radius_km in RADII_KM:
+            timings = []
+            for lat, lon in kind_points:
+                start = time.perf_counter()
+                found = database.list_nearby_doctors(lat, lon, radius_km)
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            results[kind, radius_km] = (statistics.median(timings), timings[int(len(timings) * 0.95)],
+                                        len(found))
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--doctors', type=int, default=1000000)
+    parser.add_argument('--cities', type=int, default=2000)
+    args = parser.parse_args()
+
+    database.init_db()
+    conn = database.get_db_connection()
+    start = time.perf_counter()
+    centres = generate(conn, args.doctors, args.cities)
+    print(f"Generated {args.doctors:,} doctors around {args.cities:,} cities "
+          f"(indexed by triggers) in {time.perf_counter() - start:.1f}s")
+
+    points = probes(centres, REPEAT)
+    check_results(conn, points)
+    results = time_queries(points)
+    conn.close()
+
+    print(f"\n{'point':<12} {'radius':>8} {'median':>10} {'p95':>10} {'found':>6}")
+    for (kind, radius_km), (median, p95, found) in results.items():
+        print(f"{kind:<12} {radius_km:>6}km {median:8.2f}ms {p95:8.2f}ms {found:>6}")
+
+    slow = [key for key, (median, p95, found) in results.items() if p95 >= LIMIT_MS]
+    if slow:
+        print(f'\n❌ p95 over {LIMIT_MS:g}ms: {slow}')
+        sys.exit(1)
+    print(f'\n✅ 95% of nearby searches take under {LIMIT_MS:g}ms')
@@ -0,0 +1,110 @@
+"""
+Benchmark: login storm against the bounded password-hashing pool
+Fires a burst of concurrent logins while a reader polls /api/articles, then
+reports accepted vs fast-rejected logins, read latency during the storm, the
+pool's hashing/queue-wait metrics, and checks that an outdated hash is upgraded
+
+Usage: python bench_passwords.py [--logins 64]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+WEBSITE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.environ['MENTIQ_DB_PATH'] = os.path.join(tempfile.mkdtemp(), 'bench_passwords.db')
+sys.path.insert(0, WEBSITE_DIR)
+sys.path.insert(0, os.path.join(WEBSITE_DIR, 'backend'))
+
+import database
+from app import app
+from passwords import hasher, hash_method
+from werkzeug.security import generate_password_hash
+
+LEGACY_METHOD = 'pbkdf2:sha256:600000'
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(int(len(values) * q), len(values) - 1)] * 1000 if values else 0
+
+
+def storm(logins):
+    statuses = Counter()
+    latencies = []
+    read_latencies = []
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def login():
+        client = app.test_client()
+        start = time.perf_counter()
+        response = client.post('/api/auth/login', json={'email': 'storm@example.com', 'password': 'password123'})
+        with lock:
+            statuses[response.status_code] += 1
+            if response.status_code == 200:
+                latencies.append(time.perf_counter() - start)
+
+    def reader():
+        client = app.test_client()
+        while not done.is_set():
+            start = time.perf_counter()
+            client.get('/api/articles')
+            read_latencies.append(time.perf_counter() - start)
+
+    reader_thread = threading.Thread(target=reader)
+    reader_thread.start()
+    threads = [threading.Thread(target=login) for _ in range(logins)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    done.set()
+    reader_thread.join()
+    return statuses, latencies, read_latencies, elapsed
+
+
+def check_upgrade():
+    user_id = database.create_user('legacy@example.com', 'x', 'Legacy', 'patient')
+    conn = database.get_db_connection()
+    conn.execute('UPDATE users SET password_hash = ?, password_hash_method = ? WHERE id = ?',
+                 (generate_password_hash('password123', LEGACY_METHOD), LEGACY_METHOD, user_id))
+    conn.commit()
+    conn.close()
+
+    app.test_client().post('/api/auth/login', json={'email': 'legacy@example.com', 'password': 'password123'})
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        user = database.get_user_by_id(user_id)
+        if user['password_hash_method'] == hasher.method:
+            break
+        time.sleep(0.05)
+    return user['password_hash_method'], hash_method(user['password_hash'])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--logins', type=int, default=64)
+    args = parser.parse_args()
+
+    database.init_db()
+    database.create_user('storm@example.com', 'password123', 'Storm', 'patient')
+
+    statuses, latencies, read_latencies, elapsed = storm(args.logins)
+    print(f"{args.logins} concurrent logins in {elapsed:.2f}s "
+          f"(pool size {hasher.size}, queue limit {hasher.queue_limit})")
+    print(f"  status codes: {dict(sorted(statuses.items()))}  (503 = rejected fast)")
+    print(f"  accepted login latency: p50 {percentile(latencies, 0.5):.1f}ms  p99 {percentile(latencies, 0.99):.1f}ms")
+    print(f"  /api/articles during storm: {len(read_latencies)} reads, "
+          f"p50 {percentile(read_latencies, 0.5):.1f}ms  p99 {percentile(read_latencies, 0.99):.1f}ms")
+    print(f"  metrics: {app.test_client().get('/api/metrics').get_json()['password_hashing']}")
+
+    stored, actual = check_upgrade()
+    print(f"\n{LEGACY_METHOD} user after login: stored method {stored}, hash {actual}")
+    sys.exit(0 if stored == actual == hasher.method else 1)
@@ -0,0 +1,73 @@
+"""
+Benchmark: /api/doctors and /api/articles with and without the response cache
+Times uncached requests, cache hits, and conditional revalidations (304)
+against a scratch database with a realistic doctor directory
+
+Usage: python bench_response_cache.py [--doctors 2000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+WEBSITE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.environ['MENTIQ_DB_PATH'] = os.path.join(tempfile.mkdtemp(), 'bench_response_cache.db')
+sys.path.insert(0, WEBSITE_DIR)
+sys.path.insert(0, os.path.join(WEBSITE_DIR, 'backend'))
+
+import database
+from app import app
+from response_cache import doctors_cache, articles_cache
+
+REQUESTS = 500
+URLS = ['/api/doctors', '/api/doctors?country=Egypt', '/api/doctors?specialty=Psychiatrist', '/api/articles']
+
+
+def generate(doctors):
+    conn = database.get_db_connection()
+    conn.executemany(
+        'INSERT INTO doctors (name, specialty, country, city, experience_years, rating, avatar) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?)',
+        ((f'Dr. {i}', random.choice(['Psychiatrist', 'Psychologist', 'Counselor']),
+          random.choice(['Egypt', 'USA', 'UK']), f'City {i % 50}', random.randint(0, 40),
+          round(random.uniform(3, 5), 1), '👩‍⚕️')
+         for i in range(doctors))
+    )
+    conn.commit()
+    conn.close()
+
+
+def timed(client, url, headers=None):
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        response = client.get(url, headers=headers)
+    return (time.perf_counter() - start) / REQUESTS * 1000, response
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--doctors', type=int, default=2000)
+    args = parser.parse_args()
+
+    database.init_db()
+    generate(args.doctors)
+    client = app.test_client()
+
+    print(f"{args.doctors} doctors, {REQUESTS} requests per cell")
+    print(f"{'url':<38} {'uncached':>10} {'cached':>10} {'304':>10} {'body':>9}")
+    for url in URLS:
+        for cache in (doctors_cache, articles_cache):
+            cache.ttl = 0
+            cache.clear()
+        uncached, _ = timed(client, url)
+
+        for cache in (doctors_cache, articles_cache):
+            cache.ttl = 60
+        client.get(url)
+        cached, response = timed(client, url)
+        revalidated, not_modified = timed(client, url, {'If-None-Match': response.headers['ETag']})
+        assert not_modified.status_code == 304
+        print(f"{url:<38} {uncached:8.3f}ms {cached:8.3f}ms {revalidated:8.3f}ms {len(response.data):>8}B")
@@ -0,0 +1,153 @@
+"""
+Benchmark: full-text search over doctors and articles
+Generates a large doctors table, checks that the FTS5 triggers from migration
+5 keep doctors_fts in sync with inserts, updates and deletes and that
+highlights are HTML-escaped, then times /api/search's ranked FTS5 query
+against the LIKE scan the frontend would otherwise need
+
+Usage: python bench_search.py [--doctors 200000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+WEBSITE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.environ['MENTIQ_DB_PATH'] = os.path.join(tempfile.mkdtemp(), 'bench_search.db')
+sys.path.insert(0, os.path.join(WEBSITE_DIR, 'backend'))
+
+import database
+
+FIRST_NAMES = ['Sarah', 'Ahmed', 'Mona', 'Omar', 'John', 'Emily', 'Raj', 'Priya', 'Lukas', 'Anna',
+               'Karim', 'Laila', 'Hassan', 'Nour', 'David', 'Maria', 'Chen', 'Yuki', 'José', 'Zoë']
+LAST_NAMES = ['Ahmed', 'Karim', 'Hassan', 'Smith', 'Johnson', 'Patel', 'Müller', 'Schmidt', 'Garcia',
+              'Silva', 'Wang', 'Tanaka', 'Brown', 'Nasser', 'Farouk', 'Lee', 'Martin', 'Dubois']
+SPECIALTIES = ['Psychiatrist', 'Psychologist', 'Clinical Psychologist', 'Counselor', 'Therapist',
+               'Child Psychiatrist', 'Addiction Counselor', 'Family Therapist']
+PLACES = [('Egypt', 'Cairo'), ('Egypt', 'Alexandria'), ('Egypt', 'Giza'), ('USA', 'New York'),
+          ('USA', 'Boston'), ('UK', 'London'), ('UK', 'Manchester'), ('UAE', 'Dubai'),
+          ('Germany', 'Berlin'), ('Germany', 'München'), ('India', 'Mumbai'), ('Brazil', 'São Paulo')]
+REPEAT = 50
+
+QUERIES = [
+    'anxiety Cairo psychiatrist',
+    'psychiatrists cairo',
+    'sarah',
+    'ahmed karim',
+    'munchen therap',
+    'child psychiatrist london',
+    'sao paulo',
+    'psychiatrist atlantis',   # no doctor matches every term: drops 'atlantis'
+    'cairo london',            # both match, never together: falls back to any term
+]
+
+# What the frontend would run without FTS: every term must appear in some column
+LIKE_SQL = '''
+    SELECT * FROM doctors WHERE {}
+    ORDER BY rating DESC, experience_years DESC LIMIT ?
+'''
+LIKE_TERM = "(name || ' ' || specialty || ' ' || city || ' ' || country) LIKE ?"
+
+
+def generate(conn, doctors):
+    conn.execute('PRAGMA synchronous = OFF')
+    start_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM users').fetchone()[0] + 1
+    rows = []
+    for i in range(start_id, start_id + doctors):
+        country, city = random.choice(PLACES)
+        rows.append((i, f'Dr. {random.choice(FIRST_NAMES)} {random.choice(LAST_NAMES)}',
+                     random.choice(SPECIALTIES), country, city,
+                     random.randint(0, 40), round(random.uniform(3, 5), 1)))
+    conn.executemany(
+        "INSERT INTO users (id, email, password_hash, name, user_type) VALUES (?, ?, 'x', ?, 'doctor')",
+        ((row[0], f'doctor{row[0]}@example.com', row[1]) for row in rows)
+    )
+    conn.executemany(
+        'INSERT INTO doctors (user_id, name, specialty, country, city, experience_years, rating) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?)',
+        rows
+    )
+    conn.commit()
+
+
+def check_sync(conn):
+    """Triggers must mirror every change to doctors into doctors_fts"""
+    def found(q):
+        return [d['id'] for d in database.search_doctors(database.search_match_terms(q), 50)]
+
+    cursor = conn.cursor()
+    cursor.execute(
+        "INSERT INTO doctors (name, specialty, country, city) "
+        "VALUES ('Dr. Zyxwv <script>alert(1)</script>', 'Psychiatrist', 'Egypt', 'Cairo')"
+    )
+    doctor_id = cursor.lastrowid
+    conn.commit()
+    assert found('zyxwv') == [doctor_id], 'insert not indexed'
+
+    highlight = database.search_doctors(database.search_match_terms('zyxwv'), 1)[0]['highlight']['name']
+    assert '<script>' not in highlight and '&lt;script&gt;' in highlight, highlight
+    assert '<mark>Zyxwv</mark>' in highlight, highlight
+
+    conn.execute("UPDATE doctors SET city = 'Qwertyville' WHERE id = ?", (doctor_id,))
+    conn.commit()
+    assert found('qwertyville') == [doctor_id], 'update not indexed'
+    assert not [d for d in database.search_doctors(database.search_match_terms('zyxwv'), 1)
+                if 'Cairo' in d['highlight']['city']], 'old city still indexed'
+
+    conn.execute('DELETE FROM doctors WHERE id = ?', (doctor_id,))
+    conn.commit()
+    assert found('zyxwv') == [] and found('qwertyville') == [], 'delete not indexed'
+
+    conn.execute("INSERT INTO doctors_fts (doctors_fts) VALUES ('integrity-check')")
+    conn.execute("INSERT INTO articles_fts (articles_fts) VALUES ('integrity-check')")
+    print('✅ doctors_fts follows inserts, updates and deletes; highlights are escaped')
+
+
+def time_fts(queries):
+    results = {}
+    for q in queries:
+        match = database.search_match_terms(q)
+        start = time.perf_counter()
+        for _ in range(REPEAT):
+            found = database.search(match, limit=database.SEARCH_PAGE_SIZE)
+        results[q] = ((time.perf_counter() - start) / REPEAT * 1000, len(found['doctors']))
+    return results
+
+
+def time_like(conn, queries):
+    results = {}
+    for q in queries:
+        terms = database.SEARCH_TERM.findall(q)
+        sql = LIKE_SQL.format(' AND '.join([LIKE_TERM] * len(terms)))
+        params = [f'%{term}%' for term in terms] + [database.SEARCH_PAGE_SIZE]
+        start = time.perf_counter()
+        for _ in range(max(REPEAT // 10, 1)):
+            conn.execute(sql, params).fetchall()
+        results[q] = (time.perf_counter() - start) / max(REPEAT // 10, 1) * 1000
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--doctors', type=int, default=200000)
+    args = parser.parse_args()
+
+    database.init_db()
+    conn = database.get_db_connection()
+    start = time.perf_counter()
+    generate(conn, args.doctors)
+    print(f"Generated {args.doctors:,} doctors (indexed by triggers) in {time.perf_counter() - start:.1f}s")
+
+    check_sync(conn)
+
+    fts = time_fts(QUERIES)
+    like = time_like(conn, QUERIES)
+    conn.close()
+
+    print(f"\n{'query':<30} {'LIKE scan':>12} {'FTS5':>12} {'hits':>6}")
+    for q in QUERIES:
+        fts_ms, hits = fts[q]
+        print(f"{q:<30} {like[q]:10.3f}ms {fts_ms:10.3f}ms {hits:>6}")
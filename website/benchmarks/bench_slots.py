@@ -0,0 +1,150 @@
+"""
+Benchmark: slot reservation and doctor availability
+Races patients booking the same doctor slots from several threads (the
+unique slot index must let exactly one booking per slot through), then on a
+generated database times /api/doctors/<id>/availability's single index range
+scan against loading every appointment of the doctor
+
+Usage: python bench_slots.py [--appointments 1000000] [--threads 8]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+WEBSITE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.environ['MENTIQ_DB_PATH'] = os.path.join(tempfile.mkdtemp(), 'bench_slots.db')
+sys.path.insert(0, os.path.join(WEBSITE_DIR, 'backend'))
+
+import database
+from database import SlotTakenError
+
+DOCTORS = 2000
+PATIENTS = 50000
+REPEAT = 200
+FIRST_DAY = date(2026, 1, 1)
+
+
+def race(conn, threads, slots=200):
+    """Every thread tries to book every slot; returns bookings per slot"""
+    times = database.appointment_slot_times()
+    wanted = [(1, (FIRST_DAY + timedelta(days=i // len(times))).isoformat(), times[i % len(times)])
+              for i in range(slots)]
+    barrier = threading.Barrier(threads)
+    errors = []
+
+    def worker(patient_id):
+        worker_conn = database.get_db_connection()
+        barrier.wait()
+        for doctor_id, day, slot in random.sample(wanted, len(wanted)):
+            try:
+                database.insert_appointment(worker_conn.cursor(), patient_id, doctor_id, day, slot, '')
+                worker_conn.commit()
+            except SlotTakenError:
+                worker_conn.rollback()
+            except Exception as e:
+                errors.append(e)
+        worker_conn.close()
+
+    workers = [threading.Thread(target=worker, args=(DOCTORS + 1 + i,)) for i in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    assert not errors, errors[:3]
+    return [conn.execute('''
+        SELECT COUNT(*) FROM appointments
+        WHERE doctor_id = ? AND appointment_date = ? AND appointment_time = ?
+    ''', slot).fetchone()[0] for slot in wanted]
+
+
+def generate(conn, appointments):
+    conn.execute('PRAGMA synchronous = OFF')
+    conn.executemany(
+        "INSERT OR IGNORE INTO users (id, email, password_hash, name, user_type) VALUES (?, ?, 'x', ?, ?)",
+        ((i, f'user{i}@example.com', f'User {i}', 'doctor' if i <= DOCTORS else 'patient')
+         for i in range(1, DOCTORS + PATIENTS + 1))
+    )
+    conn.executemany(
+        "INSERT OR IGNORE INTO doctors (user_id, name, specialty, country, city) VALUES (?, ?, 'Therapist', 'Egypt', 'Cairo')",
+        ((i, f'Dr. {i}') for i in range(1, DOCTORS + 1))
+    )
+    times = database.appointment_slot_times()
+    # OR IGNORE: a generated row that lands on an active slot is skipped by the unique index
+    conn.executemany(
+        'INSERT OR IGNORE INTO appointments (patient_id, doctor_id, appointment_date, appointment_time, status) '
+        'VALUES (?, ?, ?, ?, ?)',
+        ((random.randint(DOCTORS + 1, DOCTORS + PATIENTS), random.randint(1, DOCTORS),
+          (FIRST_DAY + timedelta(days=random.randint(0, 364))).isoformat(), random.choice(times),
+          random.choice(['pending', 'confirmed', 'cancelled', 'completed']))
+         for _ in range(appointments))
+    )
+    conn.commit()
+
+
+def availability_from_list(doctor_id, date_from, date_to):
+    """Without the range scan: load every appointment of the doctor and filter in Python"""
+    appointments, _ = database.list_user_appointments(doctor_id, 'doctor', limit=10 ** 9)
+    taken = {(a['appointment_date'], a['appointment_time']) for a in appointments
+             if a['status'] in ('pending', 'confirmed')
+             and date_from.isoformat() <= a['appointment_date'] <= date_to.isoformat()}
+    times = database.appointment_slot_times()
+    days, day = [], date_from
+    while day <= date_to:
+        days.append({'date': day.isoformat(), 'free': [t for t in times if (day.isoformat(), t) not in taken]})
+        day += timedelta(days=1)
+    return days
+
+
+def timed(fn):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        fn(random.randint(1, DOCTORS), date(2026, 6, 1), date(2026, 6, 7))
+    return (time.perf_counter() - start) / REPEAT * 1000
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--appointments', type=int, default=1000000)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    random.seed(0)
+    database.init_db()
+    conn = database.get_db_connection()
+    generate(conn, 0)
+
+    counts = race(conn, args.threads)
+    assert set(counts) == {1}, f'slots booked {max(counts)} times'
+    print(f"✅ {args.threads} threads booking the same {len(counts)} slots: each booked exactly once")
+
+    start = time.perf_counter()
+    generate(conn, args.appointments)
+    print(f"Generated {args.appointments:,} appointments for {DOCTORS:,} doctors "
+          f"in {time.perf_counter() - start:.1f}s")
+    conn.execute('ANALYZE')
+    conn.commit()
+
+    sql = '''
+        SELECT appointment_date, appointment_time FROM appointments
+        WHERE doctor_id = ? AND appointment_date BETWEEN ? AND ?
+          AND status IN ('pending', 'confirmed')
+    '''
+    plan = ' | '.join(row[3] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql, (1, '2026-06-01', '2026-06-07')))
+    print(f"Availability query plan: {plan}")
+    assert 'idx_appointments_doctor_slot' in plan, plan
+
+    for doctor_id in random.sample(range(1, DOCTORS + 1), 20):
+        expected = availability_from_list(doctor_id, date(2026, 6, 1), date(2026, 6, 7))
+        assert database.get_doctor_availability(doctor_id, date(2026, 6, 1), date(2026, 6, 7)) == expected
+    conn.close()
+
+    per_doctor = args.appointments // DOCTORS
+    print(f"\n{'one week of availability':<28} {'per request':>12}  (~{per_doctor:,} appointments per doctor)")
+    print(f"{'all appointments, filtered':<28} {timed(availability_from_list):10.3f}ms")
+    print(f"{'slot index range scan':<28} {timed(database.get_doctor_availability):10.3f}ms")
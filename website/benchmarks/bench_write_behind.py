@@ -0,0 +1,142 @@
+"""
+Benchmark: synchronous vs write-behind inserts for assessments and chatbot logs
+Runs the app under gunicorn on a scratch database with the write queue off
+(WRITE_QUEUE_MAX_PENDING=0, one commit per request) and on, drives logged-in
+clients posting /api/assessment and /api/chatbot, and reports p50/p99 latency
+and inserts per second. Rows are counted after the server shuts down, so the
+"saved" column also checks that queued inserts are flushed at exit.
+
+Usage: python bench_write_behind.py [--clients 16] [--seconds 10] [--threads 8]
+"""
+
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import signal
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+WEBSITE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HOST = '127.0.0.1'
+PORT = 5080
+
+MODES = {
+    'synchronous': {'WRITE_QUEUE_MAX_PENDING': '0'},
+    'write-behind': {},
+}
+ASSESSMENT = {
+    'age': 34, 'gender': 'Female', 'sleepHours': 5, 'physicalActivity': 1,
+    'screenTime': 9, 'workHours': 55, 'financialStress': 8,
+    'feelingNervous': True, 'hopelessness': True, 'troubleConcentrating': True
+}
+
+
+def request(conn, path, body, headers=None):
+    conn.request('POST', path, body=json.dumps(body),
+                 headers={'Content-Type': 'application/json', **(headers or {})})
+    response = conn.getresponse()
+    response.read()
+    return response
+
+
+def client(index, deadline, results):
+    conn = http.client.HTTPConnection(HOST, PORT, timeout=60)
+    response = request(conn, '/api/auth/register', {
+        'email': f'writer{index}@example.com', 'password': 'password123',
+        'name': f'Writer {index}', 'user_type': 'patient'
+    })
+    headers = {'Cookie': response.getheader('Set-Cookie', '').split(';')[0]}
+
+    ok = errors = 0
+    latencies = []
+    i = 0
+    while time.monotonic() < deadline:
+        if i % 2:
+            path, body = '/api/chatbot', {'message': 'Work has me so stressed I cannot sleep'}
+        else:
+            path, body = '/api/assessment', ASSESSMENT
+        start = time.perf_counter()
+        try:
+            status = request(conn, path, body, headers).status
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            conn = http.client.HTTPConnection(HOST, PORT, timeout=60)
+            status = None
+        latencies.append(time.perf_counter() - start)
+        if status == 200:
+            ok += 1
+        else:
+            errors += 1
+        i += 1
+    results.put((ok, errors, latencies))
+
+
+def wait_until_up(timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection(HOST, PORT, timeout=1)
+            conn.request('GET', '/api/health')
+            conn.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError('server did not start')
+
+
+def percentile(values, q):
+    return values[min(int(len(values) * q), len(values) - 1)] * 1000 if values else 0
+
+
+def run(mode_env, args):
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench_write_behind.db')
+    env = dict(os.environ, MENTIQ_DB_PATH=db_path, WEB_CONCURRENCY='1',
+               WEB_THREADS=str(args.threads), BIND=f'{HOST}:{PORT}', LOG_LEVEL='WARNING', **mode_env)
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+        cwd=WEBSITE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_until_up()
+        results = multiprocessing.Queue()
+        deadline = time.monotonic() + args.seconds
+        clients = [multiprocessing.Process(target=client, args=(i, deadline, results))
+                   for i in range(args.clients)]
+        for c in clients:
+            c.start()
+        collected = [results.get() for _ in clients]
+        for c in clients:
+            c.join()
+    finally:
+        # Graceful stop: the worker flushes its write queue on exit
+        server.send_signal(signal.SIGTERM)
+        server.wait()
+
+    conn = sqlite3.connect(db_path)
+    saved = sum(conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+                for table in ('assessments', 'chatbot_conversations'))
+    conn.close()
+    ok = sum(r[0] for r in collected)
+    errors = sum(r[1] for r in collected)
+    latencies = sorted(l for r in collected for l in r[2])
+    return ok, errors, saved, percentile(latencies, 0.5), percentile(latencies, 0.99)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--threads', type=int, default=8, help='threads of the gunicorn worker')
+    parser.add_argument('--seconds', type=float, default=10)
+    args = parser.parse_args()
+
+    print(f"{args.clients} clients, 1 worker x {args.threads} threads, {args.seconds:g}s")
+    print(f"{'mode':<14} {'inserts/s':>10} {'p50':>9} {'p99':>9} {'saved':>7} {'errors':>7}")
+    for label, mode_env in MODES.items():
+        ok, errors, saved, p50, p99 = run(mode_env, args)
+        status = 'all' if saved == ok else f'{saved}/{ok}'
+        print(f"{label:<14} {saved / args.seconds:10.0f} {p50:7.2f}ms {p99:7.2f}ms {status:>7} {errors:>7}")
@@ -0,0 +1,127 @@
+"""
+Load test: /api/assessment throughput under gunicorn at several worker counts
+Starts `gunicorn -c gunicorn.conf.py wsgi:app` on a scratch database for each
+worker count and drives it from client processes over keep-alive HTTP
+
+Usage: python load_test.py [--workers 1 2 4] [--threads 4] [--clients 16] [--seconds 10] [--login]
+"""
+
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+WEBSITE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HOST = '127.0.0.1'
+PORT = 5077
+
+ASSESSMENT = {
+    'age': 34, 'gender': 'Female', 'sleepHours': 5, 'physicalActivity': 1,
+    'screenTime': 9, 'workHours': 55, 'financialStress': 8,
+    'feelingNervous': True, 'hopelessness': True, 'troubleConcentrating': True
+}
+
+
+def request(conn, method, path, body=None, headers=None):
+    conn.request(method, path, body=json.dumps(body) if body is not None else None,
+                 headers={'Content-Type': 'application/json', **(headers or {})})
+    response = conn.getresponse()
+    response.read()
+    return response
+
+
+def client(index, deadline, login, results):
+    conn = http.client.HTTPConnection(HOST, PORT, timeout=30)
+    headers = {}
+    if login:
+        response = request(conn, 'POST', '/api/auth/register', {
+            'email': f'load{index}-{os.getpid()}@example.com', 'password': 'password123',
+            'name': f'Load {index}', 'user_type': 'patient'
+        })
+        headers['Cookie'] = response.getheader('Set-Cookie', '').split(';')[0]
+
+    ok = errors = 0
+    latencies = []
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        try:
+            status = request(conn, 'POST', '/api/assessment', ASSESSMENT, headers).status
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            conn = http.client.HTTPConnection(HOST, PORT, timeout=30)
+            status = None
+        latencies.append(time.perf_counter() - start)
+        if status == 200:
+            ok += 1
+        else:
+            errors += 1
+    results.put((ok, errors, latencies))
+
+
+def wait_until_up(timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection(HOST, PORT, timeout=1)
+            conn.request('GET', '/api/health')
+            conn.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError('gunicorn did not start')
+
+
+def run(workers, args):
+    env = dict(os.environ,
+               MENTIQ_DB_PATH=os.path.join(tempfile.mkdtemp(), 'load.db'),
+               WEB_CONCURRENCY=str(workers), WEB_THREADS=str(args.threads),
+               BIND=f'{HOST}:{PORT}', LOG_LEVEL='WARNING')
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+        cwd=WEBSITE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_until_up()
+        results = multiprocessing.Queue()
+        deadline = time.monotonic() + args.seconds
+        clients = [multiprocessing.Process(target=client, args=(i, deadline, args.login, results))
+                   for i in range(args.clients)]
+        for c in clients:
+            c.start()
+        collected = [results.get() for _ in clients]
+        for c in clients:
+            c.join()
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait()
+
+    ok = sum(r[0] for r in collected)
+    errors = sum(r[1] for r in collected)
+    latencies = sorted(latency for r in collected for latency in r[2])
+    p50 = latencies[len(latencies) // 2] * 1000 if latencies else 0
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0
+    return ok / args.seconds, errors, p50, p99
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--login', action='store_true', help='log clients in so assessments are also saved')
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs, {args.clients} clients, {args.threads} threads/worker, {args.seconds:g}s per run")
+    print(f"{'workers':>8} {'req/s':>10} {'p50':>10} {'p99':>10} {'errors':>8}")
+    baseline = None
+    for workers in args.workers:
+        rps, errors, p50, p99 = run(workers, args)
+        baseline = baseline or rps
+        print(f"{workers:>8} {rps:10.0f} {p50:8.2f}ms {p99:8.2f}ms {errors:>8}  ({rps / baseline:.2f}x)")
@@ -0,0 +1,115 @@
+"""
+Stress test: concurrent readers and writers against the Flask API
+Patients submit assessments, chat and book appointments while doctors poll
+their dashboard and update statuses; any "database is locked" error fails the run
+
+Usage: python stress_db.py [--threads 16] [--seconds 10]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+WEBSITE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('MENTIQ_DB_PATH', os.path.join(tempfile.mkdtemp(), 'stress.db'))
+sys.path.insert(0, WEBSITE_DIR)
+sys.path.insert(0, os.path.join(WEBSITE_DIR, 'backend'))
+
+import database
+from app import app
+
+DOCTORS = 4
+
+
+def register(client, email, user_type):
+    response = client.post('/api/auth/register', json={
+        'email': email, 'password': 'password123', 'name': email.split('@')[0],
+        'user_type': user_type, 'specialty': 'Psychiatrist'
+    })
+    return response.get_json()['user']['id']
+
+
+def patient_loop(client, doctor_ids, deadline, stats):
+    while time.monotonic() < deadline:
+        action = random.random()
+        if action < 0.35:
+            response = client.post('/api/assessment', json={
+                'age': random.randint(18, 70), 'sleepHours': random.randint(3, 9),
+                'hopelessness': random.random() < 0.3
+            })
+        elif action < 0.6:
+            response = client.post('/api/chatbot', json={'message': 'I feel stressed and anxious'})
+        elif action < 0.8:
+            response = client.post('/api/appointments', json={
+                'doctor_id': random.choice(doctor_ids),
+                'appointment_date': f'2026-{random.randint(1, 12):02d}-{random.randint(1, 28):02d}',
+                'appointment_time': random.choice(database.appointment_slot_times())
+            })
+        else:
+            response = client.get('/api/profile/appointments')
+        stats.record(response)
+
+
+def doctor_loop(client, deadline, stats):
+    while time.monotonic() < deadline:
+        response = client.get('/api/profile/appointments')
+        stats.record(response)
+        appointments = (response.get_json() or {}).get('appointments', [])
+        pending = [a for a in appointments if a['status'] == 'pending']
+        if pending:
+            appointment = random.choice(pending)
+            stats.record(client.put(f"/api/appointments/{appointment['id']}/status",
+                                    json={'status': 'confirmed'}))
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.status = Counter()
+        self.locked = 0
+
+    def record(self, response):
+        body = response.get_data(as_text=True)
+        with self.lock:
+            self.status[response.status_code] += 1
+            if 'locked' in body:
+                self.locked += 1
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=10)
+    args = parser.parse_args()
+
+    database.init_db()
+    doctor_clients = [app.test_client() for _ in range(DOCTORS)]
+    doctor_ids = [register(c, f'doctor{i}@example.com', 'doctor') for i, c in enumerate(doctor_clients)]
+    patient_clients = [app.test_client() for _ in range(args.threads - DOCTORS)]
+    for i, c in enumerate(patient_clients):
+        register(c, f'patient{i}@example.com', 'patient')
+
+    stats = Stats()
+    deadline = time.monotonic() + args.seconds
+    threads = [threading.Thread(target=doctor_loop, args=(c, deadline, stats)) for c in doctor_clients]
+    threads += [threading.Thread(target=patient_loop, args=(c, doctor_ids, deadline, stats))
+                for c in patient_clients]
+    with contextlib.redirect_stdout(io.StringIO()):
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    total = sum(stats.status.values())
+    print(f"journal_mode: {database.get_db_connection().execute('PRAGMA journal_mode').fetchone()[0]}")
+    print(f"{total} requests in {args.seconds:g}s ({total / args.seconds:.0f} req/s)")
+    print(f"status codes: {dict(sorted(stats.status.items()))}")
+    print(f"'database is locked' errors: {stats.locked}")
+    sys.exit(1 if stats.locked else 0)
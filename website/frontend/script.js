@@ -291,23 +291,53 @@ async function filterArticles(category) {
 
 // ========== DOCTORS PAGE ==========
 
+let doctorSearchTimer = null;
+let doctorRequestId = 0;
+
+// Wait for a pause in typing before hitting /api/search
+function searchDoctorsDebounced() {
+    clearTimeout(doctorSearchTimer);
+    doctorSearchTimer = setTimeout(applyDoctorFilters, 250);
+}
+
 async function applyDoctorFilters() {
+    const query = document.getElementById('doctorSearch').value.trim();
     const country = document.getElementById('countryFilter').value;
     const city = document.getElementById('cityFilter').value;
     const specialty = document.getElementById('specialtyFilter').value;
+    const requestId = ++doctorRequestId;
 
     try {
         const params = new URLSearchParams();
-        if (country) params.append('country', country);
-        if (city) params.append('city', city);
-        if (specialty) params.append('specialty', specialty);
-        
-        const url = `/api/doctors${params.toString() ? '?' + params.toString() : ''}`;
+        let url;
+        if (query) {
+            // Ranked full-text matches; the dropdowns narrow them down below
+            params.append('q', query);
+            params.append('type', 'doctors');
+            params.append('limit', '50');
+            url = `/api/search?${params.toString()}`;
+        } else {
+            if (country) params.append('country', country);
+            if (city) params.append('city', city);
+            if (specialty) params.append('specialty', specialty);
+            url = `/api/doctors${params.toString() ? '?' + params.toString() : ''}`;
+        }
         const response = await fetch(url);
         const data = await response.json();
+
+        // A slower response for an older query must not overwrite a newer one
+        if (requestId !== doctorRequestId) return;
         
         if (data.success) {
-            renderDoctors(data.doctors);
+            let doctorsList = data.doctors;
+            if (query) {
+                doctorsList = doctorsList.filter(doctor =>
+                    (!country || doctor.country === country) &&
+                    (!city || doctor.city === city) &&
+                    (!specialty || doctor.specialty === specialty)
+                );
+            }
+            renderDoctors(doctorsList);
         } else {
             console.error('Error fetching doctors:', data.error);
         }
@@ -316,6 +346,35 @@ async function applyDoctorFilters() {
     }
 }
 
+// Nearest doctors to the browser's location, closest first
+function findDoctorsNearMe() {
+    if (!navigator.geolocation) {
+        alert('Location is not available in this browser.');
+        return;
+    }
+    navigator.geolocation.getCurrentPosition(async position => {
+        const requestId = ++doctorRequestId;
+        try {
+            const params = new URLSearchParams({
+                lat: position.coords.latitude,
+                lon: position.coords.longitude,
+                radius: '100'
+            });
+            const response = await fetch(`/api/doctors/nearby?${params.toString()}`);
+            const data = await response.json();
+            if (requestId !== doctorRequestId) return;
+
+            if (data.success) {
+                renderDoctors(data.doctors);
+            } else {
+                console.error('Error fetching nearby doctors:', data.error);
+            }
+        } catch (error) {
+            console.error('Error loading nearby doctors:', error);
+        }
+    }, () => alert('Allow location access to find doctors near you.'));
+}
+
 function renderDoctors(doctorsList) {
     const doctorsContainer = document.getElementById('doctorsList');
     doctorsContainer.innerHTML = '';
@@ -355,6 +414,7 @@ function renderDoctors(doctorsList) {
         const experience = doctor.experience_years ? `${doctor.experience_years} years` : doctor.experience || 'N/A';
         details.innerHTML = `
             <span>📍 ${doctor.city}, ${doctor.country}</span>
+            ${doctor.distance_km !== undefined ? `<span>🧭 ${doctor.distance_km} km away</span>` : ''}
             <span>⏱️ ${experience}</span>
             <span class="doctor-rating">⭐ ${doctor.rating || '4.5'}</span>
         `;
@@ -441,7 +501,9 @@ function bookDoctor(doctor) {
                 </div>
                 <div style="margin-bottom: 15px;">
                     <label style="display: block; margin-bottom: 5px; font-weight: 600; color: ${labelColor};">Time:</label>
-                    <input type="time" id="appointmentTime" required style="width: 100%; padding: 10px; border: 2px solid ${inputBorder}; border-radius: 8px; background: ${inputBg}; color: ${textColor}; color-scheme: ${isDarkMode ? 'dark' : 'light'};">
+                    <select id="appointmentTime" required style="width: 100%; padding: 10px; border: 2px solid ${inputBorder}; border-radius: 8px; background: ${inputBg}; color: ${textColor}; color-scheme: ${isDarkMode ? 'dark' : 'light'};">
+                        <option value="">Select a date first</option>
+                    </select>
                 </div>
                 <div style="margin-bottom: 15px;">
                     <label style="display: block; margin-bottom: 5px; font-weight: 600; color: ${labelColor};">Message (Optional):</label>
@@ -455,6 +517,10 @@ function bookDoctor(doctor) {
         </div>
     `;
     
+    modal.querySelector('#appointmentDate').onchange = (e) => {
+        loadFreeSlots(doctor.user_id, e.target.value, modal.querySelector('#appointmentTime'));
+    };
+    
     modal.querySelector('#bookingFormElement').onsubmit = async (e) => {
         e.preventDefault();
         
@@ -502,6 +568,10 @@ function bookDoctor(doctor) {
                 modal.remove();
             } else {
                 alert('Error: ' + (data.error || 'Failed to book appointment'));
+                if (response.status === 409) {
+                    // Someone else took the slot: offer the times still free
+                    loadFreeSlots(doctor.user_id, appointmentDate, modal.querySelector('#appointmentTime'));
+                }
             }
         } catch (error) {
             console.error('Error booking appointment:', error);
@@ -546,6 +616,42 @@ async function sendChatMessage() {
     botMsg.textContent = '';
     let botBuffer = '';
 
+    try {
+        // MentIQ's own chatbot streams its reply as Server-Sent Events
+        const response = await fetch('/api/chatbot/stream', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'Accept': 'text/event-stream'
+            },
+            credentials: 'include',
+            body: JSON.stringify({ message: message })
+        });
+
+        if (!response.ok || !response.body) {
+            throw new Error('Chatbot stream not OK');
+        }
+
+        await readServerSentEvents(response, (event, data) => {
+            if (event === 'risk' && data.risk_prediction !== null) {
+                botMsg.dataset.riskPrediction = data.risk_prediction;
+            } else if (event === 'response' && data.response) {
+                botBuffer += data.response;
+                if (!botMsg.isConnected) {
+                    chatMessages.appendChild(botMsg);
+                }
+                botMsg.innerHTML = formatBotMessage(botBuffer);
+                chatMessages.scrollTop = chatMessages.scrollHeight;
+            }
+        });
+    } catch (error) {
+        console.warn('MentIQ chatbot unavailable, falling back to Cohere:', error);
+    }
+
+    if (botBuffer) {
+        return;
+    }
+
     try {
         const response = await fetch('https://api.cohere.ai/v1/chat', {
             method: 'POST',
@@ -609,6 +715,38 @@ async function sendChatMessage() {
     }
 }
 
+async function readServerSentEvents(response, onEvent) {
+    // Minimal text/event-stream parser: frames are separated by a blank line
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const frame = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+
+            let event = 'message';
+            let data = '';
+            for (const line of frame.split('\n')) {
+                if (line.startsWith('event:')) {
+                    event = line.slice(6).trim();
+                } else if (line.startsWith('data:')) {
+                    data += line.slice(5).trim();
+                }
+            }
+            if (data) {
+                onEvent(event, JSON.parse(data));
+            }
+        }
+    }
+}
+
 function formatBotMessage(text) {
     // Convert markdown-style formatting to HTML
     return text
@@ -860,12 +998,12 @@ function loadConsultationForm() {
                     </div>
                     <div class="form-group">
                         <label>Preferred Date</label>
-                        <input type="date" id="consultationDate" required>
+                        <input type="date" id="consultationDate" required onchange="updateConsultationSlots()">
                     </div>
                 </div>
                 <div class="form-group">
                     <label>Select Doctor</label>
-                    <select id="selectedDoctor" required>
+                    <select id="selectedDoctor" required onchange="updateConsultationSlots()">
                         <option value="">Loading doctors...</option>
                     </select>
                 </div>
@@ -882,7 +1020,9 @@ function loadConsultationForm() {
                 </div>
                 <div class="form-group">
                     <label>Preferred Time</label>
-                    <input type="time" id="consultationTime" required>
+                    <select id="consultationTime" required>
+                        <option value="">Select a doctor and date first</option>
+                    </select>
                 </div>
                 <div class="form-group">
                     <label>Message (Optional)</label>
@@ -915,12 +1055,12 @@ function loadConsultationForm() {
                     </div>
                     <div class="form-group">
                         <label>Preferred Date</label>
-                        <input type="date" id="consultationDate" required>
+                        <input type="date" id="consultationDate" required onchange="updateConsultationSlots()">
                     </div>
                 </div>
                 <div class="form-group">
                     <label>Select Doctor</label>
-                    <select id="selectedDoctor" required>
+                    <select id="selectedDoctor" required onchange="updateConsultationSlots()">
                         <option value="">Loading doctors...</option>
                     </select>
                 </div>
@@ -937,7 +1077,9 @@ function loadConsultationForm() {
                 </div>
                 <div class="form-group">
                     <label>Preferred Time</label>
-                    <input type="time" id="consultationTime" required>
+                    <select id="consultationTime" required>
+                        <option value="">Select a doctor and date first</option>
+                    </select>
                 </div>
                 <div class="form-group">
                     <label>Message (Optional)</label>
@@ -951,6 +1093,34 @@ function loadConsultationForm() {
     }
 }
 
+// Fill a time <select> with the doctor's free slots on `date`
+async function loadFreeSlots(doctorId, date, timeSelect) {
+    if (!doctorId || !date) return;
+    timeSelect.innerHTML = '<option value="">Loading free times...</option>';
+    try {
+        const response = await fetch(`/api/doctors/${doctorId}/availability?from=${date}&to=${date}`);
+        const data = await response.json();
+        const free = data.success && data.days.length ? data.days[0].free : [];
+        if (free.length === 0) {
+            timeSelect.innerHTML = '<option value="">No free times on this date</option>';
+            return;
+        }
+        timeSelect.innerHTML = '<option value="">Select a time</option>' +
+            free.map(time => `<option value="${time}">${time}</option>`).join('');
+    } catch (error) {
+        console.error('Error loading free times:', error);
+        timeSelect.innerHTML = '<option value="">Error loading free times</option>';
+    }
+}
+
+function updateConsultationSlots() {
+    loadFreeSlots(
+        document.getElementById('selectedDoctor').value,
+        document.getElementById('consultationDate').value,
+        document.getElementById('consultationTime')
+    );
+}
+
 async function loadDoctorsForConsultation() {
     try {
         const response = await fetch('/api/doctors');
@@ -1024,6 +1194,10 @@ async function submitConsultation(event) {
             loadConsultationForm();
         } else {
             alert('Error: ' + (data.error || 'Failed to book appointment'));
+            if (response.status === 409) {
+                // Someone else took the slot: offer the times still free
+                updateConsultationSlots();
+            }
         }
     } catch (error) {
         console.error('Error submitting consultation:', error);
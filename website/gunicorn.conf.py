@@ -0,0 +1,47 @@
+"""
+Gunicorn configuration for production serving
+Usage: gunicorn -c gunicorn.conf.py wsgi:app
+"""
+import gc
+import multiprocessing
+import os
+
+bind = os.environ.get('BIND', '0.0.0.0:5000')
+# Scoring is CPU-bound: one worker per core, a few threads each for DB/IO waits
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+threads = int(os.environ.get('WEB_THREADS', '4'))
+timeout = int(os.environ.get('WEB_TIMEOUT', '30'))
+graceful_timeout = int(os.environ.get('WEB_GRACEFUL_TIMEOUT', '30'))
+keepalive = 5
+# Recycle workers after this many requests (0 = never)
+max_requests = int(os.environ.get('WEB_MAX_REQUESTS', '0'))
+max_requests_jitter = max_requests // 10
+
+# Load the app, model and schema once in the master; workers are forked from
+# it and share the model's memory copy-on-write
+preload_app = True
+
+# Requests are already logged (with request IDs) by the app
+accesslog = None
+
+
+def when_ready(server):
+    from database import start_checkpointer
+
+    # Move everything loaded so far (model arrays, modules) out of the
+    # garbage collector's reach, so collections in the workers do not write
+    # to - and thereby copy - the pages shared with the master
+    gc.freeze()
+    # A single checkpointer for all workers, running in the master
+    start_checkpointer()
+    server.log.info("MentIQ ready: %s workers x %s threads", server.cfg.workers, server.cfg.threads)
+
+
+def on_reload(server):
+    # SIGHUP: reload the model (e.g. a new full_pipeline.pkl) in the master,
+    # then gunicorn boots fresh workers from it and retires the old ones
+    # once their in-flight requests finish
+    import app
+
+    app.load_model()
+    gc.freeze()
@@ -2,8 +2,11 @@
 Simple script to run the Flask development server
 """
 from app import app
+from database import init_db, start_checkpointer
 
 if __name__ == '__main__':
+    init_db()
+    start_checkpointer()
     print("Starting MentIQ Flask API Server...")
     print("Server will be available at http://localhost:5000")
     print("Press Ctrl+C to stop the server")
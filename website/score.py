@@ -0,0 +1,108 @@
+"""
+Offline batch scorer
+Streams a CSV with the mental_health_data_v2.csv schema through full_pipeline.pkl
+in fixed-size chunks and writes predictions, probabilities and risk bands
+
+Usage: python score.py input.csv output.csv [--chunk-size 5000] [--workers 4]
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+from inference import (
+    MODEL_PATH, FEATURE_COLUMNS, load_pipeline, load_scorer, score_frame,
+    get_risk_level_from_score
+)
+
+# Risk band for every possible integer risk score (0-100)
+RISK_LEVELS = np.array([get_risk_level_from_score(score) for score in range(101)], dtype=object)
+
+# Model used by this process (set once per worker by init_worker)
+_MODEL = None
+
+
+def init_worker(model_path):
+    """Load and compile the model once per process"""
+    global _MODEL
+    _MODEL = load_scorer(load_pipeline(model_path))
+
+
+def score_chunk(chunk):
+    """Append prediction, probability, risk_score and risk_level columns to a chunk"""
+    missing = [column for column in FEATURE_COLUMNS if column not in chunk.columns]
+    if missing:
+        raise ValueError(f"Input is missing columns: {', '.join(missing)}")
+    labels, probabilities = score_frame(_MODEL, chunk[FEATURE_COLUMNS])
+    risk_scores = (probabilities * 100).astype(int)
+    chunk['prediction'] = labels
+    chunk['probability'] = probabilities
+    chunk['risk_score'] = risk_scores
+    chunk['risk_level'] = RISK_LEVELS[risk_scores]
+    return chunk
+
+
+def write_chunk(chunk, output_path, first):
+    chunk.to_csv(output_path, mode='w' if first else 'a', header=first, index=False)
+
+
+def score_file(input_path, output_path, chunk_size, workers, model_path=MODEL_PATH):
+    """Score input_path into output_path, returning the number of rows written"""
+    reader = pd.read_csv(input_path, chunksize=chunk_size)
+    rows = 0
+    first = True
+
+    if workers <= 1:
+        init_worker(model_path)
+        for chunk in reader:
+            write_chunk(score_chunk(chunk), output_path, first)
+            rows += len(chunk)
+            first = False
+        return rows
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(model_path,)) as pool:
+        # Keep a bounded number of chunks in flight so memory stays flat,
+        # and write them back in input order
+        pending = deque()
+        for chunk in reader:
+            pending.append(pool.submit(score_chunk, chunk))
+            if len(pending) >= workers * 2:
+                scored = pending.popleft().result()
+                write_chunk(scored, output_path, first)
+                rows += len(scored)
+                first = False
+        while pending:
+            scored = pending.popleft().result()
+            write_chunk(scored, output_path, first)
+            rows += len(scored)
+            first = False
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Score a CSV of assessments with the MentIQ model')
+    parser.add_argument('input', help='CSV with the mental_health_data_v2.csv columns')
+    parser.add_argument('output', help='CSV to write (input columns + prediction columns)')
+    parser.add_argument('--chunk-size', type=int, default=5000, help='rows per chunk (default 5000)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='scoring processes; 0 uses every core (default 1)')
+    parser.add_argument('--model', default=MODEL_PATH, help='path to full_pipeline.pkl')
+    args = parser.parse_args()
+
+    workers = args.workers or os.cpu_count()
+    start = time.perf_counter()
+    rows = score_file(args.input, args.output, args.chunk_size, workers, args.model)
+    elapsed = time.perf_counter() - start
+    print(f"Scored {rows} rows in {elapsed:.2f}s ({rows / elapsed:,.0f} rows/s) -> {args.output}")
+
+
+if __name__ == '__main__':
+    main()
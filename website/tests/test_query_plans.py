@@ -0,0 +1,151 @@
+"""
+Query plans of the API endpoints
+Calls every endpoint that reads or changes the database through the Flask
+test client, records the SQL its connections actually execute, and checks
+each statement with EXPLAIN QUERY PLAN: no table is read by a full scan
+and no ORDER BY needs a temporary B-tree
+
+Usage: python -m pytest tests/test_query_plans.py
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+WEBSITE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.environ['MENTIQ_DB_PATH'] = os.path.join(tempfile.mkdtemp(), 'test_query_plans.db')
+sys.path.insert(0, WEBSITE_DIR)
+sys.path.insert(0, os.path.join(WEBSITE_DIR, 'backend'))
+
+import database
+
+# Every statement run on a pool connection, as expanded SQL
+EXECUTED = []
+
+_connect = database.ConnectionPool.connect
+
+
+def _traced_connect(pool):
+    conn = _connect(pool)
+    conn.set_trace_callback(EXECUTED.append)
+    return conn
+
+
+# Before the app imports, so no connection is opened untraced
+database.ConnectionPool.connect = _traced_connect
+
+from app import app
+
+# Nearby search sorts the R*Tree's candidates by their computed distance,
+# an order no index can hold
+COMPUTED_SORTS = ('ORDER BY distance_km',)
+
+PASSWORD = 'pw-123456'
+DAY = '2030-01-07'
+
+
+def call(client, method, path, **kwargs):
+    response = client.open(path, method=method, **kwargs)
+    assert response.status_code < 500, (method, path, response.get_data(as_text=True))
+    return response
+
+
+def exercise_api(doctor, patient):
+    """One call to each database endpoint, with and without its filters"""
+    for path in ('/api/articles', '/api/articles?category=Depression',
+                 '/api/doctors', '/api/doctors?country=Egypt', '/api/doctors?country=Egypt&city=Cairo',
+                 '/api/doctors?city=Cairo', '/api/doctors?specialty=Psychiatrist',
+                 '/api/doctors?country=Egypt&specialty=Psychiatrist',
+                 '/api/doctors/nearby?lat=30.04&lon=31.24', '/api/doctors/nearby?lat=30.04&lon=31.24&radius=500',
+                 '/api/search?q=cairo+psychiatrist', '/api/search?q=anxiety&type=articles',
+                 '/api/search?q=psychiatrist+atlantis', '/api/search?q=cairo+london'):
+        call(patient, 'GET', path)
+
+    call(patient, 'POST', '/api/auth/login', json={'email': 'patient@example.com', 'password': PASSWORD})
+    call(patient, 'GET', '/api/auth/me')
+    call(patient, 'POST', '/api/assessment', json={'age': 30, 'sleepHours': 5, 'hopelessness': True})
+    call(patient, 'GET', '/api/profile/assessment')
+    call(patient, 'POST', '/api/chatbot', json={'message': 'I feel anxious and cannot sleep'})
+
+    doctor_id = call(doctor, 'POST', '/api/auth/login',
+                     json={'email': 'doctor@example.com', 'password': PASSWORD}).get_json()['user']['id']
+    call(patient, 'GET', f'/api/doctors/{doctor_id}/availability?from={DAY}&to=2030-01-13')
+    booked = [call(patient, 'POST', '/api/appointments', json={
+        'doctor_id': doctor_id, 'appointment_date': DAY, 'appointment_time': time,
+    }).get_json()['appointment_id'] for time in ('09:00', '10:00', '11:00')]
+    call(patient, 'POST', '/api/appointments', json={
+        'doctor_id': doctor_id, 'appointment_date': DAY, 'appointment_time': '09:00',
+    })
+    call(patient, 'POST', '/api/consultation', json={
+        'name': 'Pat', 'email': 'patient@example.com', 'phone': '1', 'date': DAY, 'time': '12:00',
+        'type': 'video', 'doctor_id': doctor_id,
+    })
+
+    for client in (doctor, patient):
+        cursor = call(client, 'GET', '/api/profile/appointments?limit=1').get_json()['next_cursor']
+        call(client, 'GET', f'/api/profile/appointments?limit=1&cursor={cursor}')
+        call(client, 'GET', f'/api/profile/appointments?status=pending,confirmed&from={DAY}&to={DAY}')
+    call(doctor, 'GET', '/api/doctor/stats')
+    call(doctor, 'GET', f'/api/doctor/stats?date={DAY}')
+    call(doctor, 'PUT', f'/api/appointments/{booked[0]}/status', json={'status': 'confirmed'})
+    call(patient, 'PUT', f'/api/appointments/{booked[1]}/status', json={'status': 'cancelled'})
+    call(patient, 'DELETE', f'/api/appointments/{booked[1]}')
+    call(patient, 'DELETE', f'/api/appointments/{booked[0]}')
+
+
+@pytest.fixture(scope='module')
+def statements():
+    database.init_db()
+    doctor, patient = app.test_client(), app.test_client()
+    call(doctor, 'POST', '/api/auth/register', json={
+        'email': 'doctor@example.com', 'password': PASSWORD, 'name': 'Dr. Test',
+        'user_type': 'doctor', 'specialty': 'Psychiatrist',
+    })
+    call(patient, 'POST', '/api/auth/register', json={
+        'email': 'patient@example.com', 'password': PASSWORD, 'name': 'Pat', 'user_type': 'patient',
+    })
+    del EXECUTED[:]
+    exercise_api(doctor, patient)
+    assert database.write_queue.flush(timeout=5)
+    # Trigger bodies are reported as comments; the statement firing them is checked
+    return sorted({sql.strip() for sql in EXECUTED
+                   if sql.lstrip().split(None, 1)[0].upper() in ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE')})
+
+
+def query_plan(sql):
+    conn = database.get_db_connection()
+    try:
+        return [row['detail'] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql)]
+    finally:
+        conn.close()
+
+
+def test_every_endpoint_query_was_recorded(statements):
+    joined = '\n'.join(statements)
+    for fragment in ('FROM appointments a', 'FROM assessments', 'FROM doctors WHERE', 'FROM articles',
+                     'FROM doctor_appointment_stats', 'doctors_geo', 'doctors_fts', 'articles_fts',
+                     'INSERT INTO appointments', 'UPDATE appointments', 'DELETE FROM appointments',
+                     'INSERT INTO assessments', 'INSERT INTO chatbot_conversations'):
+        assert fragment in joined, f'no statement with {fragment!r} was executed'
+
+
+def test_no_full_scans_or_sorts(statements):
+    failures = []
+    for sql in statements:
+        computed_sort = any(fragment in sql for fragment in COMPUTED_SORTS)
+        for detail in query_plan(sql):
+            # A SCAN of a virtual table (FTS5, R*Tree) is its own index lookup,
+            # and SCAN ... USING INDEX reads rows in index order
+            full_scan = (detail.startswith('SCAN') and 'USING' not in detail
+                         and 'VIRTUAL TABLE' not in detail and 'CONSTANT ROW' not in detail)
+            if full_scan or ('TEMP B-TREE' in detail and not computed_sort):
+                failures.append(f'{detail}\n    in: {" ".join(sql.split())}')
+    assert not failures, 'statements not served by an index:\n  ' + '\n  '.join(failures)
+
+
+def test_unfiltered_doctor_list_reads_the_rating_index(statements):
+    sql = next(sql for sql in statements if ' '.join(sql.split()).startswith(
+        'SELECT * FROM doctors WHERE 1=1 ORDER BY'))
+    assert any('idx_doctors_rating' in detail for detail in query_plan(sql))
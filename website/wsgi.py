@@ -0,0 +1,9 @@
+"""
+WSGI entry point for production serving
+Imports the app (which loads the ML model) and initializes the database, so
+with gunicorn's preload_app both happen once in the master before forking
+"""
+from app import app
+from database import init_db
+
+init_db()